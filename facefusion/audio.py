@@ -1,7 +1,6 @@
 from typing import Optional, Any, List
 from functools import lru_cache
 import numpy
-import scipy
 
 from facefusion.filesystem import is_audio
 from facefusion.ffmpeg import read_audio_buffer
@@ -37,6 +36,8 @@ def normalize_audio(audio : numpy.ndarray[Any, Any]) -> Audio:
 
 
 def filter_audio(audio : Audio, filter_coefficient : float) -> Audio:
+    import scipy.signal
+
     audio = scipy.signal.lfilter([ 1.0, filter_coefficient ], [1.0], audio)
     return audio
 
@@ -51,6 +52,8 @@ def convert_mel_to_hertz(mel : numpy.ndarray[Any, Any]) -> numpy.ndarray[Any, An
 
 @lru_cache(maxsize = None)
 def create_static_mel_filter(sample_rate : int, filter_total : int, filter_size : int, frequency_minimum : float, frequency_maximum : float) -> numpy.ndarray[Any, Any]:
+    import scipy.signal
+
     frequency_maximum = min(sample_rate / 2, frequency_maximum)
     mel_filter = numpy.zeros((filter_total, filter_size // 2 + 1))
     mel_bins = numpy.linspace(convert_hertz_to_mel(frequency_minimum), convert_hertz_to_mel(frequency_maximum), filter_total + 2)
@@ -61,6 +64,8 @@ def create_static_mel_filter(sample_rate : int, filter_total : int, filter_size
 
 
 def create_spectrogram(audio : Audio, sample_rate : int, filter_total : int, filter_size : int, frequency_minimum : float, frequency_maximum : float) -> Spectrogram:
+    import scipy.signal
+
     mel_filter = create_static_mel_filter(sample_rate, filter_total, filter_size, frequency_minimum, frequency_maximum)
     spectrogram = scipy.signal.stft(audio, nperseg = filter_size, noverlap = 600, nfft = filter_size)[2]
     spectrogram = numpy.dot(mel_filter, numpy.abs(spectrogram))
@@ -0,0 +1,263 @@
+import csv
+import json
+import os
+import statistics
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy
+
+import facefusion.globals
+from facefusion import logger, wording
+from facefusion.content_analyser import clear_content_analyser
+from facefusion.core import conditional_process
+from facefusion.execution_helper import decode_execution_providers
+from facefusion.face_analyser import clear_face_analyser
+from facefusion.face_store import clear_static_faces, clear_reference_faces
+from facefusion.ff_status import FFStatus
+from facefusion.ffmpeg import run_ffmpeg
+from facefusion.filesystem import is_image, is_video, output_dir
+from facefusion.job_params import JobParams
+from facefusion.memory import get_process_memory
+from facefusion.normalizer import normalize_output_path
+from facefusion.processors.frame import globals as frame_processors_globals
+from facefusion.processors.frame.core import get_frame_processors_modules, clear_frame_processors_modules, \
+    get_frame_latencies
+from facefusion.typing import BenchmarkSetup
+from facefusion.vision import count_video_frame_total, detect_video_resolution, detect_video_fps, pack_resolution
+
+BENCHMARK_DIRECTORY_PATH = os.path.join(output_dir, 'facefusion', 'benchmark')
+BENCHMARK_FIELDS = \
+    [
+        'target',
+        'setup',
+        'cycles',
+        'frame_total',
+        'average_run',
+        'fastest_run',
+        'slowest_run',
+        'fps',
+        'latency_p50',
+        'latency_p95',
+        'peak_memory',
+        'stage_times'
+    ]
+
+
+def create_benchmark_target(source_path: str, resolution: int, face_count: int, frame_total: int) -> Optional[str]:
+    # counts from the config skip the argument choices, a target needs at least one face
+    face_count = max(1, face_count)
+    target_width = round(resolution * 16 / 9 / 2) * 2
+    target_height = resolution
+    target_name = 'target-' + os.path.splitext(os.path.basename(source_path))[0] + '-' + str(resolution) + 'p-' + \
+                  str(face_count) + 'f-' + str(frame_total) + '.mp4'
+    target_path = os.path.join(BENCHMARK_DIRECTORY_PATH, target_name)
+    if is_video(target_path):
+        return target_path
+    os.makedirs(BENCHMARK_DIRECTORY_PATH, exist_ok=True)
+    face_width = target_width // face_count
+    face_height = target_height // 2
+    face_labels = ''.join('[face' + str(index) + ']' for index in range(face_count))
+    filters = ['[1:v]scale=' + str(face_width) + ':' + str(face_height) +
+               ':force_original_aspect_ratio=decrease,split=' + str(face_count) + face_labels]
+    for index in range(face_count):
+        # move each face slightly to avoid a static scene
+        overlay_x = str(index * face_width) + '+(' + str(face_width) + '-w)/2+' + str(face_width // 20) + '*sin(t*2)'
+        overlay_input = '[0:v]' if index == 0 else '[video' + str(index - 1) + ']'
+        overlay_output = '[video' + str(index) + ']'
+        filters.append(overlay_input + '[face' + str(index) + ']overlay=x=\'' + overlay_x + '\':y=(H-h)/2' +
+                       overlay_output)
+    commands = ['-f', 'lavfi', '-i', 'color=c=0x404040:s=' + str(target_width) + 'x' + str(target_height) + ':r=25',
+                '-loop', '1', '-i', source_path, '-filter_complex', ';'.join(filters), '-map',
+                '[video' + str(face_count - 1) + ']', '-frames:v', str(frame_total), '-c:v', 'libx264', '-preset',
+                'ultrafast', '-pix_fmt', 'yuv420p', '-an', '-y', target_path + '.tmp.mp4']
+    if not run_ffmpeg(commands):
+        logger.error(wording.get('benchmark_target_not_created').format(target_path=target_path), __name__.upper())
+        return None
+    os.replace(target_path + '.tmp.mp4', target_path)
+    return target_path
+
+
+def parse_benchmark_matrix(benchmark_matrix: List[str]) -> List[BenchmarkSetup]:
+    benchmark_setups = []
+    for benchmark_entry in benchmark_matrix:
+        frame_processor_entries, _, execution_provider = benchmark_entry.partition('@')
+        frame_processors = []
+        frame_processor_models = {}
+        for frame_processor_entry in frame_processor_entries.split(','):
+            frame_processor, _, frame_processor_model = frame_processor_entry.partition(':')
+            frame_processors.append(frame_processor)
+            if frame_processor_model:
+                frame_processor_models[frame_processor] = frame_processor_model
+        benchmark_setups.append(
+            {
+                'name': benchmark_entry,
+                'frame_processors': frame_processors,
+                'frame_processor_models': frame_processor_models,
+                'execution_providers': [execution_provider] if execution_provider else []
+            })
+    return benchmark_setups
+
+
+def apply_benchmark_setup(benchmark_setup: BenchmarkSetup) -> None:
+    clear_frame_processors_modules()
+    clear_face_analyser()
+    clear_content_analyser()
+    facefusion.globals.frame_processors = benchmark_setup.get('frame_processors')
+    for frame_processor, frame_processor_model in benchmark_setup.get('frame_processor_models').items():
+        if hasattr(frame_processors_globals, frame_processor + '_model'):
+            setattr(frame_processors_globals, frame_processor + '_model', frame_processor_model)
+    if benchmark_setup.get('execution_providers'):
+        facefusion.globals.execution_providers = decode_execution_providers(benchmark_setup.get('execution_providers'))
+
+
+def sample_peak_memory(memory_sample: Dict[str, int], sample_event: threading.Event) -> None:
+    while not sample_event.wait(0.05):
+        memory_sample['peak'] = max(memory_sample.get('peak', 0), get_process_memory())
+
+
+def benchmark(target_path: str, benchmark_setup: BenchmarkSetup, benchmark_cycles: int,
+              benchmark_warmup_cycles: int) -> Dict[str, Any]:
+    facefusion.globals.target_path = target_path
+    facefusion.globals.output_path = normalize_output_path(facefusion.globals.source_paths, target_path,
+                                                           BENCHMARK_DIRECTORY_PATH)
+    facefusion.globals.output_video_resolution = pack_resolution(detect_video_resolution(target_path))
+    facefusion.globals.output_video_fps = detect_video_fps(target_path)
+    video_frame_total = count_video_frame_total(target_path)
+    status = FFStatus()
+    process_times = []
+    frame_latencies = []
+    stage_times: Dict[str, List[float]] = {}
+    memory_sample = {'peak': get_process_memory()}
+    sample_event = threading.Event()
+
+    for frame_processor_module in get_frame_processors_modules(facefusion.globals.frame_processors):
+        frame_processor_module.get_frame_processor()
+    threading.Thread(target=sample_peak_memory, args=(memory_sample, sample_event), daemon=True).start()
+    try:
+        for index in range(benchmark_warmup_cycles + benchmark_cycles):
+            clear_static_faces()
+            clear_reference_faces()
+            job = JobParams().from_dict(facefusion.globals.__dict__)
+            status.start([job])
+            start_time = time.perf_counter()
+            conditional_process(job)
+            process_time = time.perf_counter() - start_time
+            status.end_stage()
+            if index < benchmark_warmup_cycles:
+                continue
+            process_times.append(process_time)
+            frame_latencies.extend(get_frame_latencies())
+            for stage, stage_time in status.stage_times.items():
+                stage_times.setdefault(stage, []).append(stage_time)
+            status.finish()
+    finally:
+        sample_event.set()
+    # without measured cycles the timings stay empty instead of failing the whole report
+    average_run = statistics.mean(process_times) if process_times else None
+    return\
+        {
+            'target': os.path.basename(target_path),
+            'setup': benchmark_setup.get('name'),
+            'cycles': benchmark_cycles,
+            'frame_total': video_frame_total,
+            'average_run': round(average_run, 3) if average_run else None,
+            'fastest_run': round(min(process_times), 3) if process_times else None,
+            'slowest_run': round(max(process_times), 3) if process_times else None,
+            'fps': round(video_frame_total / average_run, 2) if average_run else None,
+            'latency_p50': round(float(numpy.percentile(frame_latencies, 50)) * 1000, 2) if frame_latencies else None,
+            'latency_p95': round(float(numpy.percentile(frame_latencies, 95)) * 1000, 2) if frame_latencies else None,
+            'peak_memory': memory_sample.get('peak'),
+            'stage_times': {stage: round(statistics.mean(stage_time), 3) for stage, stage_time in stage_times.items()}
+        }
+
+
+def run_benchmarks() -> List[Dict[str, Any]]:
+    source_path = next((source_path for source_path in facefusion.globals.source_paths or [] if is_image(source_path)),
+                       None)
+    if not source_path:
+        logger.error(wording.get('select_image_source'), __name__.upper())
+        return []
+    facefusion.globals.face_selector_mode = 'many'
+    facefusion.globals.output_video_preset = 'ultrafast'
+    facefusion.globals.skip_audio = True
+    benchmark_setups = parse_benchmark_matrix(facefusion.globals.benchmark_matrix or
+                                              [','.join(facefusion.globals.frame_processors)])
+    benchmark_results = []
+    for benchmark_setup in benchmark_setups:
+        apply_benchmark_setup(benchmark_setup)
+        for resolution in facefusion.globals.benchmark_resolutions:
+            for face_count in facefusion.globals.benchmark_face_counts:
+                target_path = create_benchmark_target(source_path, resolution, face_count,
+                                                      facefusion.globals.benchmark_frame_total)
+                if target_path:
+                    benchmark_result = benchmark(target_path, benchmark_setup, facefusion.globals.benchmark_cycles,
+                                                 facefusion.globals.benchmark_warmup_cycles)
+                    logger.info(wording.get('benchmark_result').format(setup=benchmark_result.get('setup'),
+                                                                       target=benchmark_result.get('target'),
+                                                                       fps=benchmark_result.get('fps')),
+                                __name__.upper())
+                    benchmark_results.append(benchmark_result)
+    clear_frame_processors_modules()
+    return benchmark_results
+
+
+def write_benchmark_results(benchmark_results: List[Dict[str, Any]], report_path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, 'w') as report_file:
+        json.dump({'results': benchmark_results}, report_file, indent=4)
+    with open(os.path.splitext(report_path)[0] + '.csv', 'w', newline='') as report_file:
+        csv_writer = csv.DictWriter(report_file, fieldnames=BENCHMARK_FIELDS)
+        csv_writer.writeheader()
+        for benchmark_result in benchmark_results:
+            csv_writer.writerow({**benchmark_result, 'stage_times': json.dumps(benchmark_result.get('stage_times'))})
+
+
+def read_benchmark_results(report_path: str) -> List[Dict[str, Any]]:
+    try:
+        with open(report_path, 'r') as report_file:
+            return json.load(report_file).get('results', [])
+    except (OSError, ValueError):
+        return []
+
+
+def compare_benchmark_results(benchmark_results: List[Dict[str, Any]], baseline_results: List[Dict[str, Any]],
+                              tolerance: float) -> List[str]:
+    regressions = []
+    baseline_lookup = {(baseline_result.get('target'), baseline_result.get('setup')): baseline_result for
+                       baseline_result in baseline_results}
+    for benchmark_result in benchmark_results:
+        baseline_result = baseline_lookup.get((benchmark_result.get('target'), benchmark_result.get('setup')))
+        if not baseline_result:
+            continue
+        if baseline_result.get('fps') and benchmark_result.get('fps') and \
+                benchmark_result.get('fps') < baseline_result.get('fps') * (1 - tolerance):
+            regressions.append(create_benchmark_regression(benchmark_result, baseline_result, 'fps'))
+        for key in ['latency_p95', 'peak_memory']:
+            if baseline_result.get(key) and benchmark_result.get(key) and \
+                    benchmark_result.get(key) > baseline_result.get(key) * (1 + tolerance):
+                regressions.append(create_benchmark_regression(benchmark_result, baseline_result, key))
+    return regressions
+
+
+def create_benchmark_regression(benchmark_result: Dict[str, Any], baseline_result: Dict[str, Any], key: str) -> str:
+    return wording.get('benchmark_regression_value').format(setup=benchmark_result.get('setup'),
+                                                            target=benchmark_result.get('target'), key=key,
+                                                            baseline=baseline_result.get(key),
+                                                            value=benchmark_result.get(key))
+
+
+def run() -> bool:
+    benchmark_results = run_benchmarks()
+    report_path = facefusion.globals.benchmark_report_path or os.path.join(BENCHMARK_DIRECTORY_PATH, 'benchmark.json')
+    write_benchmark_results(benchmark_results, report_path)
+    logger.info(wording.get('benchmark_report_written').format(report_path=report_path), __name__.upper())
+    if facefusion.globals.benchmark_baseline_path:
+        baseline_results = read_benchmark_results(facefusion.globals.benchmark_baseline_path)
+        regressions = compare_benchmark_results(benchmark_results, baseline_results,
+                                                facefusion.globals.benchmark_regression_tolerance)
+        for regression in regressions:
+            logger.warn(wording.get('benchmark_regression').format(regression=regression), __name__.upper())
+        return not regressions
+    return bool(benchmark_results)
@@ -2,7 +2,7 @@ from typing import List, Dict
 
 from facefusion.typing import VideoMemoryStrategy, FaceSelectorMode, FaceAnalyserOrder, FaceAnalyserAge, \
     FaceAnalyserGender, FaceDetectorModel, FaceMaskType, FaceMaskRegion, TempFrameFormat, OutputVideoEncoder, \
-    OutputVideoPreset
+    OutputVideoPreset, StreamSink, ProfileMode
 from facefusion.common_helper import create_int_range, create_float_range
 
 video_memory_strategies: List[VideoMemoryStrategy] = ['strict', 'moderate', 'tolerant']
@@ -10,6 +10,8 @@ face_analyser_orders: List[FaceAnalyserOrder] = ['left-right', 'right-left', 'to
                                                  'large-small', 'best-worst', 'worst-best']
 face_analyser_ages: List[FaceAnalyserAge] = ['child', 'teen', 'adult', 'senior']
 face_analyser_genders: List[FaceAnalyserGender] = ['female', 'male']
+stream_sinks: List[StreamSink] = ['null', 'raw', 'ffmpeg']
+profile_modes: List[ProfileMode] = ['trace', 'flamegraph', 'imports']
 face_detector_set: Dict[FaceDetectorModel, List[str]] = \
     {
         'retinaface': ['160x160', '320x320', '480x480', '512x512', '640x640'],
@@ -20,7 +22,7 @@ face_selector_modes: List[FaceSelectorMode] = ['reference', 'one', 'many']
 face_mask_types: List[FaceMaskType] = ['box', 'occlusion', 'region']
 face_mask_regions: List[FaceMaskRegion] = ['skin', 'left-eyebrow', 'right-eyebrow', 'left-eye', 'right-eye',
                                            'eye-glasses', 'nose', 'mouth', 'upper-lip', 'lower-lip']
-temp_frame_formats: List[TempFrameFormat] = ['bmp', 'jpg', 'png']
+temp_frame_formats: List[TempFrameFormat] = ['bmp', 'jpg', 'png', 'tiff', 'raw']
 output_video_encoders: List[OutputVideoEncoder] = ['libx264', 'libx265', 'libvpx-vp9', 'h264_nvenc', 'hevc_nvenc']
 output_video_presets: List[OutputVideoPreset] = ['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium',
                                                  'slow', 'slower', 'veryslow']
@@ -35,5 +37,10 @@ face_mask_blur_range: List[float] = create_float_range(0.0, 1.0, 0.05)
 face_mask_padding_range: List[int] = create_int_range(0, 100, 1)
 reference_face_distance_range: List[float] = create_float_range(0.0, 1.5, 0.05)
 temp_frame_quality_range: List[int] = create_int_range(0, 100, 1)
+temp_frame_compression_range: List[int] = create_int_range(0, 9, 1)
 output_image_quality_range: List[int] = create_int_range(0, 100, 1)
 output_video_quality_range: List[int] = create_int_range(0, 100, 1)
+benchmark_face_count_range: List[int] = create_int_range(1, 8, 1)
+benchmark_frame_total_range: List[int] = create_int_range(1, 1000, 1)
+benchmark_cycles_range: List[int] = create_int_range(1, 100, 1)
+benchmark_warmup_cycles_range: List[int] = create_int_range(0, 10, 1)
@@ -0,0 +1,133 @@
+import os
+import shutil
+import time
+from typing import List, Optional
+
+import cv2
+import numpy
+
+from facefusion import logger, wording
+from facefusion.filesystem import WORKSPACE_DIRECTORY_PATH, get_ram_workspace_budget
+from facefusion.typing import TempFrameCodec, TempFrameFormat, VisionFrame
+from facefusion.vision import get_video_frame, unpack_resolution, create_image_write_params
+
+CALIBRATION_SAMPLE_TOTAL = 8
+CALIBRATION_LOSSLESS_PSNR = 100.0
+TEMP_DISK_RESERVE = 0.9
+TEMP_FRAME_CODECS =\
+    [
+        ('raw', None),
+        ('bmp', None),
+        ('tiff', None),
+        ('png', 0),
+        ('png', 1),
+        ('png', 3),
+        ('png', 6),
+        ('jpg', None)
+    ]
+
+
+def sample_vision_frames(target_path: str, frame_start: int, frame_end: int,
+                         resolution: Optional[str]) -> List[VisionFrame]:
+    vision_frames = []
+    sample_total = max(1, min(CALIBRATION_SAMPLE_TOTAL, frame_end - frame_start))
+    for frame_number in numpy.linspace(frame_start + 1, frame_end, sample_total, dtype=int):
+        vision_frame = get_video_frame(target_path, int(frame_number))
+        if vision_frame is not None:
+            if resolution:
+                vision_frame = cv2.resize(vision_frame, unpack_resolution(resolution))
+            vision_frames.append(vision_frame)
+    return vision_frames
+
+
+def measure_temp_frame_codec(vision_frames: List[VisionFrame], temp_frame_format: TempFrameFormat,
+                             temp_frame_quality: int, temp_frame_compression: Optional[int]) -> TempFrameCodec:
+    encode_time = 0.0
+    decode_time = 0.0
+    frame_size = 0
+    psnr = CALIBRATION_LOSSLESS_PSNR
+    image_write_params = create_image_write_params('.' + temp_frame_format, temp_frame_quality, temp_frame_compression)
+    for vision_frame in vision_frames:
+        start_time = time.perf_counter()
+        if temp_frame_format == 'raw':
+            frame_buffer = vision_frame.tobytes()
+        else:
+            frame_buffer = cv2.imencode('.' + temp_frame_format, vision_frame, image_write_params)[1]
+        encode_time += time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        if temp_frame_format == 'raw':
+            decode_frame = numpy.frombuffer(frame_buffer, vision_frame.dtype).reshape(vision_frame.shape)
+        else:
+            decode_frame = cv2.imdecode(frame_buffer, cv2.IMREAD_COLOR)
+        decode_time += time.perf_counter() - start_time
+        frame_size += len(frame_buffer)
+        psnr = min(psnr, cv2.PSNR(vision_frame, decode_frame))
+    return\
+        {
+            'temp_frame_format': temp_frame_format,
+            'temp_frame_quality': temp_frame_quality,
+            'temp_frame_compression': temp_frame_compression,
+            'encode_time': encode_time / len(vision_frames),
+            'decode_time': decode_time / len(vision_frames),
+            'frame_size': frame_size // len(vision_frames),
+            'psnr': round(float(psnr), 2)
+        }
+
+
+def get_required_psnr(temp_frame_quality: int) -> float:
+    # full quality asks for a lossless codec, anything below maps onto the usual jpeg range
+    if temp_frame_quality >= 100:
+        return CALIBRATION_LOSSLESS_PSNR
+    return 30 + temp_frame_quality * 0.15
+
+
+def get_temp_disk_budget() -> int:
+    temp_directory_path = WORKSPACE_DIRECTORY_PATH
+    while not os.path.isdir(temp_directory_path) and os.path.dirname(temp_directory_path) != temp_directory_path:
+        temp_directory_path = os.path.dirname(temp_directory_path)
+    return int(shutil.disk_usage(temp_directory_path).free * TEMP_DISK_RESERVE)
+
+
+def get_temp_budgets() -> List[int]:
+    # the job lands on the memory tier when its frames fit there, the disk takes everything else
+    ram_workspace_budget = get_ram_workspace_budget()
+    if ram_workspace_budget:
+        return [ram_workspace_budget, get_temp_disk_budget()]
+    return [get_temp_disk_budget()]
+
+
+def select_temp_frame_codec(temp_frame_codecs: List[TempFrameCodec], frame_total: int, required_psnr: float,
+                            temp_budgets: List[int]) -> TempFrameCodec:
+    for temp_budget in temp_budgets:
+        fitting_codecs = [temp_frame_codec for temp_frame_codec in temp_frame_codecs if
+                          temp_frame_codec.get('psnr') >= required_psnr and
+                          temp_frame_codec.get('frame_size') * frame_total <= temp_budget]
+        # every frame is encoded once per processor and decoded once per processor
+        if fitting_codecs:
+            return min(fitting_codecs, key=lambda temp_frame_codec: temp_frame_codec.get('encode_time') +
+                       temp_frame_codec.get('decode_time'))
+    logger.warn(wording.get('temp_frame_codec_exceeds_budget'), __name__.upper())
+    return min(temp_frame_codecs, key=lambda temp_frame_codec: temp_frame_codec.get('frame_size'))
+
+
+def calibrate_temp_frame_codec(target_path: str, frame_start: int, frame_end: int, frame_total: int,
+                               resolution: Optional[str], temp_frame_quality: int,
+                               temp_frame_formats: List[TempFrameFormat]) -> Optional[TempFrameCodec]:
+    vision_frames = sample_vision_frames(target_path, frame_start, frame_end, resolution)
+    if not vision_frames:
+        return None
+    temp_frame_codecs = [measure_temp_frame_codec(vision_frames, temp_frame_format, temp_frame_quality,
+                                                  temp_frame_compression) for
+                         temp_frame_format, temp_frame_compression in TEMP_FRAME_CODECS if
+                         temp_frame_format in temp_frame_formats]
+    for temp_frame_codec in temp_frame_codecs:
+        logger.debug(wording.get('temp_frame_codec_measured').format(
+            temp_frame_format=temp_frame_codec.get('temp_frame_format'),
+            temp_frame_compression=temp_frame_codec.get('temp_frame_compression'),
+            milliseconds=round((temp_frame_codec.get('encode_time') + temp_frame_codec.get('decode_time')) * 1000, 2),
+            frame_size=temp_frame_codec.get('frame_size'), psnr=temp_frame_codec.get('psnr')), __name__.upper())
+    temp_frame_codec = select_temp_frame_codec(temp_frame_codecs, frame_total, get_required_psnr(temp_frame_quality),
+                                               get_temp_budgets())
+    logger.info(wording.get('temp_frame_codec_selected').format(
+        temp_frame_format=temp_frame_codec.get('temp_frame_format')), __name__.upper())
+    return temp_frame_codec
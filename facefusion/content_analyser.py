@@ -1,5 +1,7 @@
+import hashlib
+import json
 import os
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 from functools import lru_cache
 import threading
 import cv2
@@ -11,11 +13,12 @@ import facefusion.globals
 from facefusion import wording
 from facefusion.typing import VisionFrame, ModelValue, Fps
 from facefusion.execution_helper import apply_execution_provider_options
-from facefusion.vision import get_video_frame, count_video_frame_total, read_image, detect_video_fps
-from facefusion.filesystem import resolve_relative_path
+from facefusion.vision import count_video_frame_total, read_image, detect_video_fps
+from facefusion.filesystem import resolve_relative_path, output_dir
 from facefusion.download import conditional_download
+from facefusion.metrics import timed
+from facefusion.model_registry import get_model, clear_model
 
-CONTENT_ANALYSER = None
 THREAD_LOCK: threading.Lock = threading.Lock()
 MODELS: Dict[str, ModelValue] = \
     {
@@ -27,27 +30,26 @@ MODELS: Dict[str, ModelValue] = \
     }
 PROBABILITY_LIMIT = 0.80
 RATE_LIMIT = 5
-STREAM_COUNTER = 0
+STREAM_FRAME: Optional[VisionFrame] = None
+STREAM_ANALYSER_EVENT: Optional[threading.Event] = None
+STREAM_STOP_EVENT: threading.Event = threading.Event()
+ANALYSE_BATCH_SIZE = 16
+CONTENT_CHUNK_SIZE = 1024 * 1024
+CONTENT_VERDICTS = None
+CONTENT_VERDICTS_PATH = os.path.join(output_dir, 'facefusion', 'metadata', 'content_analyser.json')
 DEBUG = os.environ.get('SKIP_PREDICTOR', False)
 
 
 def get_content_analyser() -> Any:
     if DEBUG:
         return None
-    global CONTENT_ANALYSER
-
-    with THREAD_LOCK:
-        if CONTENT_ANALYSER is None:
-            model_path = MODELS.get('open_nsfw').get('path')
-            CONTENT_ANALYSER = onnxruntime.InferenceSession(model_path, providers=apply_execution_provider_options(
-                facefusion.globals.execution_providers))
-    return CONTENT_ANALYSER
+    model_path = MODELS.get('open_nsfw').get('path')
+    return get_model('content_analyser', model_path, lambda: onnxruntime.InferenceSession(model_path,
+        providers=apply_execution_provider_options(facefusion.globals.execution_providers)))
 
 
 def clear_content_analyser() -> None:
-    global CONTENT_ANALYSER
-
-    CONTENT_ANALYSER = None
+    clear_model('content_analyser')
 
 
 def pre_check() -> bool:
@@ -60,15 +62,39 @@ def pre_check() -> bool:
     return True
 
 
-def analyse_stream(frame: VisionFrame, video_fps: Fps) -> bool:
+def start_stream_analyser() -> None:
+    global STREAM_ANALYSER_EVENT
+    global STREAM_FRAME
+
+    stop_stream_analyser()
+    STREAM_FRAME = None
+    STREAM_STOP_EVENT.clear()
     if DEBUG:
-        return False
-    global STREAM_COUNTER
+        return
+    STREAM_ANALYSER_EVENT = threading.Event()
+    threading.Thread(target=run_stream_analyser, args=(STREAM_ANALYSER_EVENT,), daemon=True).start()
+
+
+def stop_stream_analyser() -> None:
+    global STREAM_ANALYSER_EVENT
+
+    if STREAM_ANALYSER_EVENT:
+        STREAM_ANALYSER_EVENT.set()
+    STREAM_ANALYSER_EVENT = None
+
+
+def run_stream_analyser(stream_analyser_event: threading.Event) -> None:
+    while not stream_analyser_event.wait(facefusion.globals.content_analyser_interval or 1.0):
+        frame = STREAM_FRAME
+        if frame is not None and analyse_frame(frame):
+            STREAM_STOP_EVENT.set()
 
-    STREAM_COUNTER = STREAM_COUNTER + 1
-    if STREAM_COUNTER % int(video_fps) == 0:
-        return analyse_frame(frame)
-    return False
+
+def analyse_stream(frame: VisionFrame) -> bool:
+    global STREAM_FRAME
+
+    STREAM_FRAME = frame
+    return STREAM_STOP_EVENT.is_set()
 
 
 def prepare_frame(frame: VisionFrame) -> VisionFrame:
@@ -78,9 +104,14 @@ def prepare_frame(frame: VisionFrame) -> VisionFrame:
     return frame
 
 
+@timed('content_analyser')
 def analyse_frame(frame: VisionFrame) -> bool:
     if DEBUG:
         return False
+    return detect_frame(frame)
+
+
+def detect_frame(frame: VisionFrame) -> bool:
     content_analyser = get_content_analyser()
     frame = prepare_frame(frame)
     probability = content_analyser.run(None,
@@ -105,16 +136,102 @@ def analyse_video(video_path: str, start_frame: int, end_frame: int) -> bool:
     video_frame_total = count_video_frame_total(video_path)
     video_fps = detect_video_fps(video_path)
     frame_range = range(start_frame or 0, end_frame or video_frame_total)
-    rate = 0.0
+    if not video_fps or not frame_range:
+        return False
+    content_key = create_content_key(video_path, frame_range)
+    verdict = get_content_verdict(content_key)
+    if verdict is not None:
+        return verdict
+    sample_interval = max(1, int(video_fps))
+    sample_total = len([frame_number for frame_number in frame_range if frame_number % sample_interval == 0])
+    # stop early once the remaining samples can no longer change the verdict
+    counter_limit = RATE_LIMIT * len(frame_range) / (sample_interval * 100)
     counter = 0
-    with tqdm(total=len(frame_range), desc=wording.get('analysing'), unit='frame', ascii=' =',
-              disable=facefusion.globals.log_level in ['warn', 'error']) as progress:
-        for frame_number in frame_range:
-            if frame_number % int(video_fps) == 0:
-                frame = get_video_frame(video_path, frame_number)
-                if analyse_frame(frame):
-                    counter += 1
-            rate = counter * int(video_fps) / len(frame_range) * 100
-            progress.update()
-            progress.set_postfix(rate=rate)
-    return rate > RATE_LIMIT
+    sample_count = 0
+    verdict = False
+    video_capture = cv2.VideoCapture(video_path)
+    if video_capture.isOpened():
+        video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_range.start)
+        batch_frames = []
+        with tqdm(total=sample_total, desc=wording.get('analysing'), unit='frame', ascii=' =',
+                  disable=facefusion.globals.log_level in ['warn', 'error']) as progress:
+            for frame_number in frame_range:
+                if frame_number % sample_interval == 0:
+                    has_frame, frame = video_capture.read()
+                    if has_frame:
+                        batch_frames.append(frame)
+                    else:
+                        sample_total -= 1
+                else:
+                    video_capture.grab()
+                if len(batch_frames) == ANALYSE_BATCH_SIZE or batch_frames and frame_number == frame_range[-1]:
+                    counter += analyse_frames(batch_frames)
+                    sample_count += len(batch_frames)
+                    progress.update(len(batch_frames))
+                    progress.set_postfix(rate=counter * sample_interval / len(frame_range) * 100)
+                    batch_frames = []
+                    if counter > counter_limit or counter + sample_total - sample_count <= counter_limit:
+                        break
+        video_capture.release()
+        verdict = counter > counter_limit
+        set_content_verdict(content_key, verdict)
+    return verdict
+
+
+@timed('content_analyser')
+def analyse_frames(frames: List[VisionFrame]) -> int:
+    content_analyser = get_content_analyser()
+    batch_size = content_analyser.get_inputs()[0].shape[0]
+    if isinstance(batch_size, int):
+        # the batch is timed as a whole, the frames must not be counted a second time
+        return sum(detect_frame(frame) for frame in frames)
+    batch_frame = numpy.concatenate([prepare_frame(frame) for frame in frames])
+    probabilities = content_analyser.run(None,
+                                         {
+                                             'input:0': batch_frame
+                                         })[0][:, 1]
+    return int(numpy.sum(probabilities > PROBABILITY_LIMIT))
+
+
+def create_content_key(video_path: str, frame_range: range) -> str:
+    content_hash = hashlib.sha1()
+    content_size = os.path.getsize(video_path)
+    with open(video_path, 'rb') as video_file:
+        content_hash.update(video_file.read(CONTENT_CHUNK_SIZE))
+        video_file.seek(max(0, content_size - CONTENT_CHUNK_SIZE))
+        content_hash.update(video_file.read(CONTENT_CHUNK_SIZE))
+    content_options = (content_size, frame_range.start, frame_range.stop, PROBABILITY_LIMIT, RATE_LIMIT)
+    content_hash.update(str(content_options).encode('utf-8'))
+    return content_hash.hexdigest()
+
+
+def get_content_verdict(content_key: str) -> Optional[bool]:
+    with THREAD_LOCK:
+        return read_content_verdicts().get(content_key)
+
+
+def set_content_verdict(content_key: str, verdict: bool) -> None:
+    with THREAD_LOCK:
+        content_verdicts = read_content_verdicts()
+        content_verdicts[content_key] = verdict
+        try:
+            os.makedirs(os.path.dirname(CONTENT_VERDICTS_PATH), exist_ok=True)
+            with open(CONTENT_VERDICTS_PATH + '.tmp', 'w') as content_verdicts_file:
+                json.dump(content_verdicts, content_verdicts_file)
+            os.replace(CONTENT_VERDICTS_PATH + '.tmp', CONTENT_VERDICTS_PATH)
+        except OSError:
+            pass
+
+
+def read_content_verdicts() -> Dict[str, bool]:
+    global CONTENT_VERDICTS
+
+    if CONTENT_VERDICTS is None:
+        CONTENT_VERDICTS = {}
+        if os.path.isfile(CONTENT_VERDICTS_PATH):
+            try:
+                with open(CONTENT_VERDICTS_PATH, 'r') as content_verdicts_file:
+                    CONTENT_VERDICTS = json.load(content_verdicts_file)
+            except (OSError, ValueError):
+                pass
+    return CONTENT_VERDICTS
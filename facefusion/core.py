@@ -1,3 +1,4 @@
+import json
 import os
 import shutil
 import signal
@@ -6,7 +7,9 @@ import time
 import traceback
 import warnings
 from argparse import ArgumentParser, HelpFormatter
+from concurrent.futures import Future, ThreadPoolExecutor
 from asyncio import sleep
+from typing import List, Optional, Tuple
 
 import numpy
 import onnxruntime
@@ -14,22 +17,33 @@ import onnxruntime
 import facefusion.globals
 from facefusion import face_analyser, face_masker, logger, metadata, config
 from facefusion import wording, content_analyser, choices
+from facefusion.codec_calibrator import calibrate_temp_frame_codec
 from facefusion.common_helper import get_first, create_metavar
 from facefusion.content_analyser import analyse_image, analyse_video
 from facefusion.execution_helper import decode_execution_providers, encode_execution_providers
 from facefusion.face_analyser import get_one_face, get_average_face
-from facefusion.face_store import get_reference_faces, append_reference_face
+from facefusion.face_store import get_reference_faces, append_reference_face, get_face_presence_key, \
+    clear_face_presence
 from facefusion.ff_status import FFStatus
-from facefusion.ffmpeg import compress_image, extract_frames, merge_video, restore_audio, replace_audio
-from facefusion.filesystem import is_image, is_video, create_temp, get_temp_frame_paths, clear_temp, move_temp, \
-    list_directory, filter_audio_paths
+from facefusion.frame_writer import flush_frames
+from facefusion.ffmpeg import compress_image, extract_frames, merge_video, extract_audio
+from facefusion.filesystem import is_image, is_video, create_workspace, get_workspace_frame_paths, clear_workspace, \
+    list_directory, filter_audio_paths, get_workspace_output_audio_path, sweep_workspaces, estimate_workspace_size, \
+    spill_workspace, demote_workspace
 from facefusion.job_params import JobParams
 from facefusion.memory import limit_system_memory
+from facefusion.memory_profiler import start_job_memory
+from facefusion.metrics import start_job_metrics
+from facefusion.model_registry import hold_models
+from facefusion.model_warmer import warm_up_models
+from facefusion.profiler import start_profile, stop_profile
 from facefusion.normalizer import normalize_output_path, normalize_padding, normalize_fps
-from facefusion.processors.frame.core import get_frame_processors_modules, load_frame_processor_module
-from facefusion.typing import Face
+from facefusion.processors.frame.core import get_frame_processors_modules, load_frame_processor_module, \
+    clear_frame_latencies
+from facefusion.typing import Face, TempFrameFormat, Workspace
+from facefusion.video_metadata import get_video_metadata
 from facefusion.vision import get_video_frame, read_image, detect_fps, read_static_images, create_video_resolutions, \
-    detect_video_resolution, pack_resolution, detect_video_fps
+    detect_video_resolution, pack_resolution, detect_video_fps, count_video_frame_total, unpack_resolution
 
 os.environ['OMP_NUM_THREADS'] = '1'
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
@@ -56,10 +70,19 @@ def cli() -> None:
     group_misc = program.add_argument_group('misc')
     group_misc.add_argument('--skip-download', help=wording.get('help.skip_download'), action='store_true',
                             default=config.get_bool_value('misc.skip_download'))
+    group_misc.add_argument('--model-mirror', help=wording.get('help.model_mirror'),
+                            default=config.get_str_value('misc.model_mirror'))
     group_misc.add_argument('--headless', help=wording.get('help.headless'), action='store_true',
                             default=config.get_bool_value('misc.headless'))
     group_misc.add_argument('--log-level', help=wording.get('help.log_level'),
                             default=config.get_str_value('misc.log_level', 'info'), choices=logger.get_log_levels())
+    group_misc.add_argument('--content-analyser-interval', help=wording.get('help.content_analyser_interval'),
+                            type=float, default=config.get_float_value('misc.content_analyser_interval', '1.0'))
+    group_misc.add_argument('--metrics', help=wording.get('help.metrics'), action='store_true',
+                            default=config.get_bool_value('misc.metrics'))
+    group_misc.add_argument('--profile-modes', help=wording.get('help.profile_modes').format(
+        choices=', '.join(facefusion.choices.profile_modes)), default=config.get_str_list('misc.profile_modes'),
+                            choices=facefusion.choices.profile_modes, nargs='+', metavar='PROFILE_MODES')
     # execution
     execution_providers = encode_execution_providers(onnxruntime.get_available_providers())
     group_execution = program.add_argument_group('execution')
@@ -83,6 +106,59 @@ def cli() -> None:
                               default=config.get_int_value('memory.system_memory_limit', '0'),
                               choices=facefusion.choices.system_memory_limit_range,
                               metavar=create_metavar(facefusion.choices.system_memory_limit_range))
+    group_memory.add_argument('--memory-profile', help=wording.get('help.memory_profile'), action='store_true',
+                              default=config.get_bool_value('memory.memory_profile'))
+    group_memory.add_argument('--model-memory-budget', help=wording.get('help.model_memory_budget'), type=int,
+                              default=config.get_int_value('memory.model_memory_budget'))
+    # stream
+    group_stream = program.add_argument_group('stream')
+    group_stream.add_argument('--stream-latency-target', help=wording.get('help.stream_latency_target'), type=int,
+                              default=config.get_int_value('stream.stream_latency_target', '250'))
+    group_stream.add_argument('--stream-in-flight-limit', help=wording.get('help.stream_in_flight_limit'), type=int,
+                              default=config.get_int_value('stream.stream_in_flight_limit'))
+    group_stream.add_argument('--stream-source-path', help=wording.get('help.stream_source_path'),
+                              default=config.get_str_value('stream.stream_source_path'))
+    group_stream.add_argument('--stream-source-fps', help=wording.get('help.stream_source_fps'), type=float,
+                              default=config.get_float_value('stream.stream_source_fps'))
+    group_stream.add_argument('--stream-sink', help=wording.get('help.stream_sink').format(
+        choices=', '.join(facefusion.choices.stream_sinks)),
+                              default=config.get_str_value('stream.stream_sink', 'null'),
+                              choices=facefusion.choices.stream_sinks)
+    group_stream.add_argument('--stream-sink-path', help=wording.get('help.stream_sink_path'),
+                              default=config.get_str_value('stream.stream_sink_path'))
+    # benchmark
+    group_benchmark = program.add_argument_group('benchmark')
+    group_benchmark.add_argument('--benchmark', help=wording.get('help.benchmark'), action='store_true',
+                                 default=config.get_bool_value('benchmark.benchmark'))
+    group_benchmark.add_argument('--benchmark-resolutions', help=wording.get('help.benchmark_resolutions'), type=int,
+                                 default=config.get_int_list('benchmark.benchmark_resolutions', '360 720'),
+                                 choices=facefusion.choices.video_template_sizes, nargs='+',
+                                 metavar=create_metavar(facefusion.choices.video_template_sizes))
+    group_benchmark.add_argument('--benchmark-face-counts', help=wording.get('help.benchmark_face_counts'), type=int,
+                                 default=config.get_int_list('benchmark.benchmark_face_counts', '1'),
+                                 choices=facefusion.choices.benchmark_face_count_range, nargs='+',
+                                 metavar=create_metavar(facefusion.choices.benchmark_face_count_range))
+    group_benchmark.add_argument('--benchmark-frame-total', help=wording.get('help.benchmark_frame_total'), type=int,
+                                 default=config.get_int_value('benchmark.benchmark_frame_total', '100'),
+                                 choices=facefusion.choices.benchmark_frame_total_range,
+                                 metavar=create_metavar(facefusion.choices.benchmark_frame_total_range))
+    group_benchmark.add_argument('--benchmark-cycles', help=wording.get('help.benchmark_cycles'), type=int,
+                                 default=config.get_int_value('benchmark.benchmark_cycles', '3'),
+                                 choices=facefusion.choices.benchmark_cycles_range,
+                                 metavar=create_metavar(facefusion.choices.benchmark_cycles_range))
+    group_benchmark.add_argument('--benchmark-warmup-cycles', help=wording.get('help.benchmark_warmup_cycles'),
+                                 type=int, default=config.get_int_value('benchmark.benchmark_warmup_cycles', '1'),
+                                 choices=facefusion.choices.benchmark_warmup_cycles_range,
+                                 metavar=create_metavar(facefusion.choices.benchmark_warmup_cycles_range))
+    group_benchmark.add_argument('--benchmark-matrix', help=wording.get('help.benchmark_matrix'),
+                                 default=config.get_str_list('benchmark.benchmark_matrix'), nargs='+')
+    group_benchmark.add_argument('--benchmark-report-path', help=wording.get('help.benchmark_report_path'),
+                                 default=config.get_str_value('benchmark.benchmark_report_path'))
+    group_benchmark.add_argument('--benchmark-baseline-path', help=wording.get('help.benchmark_baseline_path'),
+                                 default=config.get_str_value('benchmark.benchmark_baseline_path'))
+    group_benchmark.add_argument('--benchmark-regression-tolerance',
+                                 help=wording.get('help.benchmark_regression_tolerance'), type=float,
+                                 default=config.get_float_value('benchmark.benchmark_regression_tolerance', '0.1'))
     # face analyser
     group_face_analyser = program.add_argument_group('face analyser')
     group_face_analyser.add_argument('--face-analyser-order', help=wording.get('help.face_analyser_order'),
@@ -149,8 +225,20 @@ def cli() -> None:
                                         default=config.get_int_value('frame_extraction.temp_frame_quality', '100'),
                                         choices=facefusion.choices.temp_frame_quality_range,
                                         metavar=create_metavar(facefusion.choices.temp_frame_quality_range))
+    group_frame_extraction.add_argument('--temp-frame-compression', help=wording.get('help.temp_frame_compression'),
+                                        type=int,
+                                        default=config.get_int_value('frame_extraction.temp_frame_compression'),
+                                        choices=facefusion.choices.temp_frame_compression_range,
+                                        metavar=create_metavar(facefusion.choices.temp_frame_compression_range))
+    group_frame_extraction.add_argument('--temp-frame-calibration', help=wording.get('help.temp_frame_calibration'),
+                                        action='store_true',
+                                        default=config.get_bool_value('frame_extraction.temp_frame_calibration'))
     group_frame_extraction.add_argument('--keep-temp', help=wording.get('help.keep_temp'), action='store_true',
                                         default=config.get_bool_value('frame_extraction.keep_temp'))
+    group_frame_extraction.add_argument('--temp-ram-path', help=wording.get('help.temp_ram_path'),
+                                        default=config.get_str_value('frame_extraction.temp_ram_path', '/dev/shm'))
+    group_frame_extraction.add_argument('--temp-ram-budget', help=wording.get('help.temp_ram_budget'), type=int,
+                                        default=config.get_int_value('frame_extraction.temp_ram_budget', '0'))
     # output creation
     group_output_creation = program.add_argument_group('output creation')
     group_output_creation.add_argument('--output-image-quality', help=wording.get('help.output_image_quality'),
@@ -202,8 +290,12 @@ def apply_args(program: ArgumentParser) -> None:
                                                            facefusion.globals.target_path, args.output_path)
     # misc
     facefusion.globals.skip_download = args.skip_download
+    facefusion.globals.model_mirror = args.model_mirror
     facefusion.globals.headless = args.headless
     facefusion.globals.log_level = args.log_level
+    facefusion.globals.content_analyser_interval = args.content_analyser_interval
+    facefusion.globals.metrics = args.metrics
+    facefusion.globals.profile_modes = args.profile_modes or []
     # execution
     facefusion.globals.execution_providers = decode_execution_providers(args.execution_providers)
     facefusion.globals.execution_thread_count = args.execution_thread_count
@@ -211,6 +303,26 @@ def apply_args(program: ArgumentParser) -> None:
     # memory
     facefusion.globals.video_memory_strategy = args.video_memory_strategy
     facefusion.globals.system_memory_limit = args.system_memory_limit
+    facefusion.globals.memory_profile = args.memory_profile
+    facefusion.globals.model_memory_budget = args.model_memory_budget
+    # stream
+    facefusion.globals.stream_latency_target = args.stream_latency_target
+    facefusion.globals.stream_in_flight_limit = args.stream_in_flight_limit
+    facefusion.globals.stream_source_path = args.stream_source_path
+    facefusion.globals.stream_source_fps = args.stream_source_fps
+    facefusion.globals.stream_sink = args.stream_sink
+    facefusion.globals.stream_sink_path = args.stream_sink_path
+    # benchmark
+    facefusion.globals.benchmark = args.benchmark
+    facefusion.globals.benchmark_resolutions = args.benchmark_resolutions
+    facefusion.globals.benchmark_face_counts = args.benchmark_face_counts
+    facefusion.globals.benchmark_frame_total = args.benchmark_frame_total
+    facefusion.globals.benchmark_cycles = args.benchmark_cycles
+    facefusion.globals.benchmark_warmup_cycles = args.benchmark_warmup_cycles
+    facefusion.globals.benchmark_matrix = args.benchmark_matrix
+    facefusion.globals.benchmark_report_path = args.benchmark_report_path
+    facefusion.globals.benchmark_baseline_path = args.benchmark_baseline_path
+    facefusion.globals.benchmark_regression_tolerance = args.benchmark_regression_tolerance
     # face analyser
     facefusion.globals.face_analyser_order = args.face_analyser_order
     facefusion.globals.face_analyser_age = args.face_analyser_age
@@ -236,7 +348,11 @@ def apply_args(program: ArgumentParser) -> None:
     facefusion.globals.trim_frame_end = args.trim_frame_end
     facefusion.globals.temp_frame_format = args.temp_frame_format
     facefusion.globals.temp_frame_quality = args.temp_frame_quality
+    facefusion.globals.temp_frame_compression = args.temp_frame_compression
+    facefusion.globals.temp_frame_calibration = args.temp_frame_calibration
     facefusion.globals.keep_temp = args.keep_temp
+    facefusion.globals.temp_ram_path = args.temp_ram_path
+    facefusion.globals.temp_ram_budget = args.temp_ram_budget
     # output creation
     facefusion.globals.output_image_quality = args.output_image_quality
     facefusion.globals.output_video_encoder = args.output_video_encoder
@@ -265,14 +381,32 @@ def apply_args(program: ArgumentParser) -> None:
 def run(program: ArgumentParser) -> None:
     apply_args(program)
     logger.init(facefusion.globals.log_level)
+    if 'imports' in facefusion.globals.profile_modes:
+        from facefusion.import_profiler import log_import_times
+
+        log_import_times('facefusion.core')
     if facefusion.globals.system_memory_limit > 0:
         limit_system_memory(facefusion.globals.system_memory_limit)
+    # nothing runs yet, a workspace carrying our pid was left behind by an earlier process that reused it
+    sweep_workspaces(owned=True)
     if not pre_check() or not content_analyser.pre_check() or not face_analyser.pre_check() or not face_masker.pre_check():
         return
     for frame_processor_module in get_frame_processors_modules(facefusion.globals.frame_processors):
         if not frame_processor_module.pre_check():
             return
-    if facefusion.globals.headless:
+    if facefusion.globals.headless and facefusion.globals.benchmark:
+        from facefusion import benchmarker
+
+        if not benchmarker.run():
+            sys.exit(1)
+    elif facefusion.globals.headless and facefusion.globals.stream_source_path:
+        from facefusion.realtime import run_stream_benchmark
+
+        stream_report = run_stream_benchmark(facefusion.globals.stream_source_path,
+                                             facefusion.globals.stream_source_fps, facefusion.globals.stream_sink,
+                                             facefusion.globals.stream_sink_path)
+        print(json.dumps(stream_report, indent=4))
+    elif facefusion.globals.headless:
         conditional_process(None)
     else:
         import facefusion.uis.core as ui
@@ -284,8 +418,7 @@ def run(program: ArgumentParser) -> None:
 
 
 def destroy() -> None:
-    if facefusion.globals.target_path:
-        clear_temp(facefusion.globals.target_path)
+    sweep_workspaces(owned=True)
     sys.exit(0)
 
 
@@ -302,6 +435,9 @@ def pre_check() -> bool:
 
 def conditional_process(job: JobParams) -> None:
     start_time = time.time()
+    clear_frame_latencies()
+    start_job_metrics(job.id)
+    start_job_memory(job.id)
     for frame_processor_module in get_frame_processors_modules(job.frame_processors):
         while not frame_processor_module.post_check():
             logger.disable()
@@ -309,43 +445,51 @@ def conditional_process(job: JobParams) -> None:
         logger.enable()
         if not frame_processor_module.pre_process('output'):
             return
-    conditional_append_reference_faces(job)
-    target_path = job.target_path
-    print(f"Processing {target_path}")
-    try:
-        if is_image(target_path):
-            process_image(start_time, job)
-        if is_video(target_path):
-            reference_faces = job.reference_face_dict
-            if len(reference_faces) > 1:
-                average_face = None
-                all_faces = []
-                embedding_list = []
-                normed_embedding_list = []
-                first_key = None
-                for key, faces in reference_faces.items():
-                    if not first_key:
-                        first_key = key
-                    for face in faces:
-                        all_faces.append(face)
-                        embedding_list.append(face.embedding)
-                        normed_embedding_list.append(face.normed_embedding)
-                first_face = all_faces[0]
-                average_face = Face(
-                    bounding_box=first_face.bounding_box,
-                    landmark=first_face.landmark,
-                    score=first_face.score,
-                    embedding=numpy.mean(embedding_list, axis=0),
-                    normed_embedding=numpy.mean(normed_embedding_list, axis=0),
-                    gender=first_face.gender,
-                    age=first_face.age
-                )
-                reference_faces = {first_key: [average_face]}
-                job.reference_face_dict = reference_faces
-            process_video(start_time, job)
-    except Exception as e:
-        print(f"Exception Processing: {e}")
-        traceback.print_exc()
+    # hold every model for the whole job, the budget is enforced once it is done
+    with hold_models():
+        warm_up_models(job.frame_processors, job.face_mask_types)
+        conditional_append_reference_faces(job)
+        target_path = job.target_path
+        print(f"Processing {target_path}")
+        if facefusion.globals.profile_modes:
+            start_profile(facefusion.globals.profile_modes)
+        try:
+            if is_image(target_path):
+                process_image(start_time, job)
+            if is_video(target_path):
+                reference_faces = job.reference_face_dict
+                if len(reference_faces) > 1:
+                    average_face = None
+                    all_faces = []
+                    embedding_list = []
+                    normed_embedding_list = []
+                    first_key = None
+                    for key, faces in reference_faces.items():
+                        if not first_key:
+                            first_key = key
+                        for face in faces:
+                            all_faces.append(face)
+                            embedding_list.append(face.embedding)
+                            normed_embedding_list.append(face.normed_embedding)
+                    first_face = all_faces[0]
+                    average_face = Face(
+                        bounding_box=first_face.bounding_box,
+                        landmark=first_face.landmark,
+                        score=first_face.score,
+                        embedding=numpy.mean(embedding_list, axis=0),
+                        normed_embedding=numpy.mean(normed_embedding_list, axis=0),
+                        gender=first_face.gender,
+                        age=first_face.age
+                    )
+                    reference_faces = {first_key: [average_face]}
+                    job.reference_face_dict = reference_faces
+                process_video(start_time, job)
+        except Exception as e:
+            print(f"Exception Processing: {e}")
+            traceback.print_exc()
+        finally:
+            if facefusion.globals.profile_modes:
+                stop_profile(job.output_path)
 
 
 def conditional_append_reference_faces(job=None) -> None:
@@ -389,17 +533,22 @@ def process_image(start_time: float, job: JobParams) -> None:
             print("Interrupted")
             break
         status.update(f"{wording.get('processing')} {frame_processor_module.NAME}")
-        frame_processor_module.process_image(job.source_paths, job.source_paths_2, job.output_path, job.output_path)
+        status.begin_stage('process.' + frame_processor_module.__name__.split('.')[-1])
+        with hold_models():
+            frame_processor_module.process_image(job.source_paths, job.source_paths_2, job.output_path,
+                                                 job.output_path)
         frame_processor_module.post_process()
         status.step()
     # compress image
     status.update(wording.get('compressing_image'))
+    status.begin_stage('compress')
     if status.cancelled:
         print("Interrupted")
         return
     if not compress_image(job.output_path):
         status_str = wording.get('compressing_image_failed')
         status.update(status_str)
+    status.end_stage()
     # validate image
     if is_image(job.target_path):
         seconds = '{:.2f}'.format((time.time() - start_time) % 60)
@@ -409,8 +558,78 @@ def process_image(start_time: float, job: JobParams) -> None:
     status.update(status_str)
 
 
+def prepare_audio(job, workspace: Workspace) -> Tuple[Optional[str], bool]:
+    if job.skip_audio:
+        return None, False
+    if 'lip_syncer' in job.frame_processors:
+        source_audio_path = get_first(filter_audio_paths(job.source_paths))
+        return source_audio_path, True
+    video_metadata = get_video_metadata(job.target_path)
+    if not video_metadata or not video_metadata.has_audio:
+        return None, False
+    audio_path = get_workspace_output_audio_path(workspace)
+    if extract_audio(job.target_path, audio_path, detect_video_fps(job.target_path), job.trim_frame_start,
+                     job.trim_frame_end):
+        return audio_path, False
+    return None, False
+
+
+def count_job_frame_total(job: JobParams, fps: float) -> int:
+    video_frame_total = count_video_frame_total(job.target_path)
+    trim_frame_start = job.trim_frame_start or 0
+    trim_frame_end = job.trim_frame_end or video_frame_total
+    return round((trim_frame_end - trim_frame_start) * fps / (detect_video_fps(job.target_path) or fps))
+
+
+def estimate_job_workspace_size(job: JobParams, fps: float) -> int:
+    frame_total = count_job_frame_total(job, fps)
+    if job.temp_frame_codec:
+        return frame_total * job.temp_frame_codec.get('frame_size')
+    if job.output_video_resolution:
+        return estimate_workspace_size(frame_total, unpack_resolution(job.output_video_resolution),
+                                       job.temp_frame_format)
+    return estimate_workspace_size(frame_total, detect_video_resolution(job.target_path), job.temp_frame_format)
+
+
+def get_job_temp_frame_formats(job: JobParams) -> List[TempFrameFormat]:
+    # raw frames have a fixed stride, the frame enhancer upscale does not fit into them
+    if 'frame_enhancer' in job.frame_processors:
+        return [temp_frame_format for temp_frame_format in facefusion.choices.temp_frame_formats if
+                temp_frame_format != 'raw']
+    return facefusion.choices.temp_frame_formats
+
+
+def calibrate_job_temp_frames(job: JobParams, fps: float) -> None:
+    trim_frame_start = job.trim_frame_start or 0
+    trim_frame_end = job.trim_frame_end or count_video_frame_total(job.target_path)
+    temp_frame_codec = calibrate_temp_frame_codec(job.target_path, trim_frame_start, trim_frame_end,
+                                                  count_job_frame_total(job, fps), job.output_video_resolution,
+                                                  job.temp_frame_quality, get_job_temp_frame_formats(job))
+    # the codec stays on the job and its workspace, the next job starts from the globals again
+    if temp_frame_codec:
+        job.temp_frame_codec = temp_frame_codec
+        job.temp_frame_format = temp_frame_codec.get('temp_frame_format')
+        job.temp_frame_compression = temp_frame_codec.get('temp_frame_compression')
+
+
+def submit_prepared_audio(job, workspace: Workspace) -> Future:
+    audio_executor = ThreadPoolExecutor(max_workers=1)
+    audio_future = audio_executor.submit(prepare_audio, job, workspace)
+    audio_executor.shutdown(wait=False)
+    return audio_future
+
+
+def get_prepared_audio(audio_future: Future) -> Tuple[Optional[str], bool]:
+    # a failed audio extraction leaves the video without audio instead of failing the job
+    try:
+        return audio_future.result()
+    except Exception:
+        return None, False
+
+
 def process_video(start_time, job) -> None:
     status = FFStatus()
+    status.begin_stage('analyse')
     if analyse_video(job.target_path, job.trim_frame_start,
                      job.trim_frame_end):
         status.update("Naughty naughty!!")
@@ -418,74 +637,95 @@ def process_video(start_time, job) -> None:
         return
     status.update("Processing facefusion video.")
     fps = detect_fps(job.target_path) if job.keep_fps else 25.0
-    # create temp
-    create_temp(job.target_path)
+    if job.temp_frame_calibration and not job.temp_frame_codec:
+        calibrate_job_temp_frames(job, fps)
+    if job.temp_frame_format not in get_job_temp_frame_formats(job):
+        logger.warn(wording.get('temp_frame_format_not_supported').format(temp_frame_format=job.temp_frame_format,
+                                                                          fallback_format='bmp'), __name__.upper())
+        job.temp_frame_format = 'bmp'
+        job.temp_frame_compression = None
+    # create workspace
+    workspace = create_workspace(job.id, job.target_path, estimate_job_workspace_size(job, fps), job.temp_frame_format,
+                                 job.temp_frame_compression)
 
-    # extract frames
-    status.update(f"Extracting frames from {os.path.basename(job.target_path)}...")
-    extract_frames(job.target_path, job.output_video_resolution, fps, status)
-    status.step()
-    # process frame
-    temp_frame_paths = get_temp_frame_paths(job.target_path)
-    if temp_frame_paths:
-        for frame_processor_module in get_frame_processors_modules(job.frame_processors):
-            if status.cancelled:
-                print("Interrupted")
-                clear_temp()
-                return
-            module_name = frame_processor_module.NAME
-            # Split the module name by "." and select the last bit
-            module_name = module_name.split(".")[-1]
-            # Replace "_" with spaces and title case it
-            module_name = module_name.replace("_", " ").title()
-            status.update(f"Processing with {module_name}")
-            frame_processor_module.process_video(job.source_paths, job.source_paths_2, temp_frame_paths)
-            frame_processor_module.post_process()
-    else:
-        status.update(wording.get('temp_frames_not_found'))
-        return
-    # merge video
-    if status.cancelled:
-        print("Interrupted")
-        clear_temp()
-        return
-    status.update(f"Merging video to {job.output_path} ({fps} fps)")
-    status.step()
-    if not merge_video(job.target_path, fps, status):
-        status.update(wording.get('merging_video_failed'))
-    # handle audio
-    if job.skip_audio:
-        status.update(wording.get('skipping_audio'))
-        move_temp(job.target_path, job.output_path)
-    else:
+    # prepare audio while the frames are extracted and processed
+    audio_future = submit_prepared_audio(job, workspace)
+
+    try:
+        # extract frames
+        status.update(f"Extracting frames from {os.path.basename(job.target_path)}...")
+        status.begin_stage('extract')
+        if not extract_frames(workspace, job.output_video_resolution, fps, status) and workspace.tier == 'ram':
+            # the memory tier rests on an estimate, a tier that runs full is replaced by a disk workspace
+            logger.warn(wording.get('ram_workspace_exhausted'), __name__.upper())
+            audio_future.cancel()
+            get_prepared_audio(audio_future)
+            workspace = demote_workspace(workspace)
+            audio_future = submit_prepared_audio(job, workspace)
+            extract_frames(workspace, job.output_video_resolution, fps, status)
+        spill_workspace(workspace)
+        status.step()
+        # process frame
+        temp_frame_paths = get_workspace_frame_paths(workspace)
+        if temp_frame_paths:
+            try:
+                for frame_processor_module in get_frame_processors_modules(job.frame_processors):
+                    if status.cancelled:
+                        print("Interrupted")
+                        return
+                    module_name = frame_processor_module.NAME
+                    # Split the module name by "." and select the last bit
+                    module_name = module_name.split(".")[-1]
+                    # Replace "_" with spaces and title case it
+                    module_name = module_name.replace("_", " ").title()
+                    status.update(f"Processing with {module_name}")
+                    status.begin_stage('process.' + frame_processor_module.__name__.split('.')[-1])
+                    with hold_models():
+                        processed = frame_processor_module.process_video(job.source_paths, job.source_paths_2,
+                                                                         temp_frame_paths)
+                    frame_processor_module.post_process()
+                    # frames that never reached the workspace would be merged or processed again as stale
+                    if not processed:
+                        status.update(wording.get('writing_frames_failed'))
+                        return
+            finally:
+                clear_face_presence(get_face_presence_key(temp_frame_paths))
+        else:
+            status.update(wording.get('temp_frames_not_found'))
+            return
+        # merge video
         if status.cancelled:
             print("Interrupted")
-            clear_temp()
             return
-        try:
-            status.update(wording.get('restoring_audio'))
-            status.step()
-            if 'lip_syncer' in facefusion.globals.frame_processors:
-                source_audio_path = get_first(filter_audio_paths(facefusion.globals.source_paths))
-                if source_audio_path and replace_audio(facefusion.globals.target_path, source_audio_path,
-                                                       facefusion.globals.output_path):
-                    logger.info(wording.get('restoring_audio_succeed'), __name__.upper())
-                else:
-                    logger.warn(wording.get('restoring_audio_skipped'), __name__.upper())
-                    move_temp(facefusion.globals.target_path, facefusion.globals.output_path)
-            else:
-                if restore_audio(facefusion.globals.target_path, facefusion.globals.output_path,
-                                 facefusion.globals.output_video_fps):
-                    logger.info(wording.get('restoring_audio_succeed'), __name__.upper())
-                else:
-                    logger.warn(wording.get('restoring_audio_skipped'), __name__.upper())
-                    move_temp(facefusion.globals.target_path, facefusion.globals.output_path)
-
-        except:
-            print("Failed to restore audio")
-    # clear temp
-    status.update(wording.get('clearing_temp'))
-    clear_temp()
+        status.begin_stage('audio')
+        audio_path, pad_audio = get_prepared_audio(audio_future)
+        if job.skip_audio:
+            logger.info(wording.get('skipping_audio'), __name__.upper())
+        elif audio_path:
+            logger.info(wording.get('restoring_audio_succeed'), __name__.upper())
+        else:
+            logger.warn(wording.get('restoring_audio_skipped'), __name__.upper())
+        status.update(f"Merging video to {job.output_path} ({fps} fps)")
+        status.begin_stage('merge')
+        status.step()
+        if not flush_frames():
+            status.update(wording.get('writing_frames_failed'))
+            return
+        merged = merge_video(workspace, job.output_path, fps, audio_path, pad_audio, status)
+        if not merged and audio_path:
+            logger.warn(wording.get('restoring_audio_skipped'), __name__.upper())
+            merged = merge_video(workspace, job.output_path, fps, status=status)
+        if not merged:
+            status.update(wording.get('merging_video_failed'))
+        # clear temp
+        status.update(wording.get('clearing_temp'))
+        status.begin_stage('clear')
+    finally:
+        # the audio extraction writes into the workspace, it has to settle before the workspace is removed
+        audio_future.cancel()
+        get_prepared_audio(audio_future)
+        clear_workspace(workspace)
+    status.end_stage()
     # validate video
     if is_video(job.target_path):
         status.update(wording.get('processing_video_succeed'))
@@ -1,19 +1,35 @@
+import hashlib
 import json
 import os
 import re
 import subprocess
 import threading
+import time
 import urllib.request
 from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import List, Tuple
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 import requests
-import yt_dlp
 
-from facefusion import wording
-from facefusion.filesystem import is_file, TEMP_DIRECTORY_PATH
+import facefusion.globals
+from facefusion import logger, wording
+from facefusion.filesystem import is_file, resolve_relative_path, TEMP_DIRECTORY_PATH
 from facefusion.mytqdm import mytqdm
+from facefusion.typing import ModelChecksum, ModelManifestEntry
+
+DOWNLOAD_WORKER_COUNT = 4
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_BACKOFF = 1.0
+DOWNLOAD_TIMEOUT = 30
+DOWNLOAD_CHUNK_SIZE = 1024 ** 2
+MODEL_MANIFEST_PATH = resolve_relative_path('../.assets/models/manifest.json')
+MODEL_MANIFEST: Optional[Dict[str, ModelManifestEntry]] = None
+MODEL_CHECKSUMS_PATH = os.path.join(os.path.dirname(__file__), 'model_checksums.json')
+THREAD_LOCK: threading.Lock = threading.Lock()
 
 
 def find_media_urls(page_url) -> List[Tuple[str, str]]:
@@ -123,6 +139,8 @@ def get_video_filename(title: str) -> str:
 
 
 def download_video(target_url: str) -> str:
+    import yt_dlp
+
     ydl_opts = {
         'format': 'bestvideo+bestaudio/best',
         'skip_download': True,  # Initially, just get the info
@@ -163,32 +181,106 @@ def download_video(target_url: str) -> str:
 
 
 def conditional_download(download_directory_path: str, urls: List[str]) -> None:
+    # models verified by the manifest skip the remote size lookup entirely
+    urls = [url for url in urls if not verify_download(os.path.join(download_directory_path, os.path.basename(url)))]
     with ThreadPoolExecutor() as executor:
-        for url in urls:
-            executor.submit(get_download_size, url)
-    for url in urls:
+        download_totals = list(executor.map(get_download_size, map(resolve_download_url, urls)))
+    download_tasks = []
+    for url, total in zip(urls, download_totals):
         download_file_path = os.path.join(download_directory_path, os.path.basename(url))
-        total = get_download_size(url)
-        if is_file(download_file_path):
-            initial = os.path.getsize(download_file_path)
-        else:
-            initial = 0
-        if initial < total:
-            print("Downloading " + url + " to " + download_file_path)
-            with mytqdm(total=total, initial=initial, desc=wording.get('downloading'), unit='B', unit_scale=True,
-                        unit_divisor=1024) as progress:
-                subprocess.Popen(
-                    ['curl', '--create-dirs', '--silent', '--insecure', '--location', '--continue-at', '-', '--output',
-                     download_file_path, url])
-                current = initial
-                while current < total:
-                    if is_file(download_file_path):
-                        current = os.path.getsize(download_file_path)
-                        progress.update(current - progress.n)
+        # an unknown size means the origin is unreachable, keep whatever is on disk
+        if not total:
+            continue
+        # a shipped checksum already rejected the file on disk, only unknown models are adopted by size
+        if is_file(download_file_path) and os.path.getsize(download_file_path) >= total and \
+                not get_model_checksum(download_file_path):
+            record_download(url, download_file_path)
+            continue
+        download_tasks.append((url, download_file_path, total))
+    if download_tasks:
+        download_urls, download_file_paths, download_totals = zip(*download_tasks)
+        initial = sum(map(get_partial_size, download_file_paths))
+        with mytqdm(total=sum(download_totals), initial=initial, desc=wording.get('downloading'), unit='B',
+                    unit_scale=True, unit_divisor=1024) as progress:
+            with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKER_COUNT) as executor:
+                list(executor.map(download_file, download_urls, download_file_paths, download_totals,
+                                  [progress] * len(download_tasks)))
+
+
+def get_partial_size(file_path: str) -> int:
+    for partial_path in [file_path + '.part', file_path]:
+        if is_file(partial_path):
+            return os.path.getsize(partial_path)
+    return 0
+
+
+def download_file(url: str, file_path: str, total: int, progress: Any) -> bool:
+    download_url = resolve_download_url(url)
+    partial_path = file_path + '.part'
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    # adopt partial files left behind by the former curl downloader
+    if is_file(file_path) and not is_file(partial_path):
+        os.replace(file_path, partial_path)
+    for attempt in range(DOWNLOAD_RETRIES):
+        if attempt:
+            time.sleep(DOWNLOAD_BACKOFF * 2 ** (attempt - 1))
+        try:
+            fetch_file(download_url, partial_path, total, progress)
+            if total and os.path.getsize(partial_path) != total:
+                raise ValueError(wording.get('download_size_mismatch'))
+            if not verify_checksum(partial_path, get_model_checksum(file_path)):
+                remove_partial(partial_path, progress)
+                raise ValueError(wording.get('download_checksum_mismatch'))
+            os.replace(partial_path, file_path)
+            record_download(url, file_path)
+            return True
+        except (OSError, ValueError) as exception:
+            logger.warn(wording.get('download_failed').format(url=download_url, attempt=attempt + 1,
+                                                              exception=exception), __name__.upper())
+    logger.error(wording.get('download_gave_up').format(url=download_url), __name__.upper())
+    return False
+
+
+def fetch_file(url: str, partial_path: str, total: int, progress: Any) -> None:
+    initial = os.path.getsize(partial_path) if is_file(partial_path) else 0
+    if total and initial >= total:
+        return
+    request = urllib.request.Request(url)
+    if initial:
+        request.add_header('Range', 'bytes=' + str(initial) + '-')
+    with urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT) as response:
+        # servers without range support answer with the full body
+        if initial and getattr(response, 'status', 200) != 206:
+            remove_partial(partial_path, progress)
+        with open(partial_path, 'ab') as partial_file:
+            for chunk in iter(lambda: response.read(DOWNLOAD_CHUNK_SIZE), b''):
+                partial_file.write(chunk)
+                with THREAD_LOCK:
+                    progress.update(len(chunk))
+
+
+def remove_partial(partial_path: str, progress: Any) -> None:
+    partial_size = os.path.getsize(partial_path) if is_file(partial_path) else 0
+    if partial_size:
+        os.remove(partial_path)
+        with THREAD_LOCK:
+            progress.update(-partial_size)
+
+
+def resolve_download_url(url: str) -> str:
+    model_mirror = facefusion.globals.model_mirror
+    if model_mirror:
+        if '://' not in model_mirror:
+            model_mirror = Path(model_mirror).resolve().as_uri()
+        return model_mirror.rstrip('/') + '/' + os.path.basename(url)
+    return url
 
 
 @lru_cache(maxsize=None)
 def get_download_size(url: str) -> int:
+    if url.startswith('file:'):
+        file_path = url2pathname(urlparse(url).path)
+        return os.path.getsize(file_path) if is_file(file_path) else 0
     try:
         response = urllib.request.urlopen(url, timeout=10)
         return int(response.getheader('Content-Length'))
@@ -198,5 +290,109 @@ def get_download_size(url: str) -> int:
 
 def is_download_done(url: str, file_path: str) -> bool:
     if is_file(file_path):
-        return get_download_size(url) == os.path.getsize(file_path)
+        if verify_download(file_path):
+            return True
+        if not get_model_checksum(file_path) and \
+                get_download_size(resolve_download_url(url)) == os.path.getsize(file_path):
+            record_download(url, file_path)
+            return True
+    return False
+
+
+def get_model_manifest() -> Dict[str, ModelManifestEntry]:
+    global MODEL_MANIFEST
+
+    with THREAD_LOCK:
+        if MODEL_MANIFEST is None:
+            try:
+                with open(MODEL_MANIFEST_PATH, 'r') as manifest_file:
+                    MODEL_MANIFEST = json.load(manifest_file)
+            except (OSError, ValueError):
+                MODEL_MANIFEST = {}
+    return MODEL_MANIFEST
+
+
+def update_model_manifest(file_name: str, manifest_entry: ModelManifestEntry) -> None:
+    get_model_manifest()
+    # mutate and dump in one section so a concurrent update never changes the manifest mid dump
+    with THREAD_LOCK:
+        MODEL_MANIFEST[file_name] = manifest_entry
+        model_manifest = dict(MODEL_MANIFEST)
+        try:
+            os.makedirs(os.path.dirname(MODEL_MANIFEST_PATH), exist_ok=True)
+            with open(MODEL_MANIFEST_PATH + '.tmp', 'w') as manifest_file:
+                json.dump(model_manifest, manifest_file, indent=4, sort_keys=True)
+            os.replace(MODEL_MANIFEST_PATH + '.tmp', MODEL_MANIFEST_PATH)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=None)
+def get_model_checksums() -> Dict[str, ModelChecksum]:
+    try:
+        with open(MODEL_CHECKSUMS_PATH, 'r') as checksums_file:
+            return json.load(checksums_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_model_checksum(file_path: str) -> Optional[ModelChecksum]:
+    # the shipped checksum is authoritative, the manifest only remembers what has been verified against it
+    model_checksum = get_model_checksums().get(os.path.basename(file_path))
+    if model_checksum:
+        return model_checksum
+    manifest_entry = get_model_manifest().get(os.path.basename(file_path))
+    if manifest_entry:
+        return\
+            {
+                'size': manifest_entry.get('size'),
+                'sha256': manifest_entry.get('sha256')
+            }
+    return None
+
+
+def verify_checksum(file_path: str, model_checksum: Optional[ModelChecksum]) -> bool:
+    if not model_checksum:
+        return True
+    return os.path.getsize(file_path) == model_checksum.get('size') and \
+        hash_file(file_path) == model_checksum.get('sha256')
+
+
+def hash_file(file_path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 ** 2), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def record_download(url: str, file_path: str) -> None:
+    manifest_entry: ModelManifestEntry =\
+        {
+            'url': url,
+            'size': os.path.getsize(file_path),
+            'sha256': hash_file(file_path),
+            'mtime': os.path.getmtime(file_path)
+        }
+    update_model_manifest(os.path.basename(file_path), manifest_entry)
+
+
+def verify_download(file_path: str) -> bool:
+    model_checksum = get_model_checksum(file_path)
+    manifest_entry = get_model_manifest().get(os.path.basename(file_path))
+    if not model_checksum or not is_file(file_path) or os.path.getsize(file_path) != model_checksum.get('size'):
+        return False
+    # hash only when the file changed since it was last verified against the same checksum
+    if manifest_entry and manifest_entry.get('sha256') == model_checksum.get('sha256') and \
+            os.path.getmtime(file_path) == manifest_entry.get('mtime'):
+        return True
+    if hash_file(file_path) == model_checksum.get('sha256'):
+        update_model_manifest(os.path.basename(file_path),
+                              {
+                                  'url': manifest_entry.get('url') if manifest_entry else None,
+                                  'size': model_checksum.get('size'),
+                                  'sha256': model_checksum.get('sha256'),
+                                  'mtime': os.path.getmtime(file_path)
+                              })
+        return True
     return False
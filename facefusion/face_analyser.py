@@ -9,17 +9,18 @@ from facefusion.common_helper import get_first
 from facefusion.face_helper import warp_face_by_face_landmark_5, warp_face_by_translation, create_static_anchors, \
     distance_to_face_landmark_5, distance_to_bounding_box, convert_face_landmark_68_to_5, apply_nms, categorize_age, \
     categorize_gender
-from facefusion.face_store import get_static_faces, set_static_faces
+from facefusion.face_store import get_static_faces, set_static_faces, set_face_presence
 from facefusion.execution_helper import apply_execution_provider_options
 from facefusion.download import conditional_download
 from facefusion.filesystem import resolve_relative_path
+from facefusion.metrics import timed, increment_counter
+from facefusion.model_registry import get_model, clear_model
+from facefusion.profiler import trace_lock
 from facefusion.typing import VisionFrame, Face, FaceSet, FaceAnalyserOrder, FaceAnalyserAge, FaceAnalyserGender, \
     ModelSet, BoundingBox, FaceLandmarkSet, FaceLandmark5, FaceLandmark68, Score, Embedding
 from facefusion.vision import resize_frame_resolution, unpack_resolution
 
-FACE_ANALYSER = None
 THREAD_SEMAPHORE: threading.Semaphore = threading.Semaphore()
-THREAD_LOCK: threading.Lock = threading.Lock()
 MODELS: ModelSet = \
     {
         'face_detector_retinaface':
@@ -71,56 +72,45 @@ MODELS: ModelSet = \
 
 
 def get_face_analyser() -> Any:
-    global FACE_ANALYSER
+    return\
+        {
+            'face_detector': get_face_detector(),
+            'face_recognizer': get_face_recognizer(),
+            'face_landmarker': get_face_landmarker(),
+            'gender_age': get_gender_age()
+        }
+
+
+def get_face_detector() -> Any:
+    model_path = MODELS.get('face_detector_' + facefusion.globals.face_detector_model).get('path')
+    if facefusion.globals.face_detector_model == 'yunet':
+        return get_model('face_detector', model_path, lambda: cv2.FaceDetectorYN.create(model_path, '', (0, 0)))
+    return get_model('face_detector', model_path, lambda: create_inference_session(model_path))
+
+
+def get_face_recognizer() -> Any:
+    model_path = MODELS.get('face_recognizer_' + facefusion.globals.face_recognizer_model).get('path')
+    return get_model('face_recognizer', model_path, lambda: create_inference_session(model_path))
 
-    with THREAD_LOCK:
-        if FACE_ANALYSER is None:
-            if facefusion.globals.face_detector_model == 'retinaface':
-                face_detector = onnxruntime.InferenceSession(MODELS.get('face_detector_retinaface').get('path'),
-                                                             providers=apply_execution_provider_options(
-                                                                 facefusion.globals.execution_providers))
-            if facefusion.globals.face_detector_model == 'yoloface':
-                face_detector = onnxruntime.InferenceSession(MODELS.get('face_detector_yoloface').get('path'),
-                                                             providers=apply_execution_provider_options(
-                                                                 facefusion.globals.execution_providers))
-            if facefusion.globals.face_detector_model == 'yunet':
-                face_detector = cv2.FaceDetectorYN.create(MODELS.get('face_detector_yunet').get('path'), '', (0, 0))
-            if facefusion.globals.face_recognizer_model == 'arcface_blendswap':
-                face_recognizer = onnxruntime.InferenceSession(
-                    MODELS.get('face_recognizer_arcface_blendswap').get('path'),
-                    providers=apply_execution_provider_options(facefusion.globals.execution_providers))
-            if facefusion.globals.face_recognizer_model == 'arcface_inswapper':
-                face_recognizer = onnxruntime.InferenceSession(
-                    MODELS.get('face_recognizer_arcface_inswapper').get('path'),
-                    providers=apply_execution_provider_options(facefusion.globals.execution_providers))
-            if facefusion.globals.face_recognizer_model == 'arcface_simswap':
-                face_recognizer = onnxruntime.InferenceSession(
-                    MODELS.get('face_recognizer_arcface_simswap').get('path'),
-                    providers=apply_execution_provider_options(facefusion.globals.execution_providers))
-            if facefusion.globals.face_recognizer_model == 'arcface_uniface':
-                face_recognizer = onnxruntime.InferenceSession(
-                    MODELS.get('face_recognizer_arcface_uniface').get('path'),
-                    providers=apply_execution_provider_options(facefusion.globals.execution_providers))
-            face_landmarker = onnxruntime.InferenceSession(MODELS.get('face_landmarker').get('path'),
-                                                           providers=apply_execution_provider_options(
-                                                               facefusion.globals.execution_providers))
-            gender_age = onnxruntime.InferenceSession(MODELS.get('gender_age').get('path'),
-                                                      providers=apply_execution_provider_options(
-                                                          facefusion.globals.execution_providers))
-            FACE_ANALYSER = \
-                {
-                    'face_detector': face_detector,
-                    'face_recognizer': face_recognizer,
-                    'face_landmarker': face_landmarker,
-                    'gender_age': gender_age
-                }
-    return FACE_ANALYSER
+
+def get_face_landmarker() -> Any:
+    model_path = MODELS.get('face_landmarker').get('path')
+    return get_model('face_landmarker', model_path, lambda: create_inference_session(model_path))
+
+
+def get_gender_age() -> Any:
+    model_path = MODELS.get('gender_age').get('path')
+    return get_model('gender_age', model_path, lambda: create_inference_session(model_path))
 
 
 def clear_face_analyser() -> Any:
-    global FACE_ANALYSER
+    for model_name in ['face_detector', 'face_recognizer', 'face_landmarker', 'gender_age']:
+        clear_model(model_name)
+
 
-    FACE_ANALYSER = None
+def create_inference_session(model_path: str) -> Any:
+    return onnxruntime.InferenceSession(model_path,
+                                        providers=apply_execution_provider_options(facefusion.globals.execution_providers))
 
 
 def pre_check() -> bool:
@@ -128,13 +118,8 @@ def pre_check() -> bool:
         download_directory_path = resolve_relative_path('../.assets/models')
         model_urls = \
             [
-                MODELS.get('face_detector_retinaface').get('url'),
-                MODELS.get('face_detector_yoloface').get('url'),
-                MODELS.get('face_detector_yunet').get('url'),
-                MODELS.get('face_recognizer_arcface_blendswap').get('url'),
-                MODELS.get('face_recognizer_arcface_inswapper').get('url'),
-                MODELS.get('face_recognizer_arcface_simswap').get('url'),
-                MODELS.get('face_recognizer_arcface_uniface').get('url'),
+                MODELS.get('face_detector_' + facefusion.globals.face_detector_model).get('url'),
+                MODELS.get('face_recognizer_' + facefusion.globals.face_recognizer_model).get('url'),
                 MODELS.get('face_landmarker').get('url'),
                 MODELS.get('gender_age').get('url'),
             ]
@@ -142,6 +127,7 @@ def pre_check() -> bool:
     return True
 
 
+@timed('face_detector')
 def detect_with_retinaface(vision_frame: VisionFrame, face_detector_size: str) -> Tuple[
     List[BoundingBox], List[FaceLandmark5], List[Score]]:
     face_detector = get_face_analyser().get('face_detector')
@@ -156,7 +142,7 @@ def detect_with_retinaface(vision_frame: VisionFrame, face_detector_size: str) -
     face_landmark5_list = []
     score_list = []
 
-    with THREAD_SEMAPHORE:
+    with trace_lock(THREAD_SEMAPHORE, 'face_analyser.semaphore'):
         detections = face_detector.run(None,
                                        {
                                            face_detector.get_inputs()[0].name: prepare_detect_frame(temp_vision_frame,
@@ -185,6 +171,7 @@ def detect_with_retinaface(vision_frame: VisionFrame, face_detector_size: str) -
     return bounding_box_list, face_landmark5_list, score_list
 
 
+@timed('face_detector')
 def detect_with_yoloface(vision_frame: VisionFrame, face_detector_size: str) -> Tuple[
     List[BoundingBox], List[FaceLandmark5], List[Score]]:
     face_detector = get_face_analyser().get('face_detector')
@@ -196,7 +183,7 @@ def detect_with_yoloface(vision_frame: VisionFrame, face_detector_size: str) ->
     face_landmark5_list = []
     score_list = []
 
-    with THREAD_SEMAPHORE:
+    with trace_lock(THREAD_SEMAPHORE, 'face_analyser.semaphore'):
         detections = face_detector.run(None,
                                        {
                                            face_detector.get_inputs()[0].name: prepare_detect_frame(temp_vision_frame,
@@ -224,6 +211,7 @@ def detect_with_yoloface(vision_frame: VisionFrame, face_detector_size: str) ->
     return bounding_box_list, face_landmark5_list, score_list
 
 
+@timed('face_detector')
 def detect_with_yunet(vision_frame: VisionFrame, face_detector_size: str) -> Tuple[
     List[BoundingBox], List[FaceLandmark5], List[Score]]:
     face_detector = get_face_analyser().get('face_detector')
@@ -237,7 +225,7 @@ def detect_with_yunet(vision_frame: VisionFrame, face_detector_size: str) -> Tup
 
     face_detector.setInputSize((temp_vision_frame.shape[1], temp_vision_frame.shape[0]))
     face_detector.setScoreThreshold(facefusion.globals.face_detector_score)
-    with THREAD_SEMAPHORE:
+    with trace_lock(THREAD_SEMAPHORE, 'face_analyser.semaphore'):
         _, detections = face_detector.detect(temp_vision_frame)
     if detections.any():
         for detection in detections:
@@ -292,9 +280,11 @@ def create_faces(vision_frame: VisionFrame, bounding_box_list: List[BoundingBox]
                 gender=gender,
                 age=age
             ))
+    increment_counter('faces', len(faces))
     return faces
 
 
+@timed('face_recognizer')
 def calc_embedding(temp_vision_frame: VisionFrame, face_landmark_5: FaceLandmark5) -> Tuple[Embedding, Embedding]:
     face_recognizer = get_face_analyser().get('face_recognizer')
     crop_vision_frame, matrix = warp_face_by_face_landmark_5(temp_vision_frame, face_landmark_5, 'arcface_112_v2',
@@ -311,6 +301,7 @@ def calc_embedding(temp_vision_frame: VisionFrame, face_landmark_5: FaceLandmark
     return embedding, normed_embedding
 
 
+@timed('face_landmarker')
 def detect_face_landmark_68(temp_vision_frame: VisionFrame, bounding_box: BoundingBox) -> FaceLandmark68:
     face_landmarker = get_face_analyser().get('face_landmarker')
     scale = 195 / numpy.subtract(bounding_box[2:], bounding_box[:2]).max()
@@ -328,6 +319,7 @@ def detect_face_landmark_68(temp_vision_frame: VisionFrame, bounding_box: Boundi
     return face_landmark_68
 
 
+@timed('gender_age')
 def detect_gender_age(temp_vision_frame: VisionFrame, bounding_box: BoundingBox) -> Tuple[int, int]:
     gender_age = get_face_analyser().get('gender_age')
     bounding_box = bounding_box.reshape(2, -1)
@@ -345,8 +337,9 @@ def detect_gender_age(temp_vision_frame: VisionFrame, bounding_box: BoundingBox)
     return gender, age
 
 
-def get_one_face(vision_frame: VisionFrame, position: int = 0) -> Optional[Face]:
-    many_faces = get_many_faces(vision_frame)
+def get_one_face(vision_frame: VisionFrame, position: int = 0,
+                 face_detector_size: Optional[str] = None) -> Optional[Face]:
+    many_faces = get_many_faces(vision_frame, face_detector_size)
     if many_faces:
         try:
             return many_faces[position]
@@ -381,7 +374,9 @@ def get_average_face(vision_frames: List[VisionFrame], position: int = 0) -> Opt
     return average_face
 
 
-def get_many_faces(vision_frame: VisionFrame) -> List[Face]:
+def get_many_faces(vision_frame: VisionFrame, face_detector_size: Optional[str] = None) -> List[Face]:
+    # the stream lowers the detector size for its own frames without touching the globals
+    face_detector_size = face_detector_size or facefusion.globals.face_detector_size
     faces = []
     try:
         faces_cache = get_static_faces(vision_frame)
@@ -390,15 +385,15 @@ def get_many_faces(vision_frame: VisionFrame) -> List[Face]:
         else:
             if facefusion.globals.face_detector_model == 'retinaface':
                 bounding_box_list, face_landmark5_list, score_list = detect_with_retinaface(vision_frame,
-                                                                                            facefusion.globals.face_detector_size)
+                                                                                            face_detector_size)
                 faces = create_faces(vision_frame, bounding_box_list, face_landmark5_list, score_list)
             if facefusion.globals.face_detector_model == 'yoloface':
                 bounding_box_list, face_landmark5_list, score_list = detect_with_yoloface(vision_frame,
-                                                                                          facefusion.globals.face_detector_size)
+                                                                                          face_detector_size)
                 faces = create_faces(vision_frame, bounding_box_list, face_landmark5_list, score_list)
             if facefusion.globals.face_detector_model == 'yunet':
                 bounding_box_list, face_landmark5_list, score_list = detect_with_yunet(vision_frame,
-                                                                                       facefusion.globals.face_detector_size)
+                                                                                       face_detector_size)
                 faces = create_faces(vision_frame, bounding_box_list, face_landmark5_list, score_list)
             if faces:
                 set_static_faces(vision_frame, faces)
@@ -416,9 +411,10 @@ def get_many_faces(vision_frame: VisionFrame) -> List[Face]:
     return faces
 
 
-def find_similar_faces(reference_faces: FaceSet, vision_frame: VisionFrame, face_distance: float) -> List[Face]:
+def find_similar_faces(reference_faces: FaceSet, vision_frame: VisionFrame, face_distance: float,
+                       face_detector_size: Optional[str] = None) -> List[Face]:
     similar_faces: List[Face] = []
-    many_faces = get_many_faces(vision_frame)
+    many_faces = get_many_faces(vision_frame, face_detector_size)
 
     if reference_faces:
         for reference_set in reference_faces:
@@ -430,6 +426,24 @@ def find_similar_faces(reference_faces: FaceSet, vision_frame: VisionFrame, face
     return similar_faces
 
 
+def has_target_faces(vision_frame: VisionFrame, reference_faces: FaceSet, reference_faces_2: FaceSet) -> bool:
+    if 'one' in facefusion.globals.face_selector_mode or 'many' in facefusion.globals.face_selector_mode:
+        return bool(get_many_faces(vision_frame))
+    if 'reference' in facefusion.globals.face_selector_mode:
+        return any(find_similar_faces(ref_faces, vision_frame, facefusion.globals.reference_face_distance) for
+                   ref_faces in [reference_faces, reference_faces_2])
+    return False
+
+
+def detect_face_presence(face_presence_key: Optional[str], frame_number: int, vision_frame: VisionFrame,
+                         reference_faces: FaceSet, reference_faces_2: FaceSet) -> bool:
+    # every face processor records what it sees, later face processors skip the frames recorded without faces
+    has_faces = has_target_faces(vision_frame, reference_faces, reference_faces_2)
+    if face_presence_key:
+        set_face_presence(face_presence_key, frame_number, has_faces)
+    return has_faces
+
+
 def compare_faces(face: Face, reference_face: Face, face_distance: float) -> bool:
     current_face_distance = calc_face_distance(face, reference_face)
     return current_face_distance < face_distance
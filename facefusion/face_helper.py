@@ -6,6 +6,7 @@ import numpy
 
 from facefusion.typing import BoundingBox, FaceLandmark5, FaceLandmark68, VisionFrame, Mask, Matrix, Translation, \
     Template, FaceAnalyserAge, FaceAnalyserGender
+from facefusion.metrics import timed
 
 TEMPLATES: Dict[Template, numpy.ndarray[Any, Any]] = \
     {
@@ -76,6 +77,7 @@ Tuple[VisionFrame, Matrix]:
     return crop_vision_frame, affine_matrix
 
 
+@timed('paste_back')
 def paste_back(temp_vision_frame: VisionFrame, crop_vision_frame: VisionFrame, crop_mask: Mask,
                affine_matrix: Matrix) -> VisionFrame:
     inverse_matrix = cv2.invertAffineTransform(affine_matrix)
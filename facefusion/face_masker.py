@@ -1,7 +1,6 @@
 from typing import Any, Dict, List
 from cv2.typing import Size
 from functools import lru_cache
-import threading
 import cv2
 import numpy
 import onnxruntime
@@ -11,10 +10,9 @@ from facefusion.typing import FaceLandmark68, VisionFrame, Mask, Padding, FaceMa
 from facefusion.execution_helper import apply_execution_provider_options
 from facefusion.filesystem import resolve_relative_path
 from facefusion.download import conditional_download
+from facefusion.metrics import timed
+from facefusion.model_registry import get_model, clear_model
 
-FACE_OCCLUDER = None
-FACE_PARSER = None
-THREAD_LOCK: threading.Lock = threading.Lock()
 MODELS: ModelSet = \
     {
         'face_occluder':
@@ -44,46 +42,34 @@ FACE_MASK_REGIONS: Dict[FaceMaskRegion, int] = \
 
 
 def get_face_occluder() -> Any:
-    global FACE_OCCLUDER
-
-    with THREAD_LOCK:
-        if FACE_OCCLUDER is None:
-            model_path = MODELS.get('face_occluder').get('path')
-            FACE_OCCLUDER = onnxruntime.InferenceSession(model_path, providers=apply_execution_provider_options(
-                facefusion.globals.execution_providers))
-    return FACE_OCCLUDER
+    model_path = MODELS.get('face_occluder').get('path')
+    return get_model('face_occluder', model_path, lambda: onnxruntime.InferenceSession(model_path,
+        providers=apply_execution_provider_options(facefusion.globals.execution_providers)))
 
 
 def get_face_parser() -> Any:
-    global FACE_PARSER
-
-    with THREAD_LOCK:
-        if FACE_PARSER is None:
-            model_path = MODELS.get('face_parser').get('path')
-            FACE_PARSER = onnxruntime.InferenceSession(model_path, providers=apply_execution_provider_options(
-                facefusion.globals.execution_providers))
-    return FACE_PARSER
+    model_path = MODELS.get('face_parser').get('path')
+    return get_model('face_parser', model_path, lambda: onnxruntime.InferenceSession(model_path,
+        providers=apply_execution_provider_options(facefusion.globals.execution_providers)))
 
 
 def clear_face_occluder() -> None:
-    global FACE_OCCLUDER
-
-    FACE_OCCLUDER = None
+    clear_model('face_occluder')
 
 
 def clear_face_parser() -> None:
-    global FACE_PARSER
-    FACE_PARSER = None
+    clear_model('face_parser')
 
 
 def pre_check() -> bool:
-    download_directory_path = resolve_relative_path('../.assets/models')
-    model_urls = \
-        [
-            MODELS.get('face_occluder').get('url'),
-            MODELS.get('face_parser').get('url'),
-        ]
-    conditional_download(download_directory_path, model_urls)
+    if not facefusion.globals.skip_download:
+        download_directory_path = resolve_relative_path('../.assets/models')
+        model_urls = []
+        if 'occlusion' in facefusion.globals.face_mask_types:
+            model_urls.append(MODELS.get('face_occluder').get('url'))
+        if 'region' in facefusion.globals.face_mask_types:
+            model_urls.append(MODELS.get('face_parser').get('url'))
+        conditional_download(download_directory_path, model_urls)
     return True
 
 
@@ -101,6 +87,7 @@ def create_static_box_mask(crop_size: Size, face_mask_blur: float, face_mask_pad
     return box_mask
 
 
+@timed('face_occluder')
 def create_occlusion_mask(crop_vision_frame: VisionFrame) -> Mask:
     face_occluder = get_face_occluder()
     prepare_vision_frame = cv2.resize(crop_vision_frame, face_occluder.get_inputs()[0].shape[1:3][::-1])
@@ -116,6 +103,7 @@ def create_occlusion_mask(crop_vision_frame: VisionFrame) -> Mask:
     return occlusion_mask
 
 
+@timed('face_parser')
 def create_region_mask(crop_vision_frame: VisionFrame, face_mask_regions: List[FaceMaskRegion]) -> Mask:
     face_parser = get_face_parser()
     prepare_vision_frame = cv2.flip(cv2.resize(crop_vision_frame, (512, 512)), 1)
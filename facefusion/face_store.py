@@ -1,5 +1,6 @@
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 import hashlib
+import os
 import numpy
 
 import facefusion.globals
@@ -17,6 +18,8 @@ FACE_STORE_2: FaceStore = \
         'reference_faces': {}
     }
 
+FACE_PRESENCE: Dict[str, Dict[int, bool]] = {}
+
 
 def get_static_faces(vision_frame: VisionFrame, dict_2=False) -> Optional[List[Face]]:
     frame_hash = create_frame_hash(vision_frame)
@@ -43,6 +46,25 @@ def clear_static_faces() -> None:
     FACE_STORE_2['static_faces'] = {}
 
 
+def get_face_presence_key(frame_paths: List[str]) -> Optional[str]:
+    # the frames of a job share its workspace directory, which keeps concurrent jobs apart
+    if frame_paths:
+        return os.path.dirname(frame_paths[0])
+    return None
+
+
+def get_face_presence(face_presence_key: str, frame_number: int) -> Optional[bool]:
+    return FACE_PRESENCE.get(face_presence_key, {}).get(frame_number)
+
+
+def set_face_presence(face_presence_key: str, frame_number: int, has_faces: bool) -> None:
+    FACE_PRESENCE.setdefault(face_presence_key, {})[frame_number] = has_faces
+
+
+def clear_face_presence(face_presence_key: str) -> None:
+    FACE_PRESENCE.pop(face_presence_key, None)
+
+
 def create_frame_hash(vision_frame: VisionFrame) -> Optional[str]:
     return hashlib.sha1(vision_frame.tobytes()).hexdigest() if numpy.any(vision_frame) else None
 
@@ -3,6 +3,7 @@ import time
 
 from facefusion.vision import count_video_frame_total, detect_fps
 from facefusion.job_params import JobParams
+from facefusion.memory_profiler import take_memory_snapshot, record_memory
 
 
 class FFStatus:
@@ -26,6 +27,10 @@ class FFStatus:
             self.cancelled = False
             self.time_start = None
             self.preview_image = None
+            self.stage = None
+            self.stage_start = None
+            self.stage_memory = None
+            self.stage_times = {}
             # Mark as initialized to prevent reinitialization, unless explicitly requested
             FFStatus._is_initialized = True
 
@@ -38,6 +43,7 @@ class FFStatus:
         self.status = status
         self.started = True
         self.time_start = time.time()
+        self.clear_stages()
         if self.queue_total > 0:
             self.started = True
             self.cancelled = False
@@ -51,6 +57,27 @@ class FFStatus:
             self.preview_image = None
         self.status = status
 
+    def begin_stage(self, stage: str):
+        """Close the running stage and start timing the next one"""
+        self.end_stage()
+        self.stage = stage
+        self.stage_start = time.perf_counter()
+        self.stage_memory = take_memory_snapshot()
+
+    def end_stage(self):
+        """Add the elapsed time of the running stage to the stage times"""
+        if self.stage:
+            self.stage_times[self.stage] = self.stage_times.get(self.stage, 0.0) + time.perf_counter() - self.stage_start
+            record_memory(self.stage, 'stages', self.stage_memory)
+        self.stage = None
+        self.stage_start = None
+
+    def clear_stages(self):
+        self.stage = None
+        self.stage_start = None
+        self.stage_memory = None
+        self.stage_times = {}
+
     def update_preview(self, image: str):
         """Update the current job preview image"""
         if image and not os.path.exists(image):
@@ -123,8 +150,6 @@ class FFStatus:
             print(f"Total frames: {total_frames}, execution providers: {len(frame_processors)}")
             total_steps = total_frames * len(frame_processors)
             total_steps += 2
-            if not job.skip_audio:
-                total_steps += 1
         elif is_image(target_path):
             total_steps = len(frame_processors) + 1
         else:
@@ -1,19 +1,24 @@
-import json
+import shutil
 import subprocess
 from typing import List, Optional
 
+import numpy
 from ffmpeg_progress_yield import FfmpegProgress
 
 import facefusion.globals
 from facefusion import logger
-from facefusion.filesystem import get_temp_frames_pattern, get_temp_output_video_path
+from facefusion.filesystem import get_workspace_frames_pattern, get_workspace_raw_path
+from facefusion.metrics import timed
 from facefusion.mytqdm import mytqdm
-from facefusion.typing import OutputVideoPreset, Fps, AudioBuffer
+from facefusion.raw_frames import create_raw_header, finalize_raw_frames, get_raw_frames
+from facefusion.typing import OutputVideoPreset, Fps, AudioBuffer, Workspace
+from facefusion.vision import unpack_resolution
 
 TEMP_OUTPUT_VIDEO_NAME = 'temp.mp4'
-LAST_VIDEO_INFO = None
+RAW_PIPE_CHUNK_SIZE = 1024 ** 2 * 16
 
 
+@timed('ffmpeg')
 def run_ffmpeg(args: List[str], status=None) -> bool:
     commands = ['ffmpeg', '-hide_banner', '-loglevel', 'error']
     commands.extend(args)
@@ -32,6 +37,9 @@ def run_ffmpeg(args: List[str], status=None) -> bool:
     except subprocess.CalledProcessError as exception:
         logger.debug(exception.stderr.decode().strip(), 'FACEFUSION.FFMPEG')
         return False
+    except RuntimeError as exception:
+        logger.debug(str(exception), 'FACEFUSION.FFMPEG')
+        return False
 
 
 def open_ffmpeg(args: List[str]) -> subprocess.Popen[bytes]:
@@ -40,12 +48,6 @@ def open_ffmpeg(args: List[str]) -> subprocess.Popen[bytes]:
     return subprocess.Popen(commands, stdin=subprocess.PIPE)
 
 
-def get_video_info(video_path):
-    cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_streams', video_path]
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    return json.loads(result.stdout)
-
-
 def detect_hardware_acceleration():
     try:
         result = subprocess.run(['ffmpeg', '-hwaccels'], capture_output=True, text=True)
@@ -63,12 +65,13 @@ def detect_hardware_acceleration():
         return None
 
 
-def extract_frames(target_path: str, video_resolution: str, video_fps: Fps, status=None) -> bool:
+def extract_frames(workspace: Workspace, video_resolution: str, video_fps: Fps, status=None) -> bool:
+    target_path = workspace.target_path
     temp_frame_compression = round(31 - (facefusion.globals.temp_frame_quality * 0.31))
     trim_frame_start = facefusion.globals.trim_frame_start
     trim_frame_end = facefusion.globals.trim_frame_end
-    temp_frames_pattern = get_temp_frames_pattern(target_path, '%04d')
-    commands = ['-hwaccel', 'auto', '-i', target_path, '-q:v', str(temp_frame_compression), '-pix_fmt', 'rgb24']
+    temp_frames_pattern = get_workspace_frames_pattern(workspace, '%04d')
+    commands = ['-hwaccel', 'auto', '-i', target_path]
     if trim_frame_start is not None and trim_frame_end is not None:
         commands.extend(['-vf', 'trim=start_frame=' + str(trim_frame_start) + ':end_frame=' + str(
             trim_frame_end) + ',scale=' + str(video_resolution) + ',fps=' + str(video_fps)])
@@ -81,21 +84,62 @@ def extract_frames(target_path: str, video_resolution: str, video_fps: Fps, stat
                              video_fps)])
     else:
         commands.extend(['-vf', 'scale=' + str(video_resolution) + ',fps=' + str(video_fps)])
+    if workspace.temp_frame_format == 'raw':
+        commands.extend(['-vsync', '0', '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-'])
+        return extract_raw_frames(commands, get_workspace_raw_path(workspace), video_resolution)
+    commands.extend(['-q:v', str(temp_frame_compression), '-pix_fmt', 'rgb24'])
+    if workspace.temp_frame_format == 'png' and workspace.temp_frame_compression is not None:
+        commands.extend(['-compression_level', str(workspace.temp_frame_compression)])
+    if workspace.temp_frame_format == 'tiff':
+        commands.extend(['-compression_algo', 'raw'])
     commands.extend(['-vsync', '0', temp_frames_pattern])
     return run_ffmpeg(commands, status)
 
 
+@timed('ffmpeg')
+def extract_raw_frames(args: List[str], raw_path: str, video_resolution: str) -> bool:
+    commands = ['ffmpeg', '-hide_banner', '-loglevel', 'error']
+    commands.extend(args)
+    width, height = unpack_resolution(video_resolution)
+    with open(raw_path, 'wb') as raw_file:
+        raw_file.write(create_raw_header((0, height, width, 3)))
+        process = subprocess.Popen(commands, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            shutil.copyfileobj(process.stdout, raw_file, RAW_PIPE_CHUNK_SIZE)
+        except OSError as exception:
+            # a full workspace tier stops the pipe, the caller decides where to extract again
+            process.kill()
+            process.communicate()
+            logger.debug(str(exception), 'FACEFUSION.FFMPEG')
+            return False
+        _, error = process.communicate()
+    if process.returncode != 0:
+        logger.debug(error.decode().strip(), 'FACEFUSION.FFMPEG')
+        return False
+    return finalize_raw_frames(raw_path, (width, height)) > 0
+
+
 def compress_image(output_path: str) -> bool:
     output_image_compression = round(31 - (facefusion.globals.output_image_quality * 0.31))
     commands = ['-hwaccel', 'auto', '-i', output_path, '-q:v', str(output_image_compression), '-y', output_path]
     return run_ffmpeg(commands)
 
 
-def merge_video(target_path: str, fps: float, status=None) -> bool:
-    temp_output_video_path = get_temp_output_video_path(target_path)
-    temp_frames_pattern = get_temp_frames_pattern(target_path, '%04d')
-    commands = ['-hwaccel', 'auto', '-r', str(fps), '-i', temp_frames_pattern, '-c:v',
-                facefusion.globals.output_video_encoder]
+def merge_video(workspace: Workspace, output_path: str, fps: float, audio_path: Optional[str] = None,
+                pad_audio: bool = False, status=None) -> bool:
+    temp_frames_pattern = get_workspace_frames_pattern(workspace, '%04d')
+    raw_frames = None
+    if workspace.temp_frame_format == 'raw':
+        raw_frames = get_raw_frames(get_workspace_raw_path(workspace))
+        if raw_frames is None:
+            return False
+        commands = ['-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', str(raw_frames.shape[2]) + 'x' +
+                    str(raw_frames.shape[1]), '-r', str(fps), '-i', '-']
+    else:
+        commands = ['-hwaccel', 'auto', '-r', str(fps), '-i', temp_frames_pattern]
+    if audio_path:
+        commands.extend(['-i', audio_path])
+    commands.extend(['-c:v', facefusion.globals.output_video_encoder])
     if facefusion.globals.output_video_encoder in ['libx264', 'libx265']:
         output_video_compression = round(51 - (facefusion.globals.output_video_quality * 0.51))
         commands.extend(['-crf', str(output_video_compression), '-preset', facefusion.globals.output_video_preset])
@@ -106,10 +150,32 @@ def merge_video(target_path: str, fps: float, status=None) -> bool:
         output_video_compression = round(51 - (facefusion.globals.output_video_quality * 0.51))
         commands.extend(
             ['-cq', str(output_video_compression), '-preset', map_nvenc_preset(facefusion.globals.output_video_preset)])
-    commands.extend(['-pix_fmt', 'yuv420p', '-colorspace', 'bt709', '-y', temp_output_video_path])
+    commands.extend(['-pix_fmt', 'yuv420p', '-colorspace', 'bt709'])
+    if audio_path:
+        if pad_audio:
+            commands.extend(['-af', 'apad'])
+        else:
+            commands.extend(['-c:a', 'copy'])
+        commands.extend(['-map', '0:v:0', '-map', '1:a:0', '-shortest'])
+    commands.extend(['-y', output_path])
+    if raw_frames is not None:
+        return pipe_raw_frames(commands, raw_frames)
     return run_ffmpeg(commands, status)
 
 
+@timed('ffmpeg')
+def pipe_raw_frames(args: List[str], raw_frames: numpy.memmap) -> bool:
+    process = open_ffmpeg(args)
+    # the frames go straight from the page cache into the encoder without any copy
+    try:
+        for raw_frame in raw_frames:
+            process.stdin.write(memoryview(raw_frame))
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+    return process.wait() == 0
+
+
 def read_audio_buffer(target_path: str, sample_rate: int, channel_total: int) -> Optional[AudioBuffer]:
     commands = ['-i', target_path, '-vn', '-f', 's16le', '-acodec', 'pcm_s16le', '-ar', str(sample_rate), '-ac',
                 str(channel_total), '-']
@@ -128,25 +194,16 @@ def extract_audio_from_video(target_path: str) -> Optional[str]:
     return None
 
 
-def restore_audio(target_path: str, output_path: str, video_fps: Fps, status=None) -> bool:
-    trim_frame_start = facefusion.globals.trim_frame_start
-    trim_frame_end = facefusion.globals.trim_frame_end
-    temp_output_video_path = get_temp_output_video_path(target_path)
-    commands = ['-hwaccel', 'auto', '-i', temp_output_video_path]
+def extract_audio(target_path: str, audio_path: str, video_fps: Fps, trim_frame_start: Optional[int] = None,
+                  trim_frame_end: Optional[int] = None) -> bool:
+    commands = []
     if trim_frame_start is not None:
         start_time = trim_frame_start / video_fps
         commands.extend(['-ss', str(start_time)])
     if trim_frame_end is not None:
         end_time = trim_frame_end / video_fps
         commands.extend(['-to', str(end_time)])
-    commands.extend(['-i', target_path, '-c', 'copy', '-map', '0:v:0', '-map', '1:a:0', '-shortest', '-y', output_path])
-    return run_ffmpeg(commands, status)
-
-
-def replace_audio(target_path: str, audio_path: str, output_path: str) -> bool:
-    temp_output_path = get_temp_output_video_path(target_path)
-    commands = ['-hwaccel', 'auto', '-i', temp_output_path, '-i', audio_path, '-c:v', 'copy', '-af', 'apad',
-                '-shortest', '-map', '0:v:0', '-map', '1:a:0', '-y', output_path]
+    commands.extend(['-i', target_path, '-vn', '-map', '0:a:0', '-c:a', 'copy', '-y', audio_path])
     return run_ffmpeg(commands)
 
 
@@ -1,32 +1,38 @@
 import glob
 import os
+import platform
 import shutil
+import threading
+import time
+import uuid
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 import filetype
 
 import facefusion.globals
+from facefusion.metrics import increment_counter
+from facefusion.raw_frames import RAW_FRAMES_NAME, get_raw_frame_paths, close_raw_frames
+from facefusion.typing import Resolution, TempFrameFormat, Workspace
 from modules.paths_internal import models_path, script_path
 
 output_dir = os.path.join(script_path, 'outputs')
 TEMP_DIRECTORY_PATH = os.path.join(output_dir, 'facefusion', 'temp')
-TEMP_OUTPUT_VIDEO_NAME = 'temp.mp4'
-
-
-def get_temp_frame_paths(target_path: str) -> List[str]:
-    temp_frames_pattern = get_temp_frames_pattern(target_path, '*')
-    return sorted(glob.glob(temp_frames_pattern))
-
-
-def get_temp_frames_pattern(target_path: str, temp_frame_prefix: str) -> str:
-    temp_directory_path = get_temp_directory_path(target_path)
-    return os.path.join(temp_directory_path, temp_frame_prefix + '.' + facefusion.globals.temp_frame_format)
-
-
-def get_temp_directory_path(target_path: str) -> str:
-    target_name, _ = os.path.splitext(os.path.basename(target_path))
-    return os.path.join(TEMP_DIRECTORY_PATH, target_name)
+TEMP_OUTPUT_AUDIO_NAME = 'temp.mka'
+WORKSPACE_DIRECTORY_PATH = os.path.join(TEMP_DIRECTORY_PATH, 'workspaces')
+WORKSPACE_OWNER_NAME = 'owner.pid'
+TEMP_FRAME_RATIOS = \
+    {
+        'bmp': 1.0,
+        'png': 0.6,
+        'jpg': 0.15,
+        'tiff': 1.0,
+        'raw': 1.0
+    }
+TEMP_RAM_MARGIN = 1.5
+TEMP_RAM_RESERVATIONS: Dict[str, int] = {}
+WORKSPACES: Dict[str, Workspace] = {}
+THREAD_LOCK: threading.Lock = threading.Lock()
 
 
 def get_temp_input_path(target_path: str) -> str:
@@ -45,22 +51,200 @@ def get_temp_input_video_name(target_path: str) -> str:
     return target_path
 
 
-def get_temp_output_video_path(target_path: str) -> str:
-    temp_directory_path = get_temp_directory_path(target_path)
-    return os.path.join(temp_directory_path, TEMP_OUTPUT_VIDEO_NAME)
+def create_workspace(job_id: Any, target_path: str, workspace_size: int = 0, temp_frame_format: TempFrameFormat = 'png',
+                     temp_frame_compression: Optional[int] = None) -> Workspace:
+    # the suffix keeps workspaces apart when job ids repeat across restarts or hosts
+    workspace_name = 'job-' + str(job_id) + '-' + uuid.uuid4().hex[:8]
+    workspace_tier = 'disk'
+    workspace_directory_path = os.path.join(WORKSPACE_DIRECTORY_PATH, workspace_name)
+    ram_workspace_directory_path = get_ram_workspace_directory_path()
+    if ram_workspace_directory_path and \
+            reserve_ram_workspace(os.path.join(ram_workspace_directory_path, workspace_name), workspace_size):
+        workspace_tier = 'ram'
+        workspace_directory_path = os.path.join(ram_workspace_directory_path, workspace_name)
+    Path(workspace_directory_path).mkdir(parents=True, exist_ok=True)
+    with open(os.path.join(workspace_directory_path, WORKSPACE_OWNER_NAME), 'w') as owner_file:
+        owner_file.write(str(os.getpid()))
+    increment_counter('temp_workspaces_' + workspace_tier)
+    workspace = Workspace(job_id=job_id, target_path=target_path, directory_path=workspace_directory_path,
+                          tier=workspace_tier, size=workspace_size, temp_frame_format=temp_frame_format,
+                          temp_frame_compression=temp_frame_compression)
+    with THREAD_LOCK:
+        WORKSPACES[workspace_directory_path] = workspace
+    return workspace
+
+
+def find_workspace(frame_path: str) -> Optional[Workspace]:
+    # frames only carry their path, the workspace they live in holds the codec of the job
+    with THREAD_LOCK:
+        return WORKSPACES.get(os.path.dirname(frame_path))
+
+
+def get_ram_workspace_directory_path() -> Optional[str]:
+    if facefusion.globals.temp_ram_budget and is_directory(facefusion.globals.temp_ram_path):
+        return os.path.join(facefusion.globals.temp_ram_path, 'facefusion', 'workspaces')
+    return None
 
 
-def create_temp(target_path: str) -> None:
-    temp_directory_path = get_temp_directory_path(target_path)
-    Path(temp_directory_path).mkdir(parents=True, exist_ok=True)
+def estimate_workspace_size(frame_total: int, resolution: Optional[Resolution],
+                            temp_frame_format: TempFrameFormat) -> int:
+    if not frame_total or not resolution:
+        return 0
+    width, height = resolution
+    return int(frame_total * width * height * 3 * TEMP_FRAME_RATIOS.get(temp_frame_format, 1.0))
+
+
+def get_ram_workspace_budget() -> int:
+    if not get_ram_workspace_directory_path():
+        return 0
+    with THREAD_LOCK:
+        ram_budget = facefusion.globals.temp_ram_budget * 1024 ** 2 - sum(TEMP_RAM_RESERVATIONS.values())
+    # a workspace only lands on the memory tier when its reservation including the margin fits
+    return max(0, int(min(ram_budget, shutil.disk_usage(facefusion.globals.temp_ram_path).free) / TEMP_RAM_MARGIN))
+
+
+def reserve_ram_workspace(workspace_directory_path: str, workspace_size: int) -> bool:
+    if workspace_size <= 0:
+        return False
+    # the size is estimated from the frame format, the margin holds the frames until they are spilled
+    reservation_size = int(workspace_size * TEMP_RAM_MARGIN)
+    with THREAD_LOCK:
+        ram_budget = facefusion.globals.temp_ram_budget * 1024 ** 2 - sum(TEMP_RAM_RESERVATIONS.values())
+        if reservation_size <= min(ram_budget, shutil.disk_usage(facefusion.globals.temp_ram_path).free):
+            TEMP_RAM_RESERVATIONS[workspace_directory_path] = reservation_size
+            return True
+    return False
 
 
-def move_temp(target_path: str, output_path: str) -> None:
-    temp_output_video_path = get_temp_output_video_path(target_path)
-    if is_file(temp_output_video_path):
-        if is_file(output_path):
-            os.remove(output_path)
-        shutil.move(temp_output_video_path, output_path)
+def demote_workspace(workspace: Workspace) -> Workspace:
+    clear_workspace(workspace)
+    # without a size nothing is reserved, the workspace lands on disk
+    return create_workspace(workspace.job_id, workspace.target_path, 0, workspace.temp_frame_format,
+                            workspace.temp_frame_compression)
+
+
+def get_spill_directory_path(workspace: Workspace) -> str:
+    return os.path.join(WORKSPACE_DIRECTORY_PATH, os.path.basename(workspace.directory_path))
+
+
+def spill_workspace(workspace: Workspace) -> int:
+    if workspace.tier != 'ram' or workspace.temp_frame_format == 'raw':
+        return 0
+    temp_frame_paths = get_workspace_frame_paths(workspace)
+    workspace_size = 0
+    spill_total = 0
+    for temp_frame_path in temp_frame_paths:
+        workspace_size += os.path.getsize(temp_frame_path)
+        # frames beyond the reservation move to disk, the link keeps every frame path valid
+        if workspace_size > workspace.size:
+            spill_frame_path = os.path.join(get_spill_directory_path(workspace), os.path.basename(temp_frame_path))
+            Path(os.path.dirname(spill_frame_path)).mkdir(parents=True, exist_ok=True)
+            shutil.move(temp_frame_path, spill_frame_path)
+            os.symlink(spill_frame_path, temp_frame_path)
+            spill_total += 1
+    increment_counter('temp_frames_ram', len(temp_frame_paths) - spill_total)
+    increment_counter('temp_frames_spilled', spill_total)
+    return spill_total
+
+
+def get_workspace_frames_pattern(workspace: Workspace, temp_frame_prefix: str) -> str:
+    return os.path.join(workspace.directory_path, temp_frame_prefix + '.' + workspace.temp_frame_format)
+
+
+def get_workspace_raw_path(workspace: Workspace) -> str:
+    return os.path.join(workspace.directory_path, RAW_FRAMES_NAME)
+
+
+def get_workspace_frame_paths(workspace: Workspace) -> List[str]:
+    if workspace.temp_frame_format == 'raw':
+        return get_raw_frame_paths(get_workspace_raw_path(workspace))
+    return sorted(glob.glob(get_workspace_frames_pattern(workspace, '*')))
+
+
+def get_workspace_output_audio_path(workspace: Workspace) -> str:
+    return os.path.join(workspace.directory_path, TEMP_OUTPUT_AUDIO_NAME)
+
+
+def clear_workspace(workspace: Workspace) -> None:
+    close_raw_frames(get_workspace_raw_path(workspace))
+    remove_workspace_directory(workspace.directory_path)
+    if workspace.tier == 'ram':
+        if is_directory(get_spill_directory_path(workspace)):
+            remove_workspace_directory(get_spill_directory_path(workspace))
+        with THREAD_LOCK:
+            TEMP_RAM_RESERVATIONS.pop(workspace.directory_path, None)
+    with THREAD_LOCK:
+        WORKSPACES.pop(workspace.directory_path, None)
+
+
+def remove_workspace_directory(workspace_directory_path: str) -> None:
+    # renaming is constant time, the tree is deleted off the processing thread
+    trash_directory_path = os.path.join(os.path.dirname(workspace_directory_path), '.trash-' + uuid.uuid4().hex)
+    try:
+        os.replace(workspace_directory_path, trash_directory_path)
+    except OSError:
+        trash_directory_path = workspace_directory_path
+    threading.Thread(target=shutil.rmtree, args=(trash_directory_path,), kwargs={'ignore_errors': True},
+                     daemon=True).start()
+
+
+def get_workspace_owner(workspace_directory_path: str) -> Optional[int]:
+    try:
+        with open(os.path.join(workspace_directory_path, WORKSPACE_OWNER_NAME), 'r') as owner_file:
+            return int(owner_file.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def is_process_alive(process_id: int) -> bool:
+    if platform.system().lower() == 'windows':
+        import ctypes
+
+        process_handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, process_id)  # type: ignore[attr-defined]
+        if process_handle:
+            ctypes.windll.kernel32.CloseHandle(process_handle)  # type: ignore[attr-defined]
+            return True
+        return False
+    try:
+        os.kill(process_id, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def sweep_workspaces(owned: bool = False) -> int:
+    workspace_total = 0
+    for workspace_root_path in [WORKSPACE_DIRECTORY_PATH, get_ram_workspace_directory_path()]:
+        if not is_directory(workspace_root_path):
+            continue
+        for workspace_name in os.listdir(workspace_root_path):
+            workspace_directory_path = os.path.join(workspace_root_path, workspace_name)
+            workspace_owner = get_workspace_owner(workspace_directory_path)
+            if workspace_name.startswith('.trash-'):
+                shutil.rmtree(workspace_directory_path, ignore_errors=True)
+                continue
+            if workspace_owner == os.getpid():
+                is_orphan = owned
+            elif workspace_owner:
+                is_orphan = not is_process_alive(workspace_owner)
+            else:
+                # allow another process to finish writing its owner file, spill directories have no owner of their own
+                is_orphan = time.time() - os.path.getmtime(workspace_directory_path) > 60 and \
+                    not is_spill_in_use(workspace_name)
+            if is_orphan:
+                remove_workspace_directory(workspace_directory_path)
+                workspace_total += 1
+    return workspace_total
+
+
+def is_spill_in_use(workspace_name: str) -> bool:
+    ram_workspace_directory_path = get_ram_workspace_directory_path()
+    if ram_workspace_directory_path:
+        workspace_owner = get_workspace_owner(os.path.join(ram_workspace_directory_path, workspace_name))
+        return bool(workspace_owner) and is_process_alive(workspace_owner)
+    return False
 
 
 def clear_temp(some_file=None) -> None:
@@ -69,6 +253,9 @@ def clear_temp(some_file=None) -> None:
         src_files = [f for f in facefusion.globals.source_paths if os.path.exists(f)]
     tgt_file = facefusion.globals.target_path
     for item in glob.glob(os.path.join(TEMP_DIRECTORY_PATH, '**/*')):
+        # workspaces belong to running jobs and are removed by them or the sweep
+        if item == WORKSPACE_DIRECTORY_PATH or item.startswith(WORKSPACE_DIRECTORY_PATH + os.sep):
+            continue
         if os.path.isdir(item):
             shutil.rmtree(item)
             continue
@@ -0,0 +1,94 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+import facefusion.globals
+from facefusion.metrics import increment_counter
+from facefusion.profiler import trace_span
+from facefusion.raw_frames import is_raw_frame_path
+from facefusion.typing import PrefetchQueue, VisionFrame
+
+PREFETCH_WORKER_COUNT = min(8, os.cpu_count() or 1)
+PREFETCH_FRAME_LIMIT = 8
+PREFETCH_MEMORY_LIMIT = 1024 ** 3
+FRAME_PREFETCHER: Optional[ThreadPoolExecutor] = None
+PREFETCH_STATE = threading.local()
+THREAD_LOCK: threading.Lock = threading.Lock()
+
+
+def get_frame_prefetcher() -> ThreadPoolExecutor:
+    global FRAME_PREFETCHER
+
+    with THREAD_LOCK:
+        if FRAME_PREFETCHER is None:
+            FRAME_PREFETCHER = ThreadPoolExecutor(max_workers=PREFETCH_WORKER_COUNT,
+                                                  thread_name_prefix='frame_prefetcher')
+    return FRAME_PREFETCHER
+
+
+def create_prefetch_queue(frame_paths: List[str], read_frame: Callable[[str], Optional[VisionFrame]]) -> PrefetchQueue:
+    # raw frames are views into the memmap, decoding them ahead would only pin memory
+    prefetch_queue: PrefetchQueue =\
+        {
+            'frame_paths': deque(frame_path for frame_path in frame_paths if not is_raw_frame_path(frame_path)),
+            'futures': {},
+            'read_frame': read_frame,
+            'depth': 2
+        }
+    fill_prefetch_queue(prefetch_queue)
+    return prefetch_queue
+
+
+def fill_prefetch_queue(prefetch_queue: PrefetchQueue) -> None:
+    frame_prefetcher = get_frame_prefetcher()
+    while prefetch_queue.get('frame_paths') and len(prefetch_queue.get('futures')) < prefetch_queue.get('depth'):
+        frame_path = prefetch_queue.get('frame_paths').popleft()
+        prefetch_queue.get('futures')[frame_path] = frame_prefetcher.submit(prefetch_queue.get('read_frame'),
+                                                                            frame_path)
+
+
+def get_prefetch_depth(vision_frame: VisionFrame) -> int:
+    # the memory limit is shared by every worker that prefetches at the same time
+    memory_limit = PREFETCH_MEMORY_LIMIT // max(1, facefusion.globals.execution_thread_count or 1)
+    return max(1, min(PREFETCH_FRAME_LIMIT, memory_limit // max(1, vision_frame.nbytes)))
+
+
+def take_prefetched_frame(prefetch_queue: PrefetchQueue, frame_path: str) -> Optional[VisionFrame]:
+    future = prefetch_queue.get('futures').pop(frame_path, None)
+    if future is None:
+        return None
+    with trace_span('prefetch.wait', 'io'):
+        vision_frame = future.result()
+    if vision_frame is not None:
+        prefetch_queue['depth'] = get_prefetch_depth(vision_frame)
+        increment_counter('frames_prefetched')
+    fill_prefetch_queue(prefetch_queue)
+    return vision_frame
+
+
+def clear_prefetch_queue(prefetch_queue: PrefetchQueue) -> None:
+    prefetch_queue.get('frame_paths').clear()
+    for future in prefetch_queue.get('futures').values():
+        future.cancel()
+    prefetch_queue.get('futures').clear()
+
+
+@contextmanager
+def prefetch_frames(frame_paths: List[str], read_frame: Callable[[str], Optional[VisionFrame]]) -> Iterator[None]:
+    prefetch_queue = create_prefetch_queue(frame_paths, read_frame)
+    PREFETCH_STATE.prefetch_queue = prefetch_queue
+    try:
+        yield
+    finally:
+        PREFETCH_STATE.prefetch_queue = None
+        clear_prefetch_queue(prefetch_queue)
+
+
+def read_prefetched_frame(frame_path: str) -> Optional[VisionFrame]:
+    prefetch_queue = getattr(PREFETCH_STATE, 'prefetch_queue', None)
+    if prefetch_queue:
+        return take_prefetched_frame(prefetch_queue, frame_path)
+    return None
@@ -0,0 +1,83 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Optional, Set
+
+from facefusion import logger, wording
+from facefusion.frame_prefetcher import read_prefetched_frame
+from facefusion.metrics import increment_counter
+from facefusion.profiler import trace_span
+from facefusion.raw_frames import is_raw_frame_path
+from facefusion.typing import VisionFrame
+from facefusion.vision import read_image, write_image
+
+FRAME_WRITER_WORKER_COUNT = min(8, os.cpu_count() or 1)
+FRAME_WRITER_QUEUE_SIZE = 16
+FRAME_WRITER: Optional[ThreadPoolExecutor] = None
+FRAME_WRITER_SLOTS: threading.BoundedSemaphore = threading.BoundedSemaphore(FRAME_WRITER_QUEUE_SIZE)
+IN_FLIGHT_FRAMES: Dict[str, VisionFrame] = {}
+WRITE_FUTURES: Set['Future[bool]'] = set()
+THREAD_LOCK: threading.Lock = threading.Lock()
+
+
+def get_frame_writer() -> ThreadPoolExecutor:
+    global FRAME_WRITER
+
+    with THREAD_LOCK:
+        if FRAME_WRITER is None:
+            FRAME_WRITER = ThreadPoolExecutor(max_workers=FRAME_WRITER_WORKER_COUNT, thread_name_prefix='frame_writer')
+    return FRAME_WRITER
+
+
+def write_frame(frame_path: str, vision_frame: VisionFrame) -> bool:
+    # raw frames are a plain copy into the memmap, there is no encode to hide
+    if is_raw_frame_path(frame_path):
+        return write_image(frame_path, vision_frame)
+    frame_writer = get_frame_writer()
+    FRAME_WRITER_SLOTS.acquire()
+    with THREAD_LOCK:
+        IN_FLIGHT_FRAMES[frame_path] = vision_frame
+    future = frame_writer.submit(run_write_frame, frame_path, vision_frame)
+    with THREAD_LOCK:
+        WRITE_FUTURES.add(future)
+    future.add_done_callback(discard_write_future)
+    return True
+
+
+def run_write_frame(frame_path: str, vision_frame: VisionFrame) -> bool:
+    try:
+        if write_image(frame_path, vision_frame):
+            return True
+        logger.error(wording.get('writing_frame_failed').format(frame_path=frame_path), __name__.upper())
+        increment_counter('frame_write_failures')
+        return False
+    finally:
+        with THREAD_LOCK:
+            if IN_FLIGHT_FRAMES.get(frame_path) is vision_frame:
+                del IN_FLIGHT_FRAMES[frame_path]
+        FRAME_WRITER_SLOTS.release()
+
+
+def discard_write_future(future: 'Future[bool]') -> None:
+    with THREAD_LOCK:
+        WRITE_FUTURES.discard(future)
+
+
+def read_frame(frame_path: str) -> Optional[VisionFrame]:
+    with THREAD_LOCK:
+        vision_frame = IN_FLIGHT_FRAMES.get(frame_path)
+    # the pending write still owns the buffer, readers get their own copy
+    if vision_frame is not None:
+        return vision_frame.copy()
+    vision_frame = read_prefetched_frame(frame_path)
+    if vision_frame is not None:
+        return vision_frame
+    return read_image(frame_path)
+
+
+def flush_frames() -> bool:
+    with THREAD_LOCK:
+        write_futures = list(WRITE_FUTURES)
+    with trace_span('frame_writer.flush', 'io'):
+        wait(write_futures)
+    return all(future.result() for future in write_futures)
@@ -3,7 +3,7 @@ from typing import List, Optional
 
 from facefusion.typing import LogLevel, FaceSelectorMode, FaceAnalyserOrder, FaceAnalyserAge, FaceAnalyserGender, \
     FaceMaskType, OutputVideoEncoder, FaceDetectorModel, FaceRecognizerModel, TempFrameFormat, Padding, FaceMaskRegion, \
-    OutputVideoPreset, VideoMemoryStrategy
+    OutputVideoPreset, VideoMemoryStrategy, StreamSink, ProfileMode
 from facefusion.choices import face_mask_regions
 from modules.paths_internal import script_path
 
@@ -15,8 +15,12 @@ restricted_path: Optional[str] = None
 output_path: Optional[str] = os.path.join(script_path, "outputs", "facefusion")
 # misc
 skip_download: Optional[bool] = False
+model_mirror: Optional[str] = None
 headless: Optional[bool] = False
 log_level: Optional[LogLevel] = ['info']
+content_analyser_interval: Optional[float] = 1.0
+metrics: Optional[bool] = False
+profile_modes: Optional[List[ProfileMode]] = []
 # execution
 execution_providers: List[str] = ['CUDAExecutionProvider']
 
@@ -24,6 +28,26 @@ execution_thread_count: Optional[int] = 32
 execution_queue_count: Optional[int] = 2
 video_memory_strategy: Optional[VideoMemoryStrategy] = "tolerant"
 system_memory_limit: Optional[int] = None
+memory_profile: Optional[bool] = False
+model_memory_budget: Optional[int] = None
+# stream
+stream_latency_target: Optional[int] = 250
+stream_in_flight_limit: Optional[int] = None
+stream_source_path: Optional[str] = None
+stream_source_fps: Optional[float] = None
+stream_sink: Optional[StreamSink] = 'null'
+stream_sink_path: Optional[str] = None
+# benchmark
+benchmark: Optional[bool] = False
+benchmark_resolutions: Optional[List[int]] = [360, 720]
+benchmark_face_counts: Optional[List[int]] = [1]
+benchmark_frame_total: Optional[int] = 100
+benchmark_cycles: Optional[int] = 3
+benchmark_warmup_cycles: Optional[int] = 1
+benchmark_matrix: Optional[List[str]] = None
+benchmark_report_path: Optional[str] = None
+benchmark_baseline_path: Optional[str] = None
+benchmark_regression_tolerance: Optional[float] = 0.1
 # face analyser
 face_analyser_order: Optional[FaceAnalyserOrder] = 'best-worst'
 face_analyser_age: Optional[FaceAnalyserAge] = None
@@ -51,7 +75,11 @@ trim_frame_start: Optional[int] = None
 trim_frame_end: Optional[int] = None
 temp_frame_format: Optional[TempFrameFormat] = 'png'
 temp_frame_quality: Optional[int] = 100
+temp_frame_compression: Optional[int] = None
+temp_frame_calibration: Optional[bool] = False
 keep_temp: Optional[bool] = False
+temp_ram_path: Optional[str] = '/dev/shm'
+temp_ram_budget: Optional[int] = 0
 # output creation
 output_image_quality: Optional[int] = 60
 output_video_encoder: Optional[OutputVideoEncoder] = 'libx264'
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+from typing import List, Optional
+
+from facefusion import logger, wording
+from facefusion.typing import ImportTime
+
+HEAVY_MODULES = ['torch', 'torchvision', 'basicsr', 'realesrgan', 'transformers', 'yt_dlp', 'scipy', 'gradio']
+
+
+def profile_imports(module_name: str) -> Optional[List[ImportTime]]:
+    commands = [sys.executable, '-X', 'importtime', '-c', 'import ' + module_name]
+    process = subprocess.run(commands, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # a failed import stops early and would look like a fast one without heavy modules
+    if process.returncode != 0:
+        return None
+    import_times = []
+    for line in process.stderr.decode(errors='ignore').splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative_time, import_name = line[len('import time:'):].split('|')
+        import_times.append(
+            {
+                'module': import_name.strip(),
+                'self': int(self_time) / 1000000,
+                'cumulative': int(cumulative_time) / 1000000
+            })
+    return sorted(import_times, key=lambda import_time: import_time.get('cumulative'), reverse=True)
+
+
+def get_import_time(module_name: str) -> Optional[float]:
+    for import_time in profile_imports(module_name) or []:
+        if import_time.get('module') == module_name:
+            return import_time.get('cumulative')
+    return None
+
+
+def find_heavy_imports(module_name: str) -> Optional[List[str]]:
+    import_times = profile_imports(module_name)
+    if import_times is None:
+        return None
+    import_names = [import_time.get('module') for import_time in import_times]
+    return [heavy_module for heavy_module in HEAVY_MODULES if heavy_module in import_names]
+
+
+def log_import_times(module_name: str, limit: int = 20) -> None:
+    import_times = profile_imports(module_name)
+    if import_times is None:
+        logger.error(wording.get('profiling_imports_failed').format(module_name=module_name), __name__.upper())
+        return
+    for import_time in import_times[:limit]:
+        logger.info(import_time.get('module') + ' ' + str(round(import_time.get('cumulative'), 3)) + 's (self ' +
+                    str(round(import_time.get('self'), 3)) + 's)', __name__.upper())
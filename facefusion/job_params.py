@@ -7,7 +7,7 @@ from facefusion.memory import tune_performance
 from facefusion.typing import (
     FaceAnalyserOrder, FaceAnalyserAge,
     FaceAnalyserGender, TempFrameFormat, OutputVideoEncoder, FaceSelectorMode, FaceDetectorModel, FaceRecognizerModel,
-    Padding, FaceMaskType, FaceMaskRegion, LogLevel, OutputVideoPreset
+    Padding, FaceMaskType, FaceMaskRegion, LogLevel, OutputVideoPreset, TempFrameCodec
 )
 from facefusion.choices import face_mask_regions
 from modules.paths_internal import script_path
@@ -60,6 +60,9 @@ class JobParams:
         self.trim_frame_end: Optional[int] = None
         self.temp_frame_format: Optional[TempFrameFormat] = 'png'
         self.temp_frame_quality: Optional[int] = 60
+        self.temp_frame_compression: Optional[int] = None
+        self.temp_frame_calibration: Optional[bool] = False
+        self.temp_frame_codec: Optional[TempFrameCodec] = None
         self.keep_temp: Optional[bool] = False
         # output creation
         self.output_image_quality: Optional[int] = 60
@@ -1,6 +1,5 @@
 import platform
 
-import torch
 from facefusion import globals
 
 if platform.system().lower() == 'windows':
@@ -24,7 +23,25 @@ def limit_system_memory(system_memory_limit: int = 1) -> bool:
         return False
 
 
+def get_process_memory() -> int:
+    if platform.system().lower() == 'linux':
+        try:
+            with open('/proc/self/statm', 'r') as statm_file:
+                return int(statm_file.read().split()[1]) * resource.getpagesize()
+        except (OSError, ValueError, IndexError):
+            pass
+    if platform.system().lower() == 'windows':
+        return 0
+    # ru_maxrss is reported in kilobytes on linux and in bytes on darwin
+    if platform.system().lower() == 'darwin':
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
 def get_total_vram():
+    # torch takes seconds to import, only pay for it when tuning
+    import torch
+
     if torch.cuda.is_available():
         total_memory = torch.cuda.get_device_properties(0).total_memory
         return total_memory / (1024 ** 2)  # Convert bytes to MB
@@ -0,0 +1,136 @@
+import glob
+import os
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import numpy
+
+import facefusion.globals
+from facefusion.filesystem import TEMP_DIRECTORY_PATH, get_ram_workspace_directory_path
+from facefusion.memory import get_process_memory
+from facefusion.typing import MemorySnapshot
+
+MEMORY_CACHES = \
+    {
+        'read_static_image': ('facefusion.vision', 'read_static_image'),
+        'read_static_audio': ('facefusion.audio', 'read_static_audio'),
+        'analyse_video': ('facefusion.content_analyser', 'analyse_video')
+    }
+MEMORY_REPORT: Dict[str, Any] = \
+    {
+        'job': None,
+        'stages': {},
+        'models': {}
+    }
+THREAD_LOCK: threading.Lock = threading.Lock()
+
+
+def start_job_memory(job_id: Any) -> None:
+    if facefusion.globals.memory_profile and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    with THREAD_LOCK:
+        MEMORY_REPORT['job'] = str(job_id)
+        MEMORY_REPORT['stages'] = {}
+
+
+def take_memory_snapshot() -> Optional[MemorySnapshot]:
+    if not facefusion.globals.memory_profile:
+        return None
+    allocated_memory, _ = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    return\
+        {
+            'rss': get_process_memory(),
+            'allocated': allocated_memory,
+            'device': get_device_memory()
+        }
+
+
+def record_memory(name: str, category: str, memory_snapshot: Optional[MemorySnapshot]) -> None:
+    current_snapshot = take_memory_snapshot()
+    if memory_snapshot and current_snapshot:
+        memory_delta = {key: current_snapshot[key] - memory_snapshot[key] for key in current_snapshot}
+        memory_delta['rss_after'] = current_snapshot.get('rss')
+        with THREAD_LOCK:
+            MEMORY_REPORT[category][name] = memory_delta
+
+
+@contextmanager
+def track_memory(name: str, category: str) -> Iterator[None]:
+    memory_snapshot = take_memory_snapshot()
+    try:
+        yield
+    finally:
+        record_memory(name, category, memory_snapshot)
+
+
+def get_device_memory() -> int:
+    # only report torch when a processor has imported it already
+    torch = sys.modules.get('torch')
+    if torch and torch.cuda.is_available():
+        return torch.cuda.memory_allocated()
+    return 0
+
+
+def measure_face_store() -> Dict[str, int]:
+    from facefusion.face_store import FACE_STORE, FACE_STORE_2
+
+    face_total = 0
+    face_bytes = 0
+    for face_store in [FACE_STORE, FACE_STORE_2]:
+        for faces in list(face_store.get('static_faces').values()) + list(face_store.get('reference_faces').values()):
+            for face in faces or []:
+                face_total += 1
+                face_bytes += sum(value.nbytes for value in face if isinstance(value, numpy.ndarray))
+                face_bytes += sum(value.nbytes for value in (face.landmark or {}).values() if
+                                  isinstance(value, numpy.ndarray))
+    return\
+        {
+            'faces': face_total,
+            'bytes': face_bytes
+        }
+
+
+def measure_caches() -> Dict[str, Dict[str, Optional[int]]]:
+    # lru_cache keeps its entries private, the caches are reported as entry counts rather than bytes
+    memory_caches = {}
+    for cache_name, (module_name, function_name) in MEMORY_CACHES.items():
+        module = sys.modules.get(module_name)
+        function = getattr(module, function_name, None)
+        if function and hasattr(function, 'cache_info'):
+            cache_info = function.cache_info()
+            memory_caches[cache_name] =\
+                {
+                    'entry_count': cache_info.currsize,
+                    'entry_limit': cache_info.maxsize,
+                    'hits': cache_info.hits,
+                    'misses': cache_info.misses
+                }
+    return memory_caches
+
+
+def measure_temp_bytes() -> int:
+    temp_bytes = 0
+    for temp_directory_path in filter(None, [TEMP_DIRECTORY_PATH, get_ram_workspace_directory_path()]):
+        for temp_path in glob.glob(os.path.join(temp_directory_path, '**', '*'), recursive=True):
+            if os.path.isfile(temp_path) and not os.path.islink(temp_path):
+                temp_bytes += os.path.getsize(temp_path)
+    return temp_bytes
+
+
+def get_memory_report() -> Dict[str, Any]:
+    with THREAD_LOCK:
+        memory_report =\
+            {
+                'job': MEMORY_REPORT.get('job'),
+                'stages': MEMORY_REPORT.get('stages').copy(),
+                'models': MEMORY_REPORT.get('models').copy()
+            }
+    memory_report['rss'] = get_process_memory()
+    memory_report['device'] = get_device_memory()
+    memory_report['face_store'] = measure_face_store()
+    memory_report['caches'] = measure_caches()
+    memory_report['temp_bytes'] = measure_temp_bytes()
+    return memory_report
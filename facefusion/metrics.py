@@ -0,0 +1,101 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional
+
+import facefusion.globals
+from facefusion.profiler import is_tracing, add_trace_event
+from facefusion.typing import Metric
+
+METRIC_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+METRICS: Dict[str, Metric] = {}
+COUNTERS: Dict[str, int] = {}
+METRICS_JOB: Optional[str] = None
+THREAD_LOCK: threading.Lock = threading.Lock()
+
+
+def timed(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not facefusion.globals.metrics and not is_tracing():
+                return function(*args, **kwargs)
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                end_time = time.perf_counter()
+                if facefusion.globals.metrics:
+                    record_timing(name, end_time - start_time)
+                add_trace_event(name, 'stage', start_time, end_time)
+        return wrapper
+    return decorator
+
+
+def record_timing(name: str, duration: float) -> None:
+    with THREAD_LOCK:
+        metric = METRICS.get(name)
+        if metric is None:
+            metric = METRICS[name] =\
+                {
+                    'count': 0,
+                    'total': 0.0,
+                    'min': duration,
+                    'max': duration,
+                    'buckets': [0] * (len(METRIC_BUCKETS) + 1)
+                }
+        metric['count'] += 1
+        metric['total'] += duration
+        metric['min'] = min(metric['min'], duration)
+        metric['max'] = max(metric['max'], duration)
+        metric['buckets'][bisect_left(METRIC_BUCKETS, duration)] += 1
+
+
+def increment_counter(name: str, amount: int = 1) -> None:
+    if facefusion.globals.metrics:
+        with THREAD_LOCK:
+            COUNTERS[name] = COUNTERS.get(name, 0) + amount
+
+
+def start_job_metrics(job_id: Any) -> None:
+    global METRICS_JOB
+
+    with THREAD_LOCK:
+        METRICS.clear()
+        COUNTERS.clear()
+        METRICS_JOB = str(job_id)
+
+
+def get_metrics() -> Dict[str, Any]:
+    with THREAD_LOCK:
+        return\
+            {
+                'job': METRICS_JOB,
+                'enabled': bool(facefusion.globals.metrics),
+                'buckets': METRIC_BUCKETS,
+                'timers': {name: {**metric, 'buckets': metric['buckets'].copy()} for name, metric in METRICS.items()},
+                'counters': COUNTERS.copy()
+            }
+
+
+def export_prometheus_metrics() -> str:
+    metrics = get_metrics()
+    lines: List[str] =\
+        [
+            '# HELP facefusion_stage_seconds Time spent per pipeline stage of the current job',
+            '# TYPE facefusion_stage_seconds histogram'
+        ]
+    for name, metric in metrics.get('timers').items():
+        bucket_total = 0
+        for bucket, bucket_count in zip(METRIC_BUCKETS + ['+Inf'], metric.get('buckets')):
+            bucket_total += bucket_count
+            lines.append('facefusion_stage_seconds_bucket{stage="' + name + '",le="' + str(bucket) + '"} ' +
+                         str(bucket_total))
+        lines.append('facefusion_stage_seconds_sum{stage="' + name + '"} ' + str(metric.get('total')))
+        lines.append('facefusion_stage_seconds_count{stage="' + name + '"} ' + str(metric.get('count')))
+    lines.append('# HELP facefusion_events_total Events counted during the current job')
+    lines.append('# TYPE facefusion_events_total counter')
+    for name, count in metrics.get('counters').items():
+        lines.append('facefusion_events_total{name="' + name + '"} ' + str(count))
+    return '\n'.join(lines) + '\n'
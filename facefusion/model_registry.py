@@ -0,0 +1,131 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+import facefusion.globals
+from facefusion import logger, wording
+from facefusion.memory_profiler import track_memory
+from facefusion.profiler import trace_lock
+from facefusion.typing import ModelEntry
+
+MODEL_REGISTRY: 'OrderedDict[str, ModelEntry]' = OrderedDict()
+MODEL_LOCKS: Dict[str, threading.Lock] = {}
+MODEL_HOLDS: List[Set[str]] = []
+MODEL_MEMORY_BUDGETS = \
+    {
+        'strict': 0,
+        'moderate': 4096,
+        'tolerant': None
+    }
+THREAD_LOCK: threading.Lock = threading.Lock()
+
+
+def create_model_key(model_name: str, model_path: str) -> str:
+    return model_name + '|' + model_path + '|' + ','.join(map(str, facefusion.globals.execution_providers))
+
+
+def get_model(model_name: str, model_path: str, create_model: Callable[[], Any]) -> Any:
+    model_key = create_model_key(model_name, model_path)
+
+    with trace_lock(THREAD_LOCK, 'model_registry.lock'):
+        model_entry = MODEL_REGISTRY.get(model_key)
+        if model_entry:
+            MODEL_REGISTRY.move_to_end(model_key)
+            hold_model(model_entry)
+            return model_entry.get('model')
+        model_lock = MODEL_LOCKS.setdefault(model_key, threading.Lock())
+
+    # load outside the registry lock so different models can be created concurrently
+    with trace_lock(model_lock, model_name + '.lock'):
+        with THREAD_LOCK:
+            model_entry = MODEL_REGISTRY.get(model_key)
+        if model_entry is None:
+            with track_memory(model_name, 'models'):
+                model = create_model()
+            model_entry =\
+                {
+                    'key': model_key,
+                    'name': model_name,
+                    'path': model_path,
+                    'model': model,
+                    'size': os.path.getsize(model_path) if os.path.isfile(model_path) else 0,
+                    'references': 0
+                }
+            with THREAD_LOCK:
+                MODEL_REGISTRY[model_key] = model_entry
+                hold_model(model_entry)
+    return model_entry.get('model')
+
+
+def hold_model(model_entry: ModelEntry) -> None:
+    for model_hold in MODEL_HOLDS:
+        if model_entry.get('key') not in model_hold:
+            model_hold.add(model_entry.get('key'))
+            model_entry['references'] += 1
+
+
+@contextmanager
+def hold_models() -> Iterator[None]:
+    model_hold: Set[str] = set()
+    with THREAD_LOCK:
+        MODEL_HOLDS.append(model_hold)
+    try:
+        yield
+    finally:
+        with THREAD_LOCK:
+            MODEL_HOLDS.remove(model_hold)
+            for model_key in model_hold:
+                if model_key in MODEL_REGISTRY:
+                    MODEL_REGISTRY[model_key]['references'] = max(0, MODEL_REGISTRY[model_key]['references'] - 1)
+        enforce_model_budget()
+
+
+def get_model_memory_budget() -> Optional[int]:
+    if facefusion.globals.model_memory_budget is not None:
+        return facefusion.globals.model_memory_budget * 1024 ** 2
+    model_memory_budget = MODEL_MEMORY_BUDGETS.get(facefusion.globals.video_memory_strategy)
+    if model_memory_budget is not None:
+        return model_memory_budget * 1024 ** 2
+    return None
+
+
+def enforce_model_budget() -> None:
+    model_memory_budget = get_model_memory_budget()
+    if model_memory_budget is None:
+        return
+    with THREAD_LOCK:
+        model_memory = sum(model_entry.get('size') for model_entry in MODEL_REGISTRY.values())
+        for model_key, model_entry in list(MODEL_REGISTRY.items()):
+            if model_memory <= model_memory_budget:
+                break
+            if model_entry.get('references') == 0:
+                del MODEL_REGISTRY[model_key]
+                model_memory -= model_entry.get('size')
+                logger.debug(wording.get('model_evicted').format(model_name=model_entry.get('name')), __name__.upper())
+
+
+def clear_model(model_name: str) -> None:
+    with THREAD_LOCK:
+        for model_key, model_entry in list(MODEL_REGISTRY.items()):
+            if model_entry.get('name') == model_name:
+                del MODEL_REGISTRY[model_key]
+
+
+def clear_models() -> None:
+    with THREAD_LOCK:
+        MODEL_REGISTRY.clear()
+
+
+def get_model_registry() -> List[Dict[str, Any]]:
+    with THREAD_LOCK:
+        return\
+            [
+                {
+                    'name': model_entry.get('name'),
+                    'path': model_entry.get('path'),
+                    'size': model_entry.get('size'),
+                    'references': model_entry.get('references')
+                } for model_entry in MODEL_REGISTRY.values()
+            ]
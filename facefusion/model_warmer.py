@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy
+
+from facefusion import logger, wording
+from facefusion.content_analyser import get_content_analyser
+from facefusion.face_analyser import get_face_detector, get_face_recognizer, get_face_landmarker, get_gender_age
+from facefusion.face_masker import get_face_occluder, get_face_parser
+from facefusion.model_registry import get_model_memory_budget
+from facefusion.processors.frame.core import load_frame_processor_module
+from facefusion.profiler import trace_span
+from facefusion.typing import FaceMaskType
+
+WARM_UP_DIMENSIONS = 256
+INFERENCE_TYPES = \
+    {
+        'tensor(float)': numpy.float32,
+        'tensor(float16)': numpy.float16,
+        'tensor(double)': numpy.float64,
+        'tensor(int32)': numpy.int32,
+        'tensor(int64)': numpy.int64,
+        'tensor(uint8)': numpy.uint8
+    }
+THREAD_LOCK: threading.Lock = threading.Lock()
+
+
+def get_model_loaders(frame_processors: List[str], face_mask_types: List[FaceMaskType]) -> List[Callable[[], Any]]:
+    model_loaders = [get_face_detector, get_face_recognizer, get_face_landmarker, get_gender_age, get_content_analyser]
+    if 'occlusion' in face_mask_types:
+        model_loaders.append(get_face_occluder)
+    if 'region' in face_mask_types:
+        model_loaders.append(get_face_parser)
+    for frame_processor in frame_processors:
+        frame_processor_module = load_frame_processor_module(frame_processor)
+        model_loaders.append(frame_processor_module.get_frame_processor)
+        if hasattr(frame_processor_module, 'get_model_matrix') and \
+                frame_processor_module.get_options('model').get('type') == 'inswapper':
+            model_loaders.append(frame_processor_module.get_model_matrix)
+    return model_loaders
+
+
+def create_dummy_inputs(model: Any) -> Dict[str, numpy.ndarray]:
+    dummy_inputs = {}
+    for model_input in model.get_inputs():
+        input_shape = [dimension if isinstance(dimension, int) else (1 if index == 0 else WARM_UP_DIMENSIONS) for
+                       index, dimension in enumerate(model_input.shape)]
+        dummy_inputs[model_input.name] = numpy.zeros(input_shape, INFERENCE_TYPES.get(model_input.type, numpy.float32))
+    return dummy_inputs
+
+
+def run_dummy_inference(model: Any) -> None:
+    # the first run allocates the arena and selects the kernels of a provider
+    if hasattr(model, 'get_inputs') and hasattr(model, 'run'):
+        model.run(None, create_dummy_inputs(model))
+    elif hasattr(model, 'enhance'):
+        model.enhance(numpy.zeros((WARM_UP_DIMENSIONS // 4, WARM_UP_DIMENSIONS // 4, 3), numpy.uint8))
+
+
+def warm_up_model(model_loader: Callable[[], Any]) -> None:
+    model_name = model_loader.__module__.split('.')[-1] + '.' + model_loader.__name__
+    try:
+        with trace_span('warm_up.' + model_name, 'warm_up'):
+            model = model_loader()
+            if model is not None:
+                run_dummy_inference(model)
+    except Exception as exception:
+        logger.debug(wording.get('warm_up_failed').format(model_name=model_name, exception=exception), __name__.upper())
+
+
+def warm_up_models(frame_processors: List[str], face_mask_types: List[FaceMaskType]) -> None:
+    start_time = time.perf_counter()
+    model_loaders = get_model_loaders(frame_processors, face_mask_types)
+    with THREAD_LOCK:
+        with ThreadPoolExecutor(max_workers=len(model_loaders)) as executor:
+            list(executor.map(warm_up_model, model_loaders))
+    logger.debug(wording.get('warm_up_done').format(model_total=len(model_loaders),
+                                                    seconds=round(time.perf_counter() - start_time, 2)),
+                 __name__.upper())
+
+
+def warm_up_models_async(frame_processors: List[str], face_mask_types: List[FaceMaskType]) -> Optional[threading.Thread]:
+    # nothing holds the sessions outside a job, without a model budget they would sit idle until the next eviction
+    if get_model_memory_budget() == 0:
+        return None
+    warm_up_thread = threading.Thread(target=warm_up_models, args=(list(frame_processors), list(face_mask_types)),
+                                      name='warm_up', daemon=True)
+    warm_up_thread.start()
+    return warm_up_thread
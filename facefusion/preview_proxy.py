@@ -0,0 +1,96 @@
+import glob
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional
+
+from facefusion import logger, wording
+from facefusion.ffmpeg import run_ffmpeg
+from facefusion.filesystem import is_video, output_dir
+from facefusion.typing import PreviewProxy, VisionFrame
+from facefusion.vision import get_video_frame, count_video_frame_total
+
+PREVIEW_PROXY_DIRECTORY_PATH = os.path.join(output_dir, 'facefusion', 'proxy')
+PREVIEW_PROXY_SIZE = 640
+PREVIEW_PROXY_LIMIT = 8
+PREVIEW_PROXIES: Dict[str, PreviewProxy] = {}
+PREVIEW_PROXY_BUILDS: List[str] = []
+THREAD_LOCK: threading.Lock = threading.Lock()
+
+
+def create_preview_proxy(video_path: str) -> None:
+    if not is_video(video_path):
+        return
+    video_path = os.path.abspath(video_path)
+    with THREAD_LOCK:
+        if video_path in PREVIEW_PROXIES or video_path in PREVIEW_PROXY_BUILDS:
+            return
+        PREVIEW_PROXY_BUILDS.append(video_path)
+    threading.Thread(target=build_preview_proxy, args=(video_path,), daemon=True).start()
+
+
+def build_preview_proxy(video_path: str) -> None:
+    proxy_path = get_preview_proxy_path(video_path)
+    try:
+        if not is_video(proxy_path):
+            os.makedirs(PREVIEW_PROXY_DIRECTORY_PATH, exist_ok=True)
+            temp_proxy_path = proxy_path + '.tmp'
+            scale = 'scale=' + str(PREVIEW_PROXY_SIZE) + ':' + str(PREVIEW_PROXY_SIZE) + \
+                    ':force_original_aspect_ratio=decrease:force_divisible_by=2'
+            commands = ['-i', video_path, '-an', '-vf', scale, '-c:v', 'mjpeg', '-q:v', '3', '-vsync', '0', '-f', 'avi',
+                        '-y', temp_proxy_path]
+            if not run_ffmpeg(commands):
+                logger.debug(wording.get('preview_proxy_not_created').format(video_path=video_path), __name__.upper())
+                return
+            os.replace(temp_proxy_path, proxy_path)
+            prune_preview_proxies()
+        with THREAD_LOCK:
+            PREVIEW_PROXIES[video_path] =\
+                {
+                    'proxy_path': proxy_path,
+                    'frame_map': create_frame_map(video_path, proxy_path)
+                }
+    finally:
+        with THREAD_LOCK:
+            PREVIEW_PROXY_BUILDS.remove(video_path)
+
+
+def create_frame_map(video_path: str, proxy_path: str) -> List[int]:
+    video_frame_total = count_video_frame_total(video_path)
+    proxy_frame_total = count_video_frame_total(proxy_path)
+    if video_frame_total == proxy_frame_total or not video_frame_total:
+        return list(range(proxy_frame_total + 1))
+    return [round(frame_number * proxy_frame_total / video_frame_total) for frame_number in
+            range(video_frame_total + 1)]
+
+
+def get_preview_proxy_path(video_path: str) -> str:
+    video_stat = os.stat(video_path)
+    video_key = video_path + str(video_stat.st_mtime) + str(video_stat.st_size)
+    video_hash = hashlib.sha1(video_key.encode('utf-8')).hexdigest()
+    return os.path.join(PREVIEW_PROXY_DIRECTORY_PATH, video_hash + '.avi')
+
+
+def get_preview_frame(video_path: str, frame_number: int = 0) -> Optional[VisionFrame]:
+    with THREAD_LOCK:
+        preview_proxy = PREVIEW_PROXIES.get(os.path.abspath(video_path)) if video_path else None
+    if preview_proxy and is_video(preview_proxy['proxy_path']):
+        frame_map = preview_proxy['frame_map']
+        proxy_frame_number = frame_map[max(0, min(frame_number, len(frame_map) - 1))]
+        proxy_frame = get_video_frame(preview_proxy['proxy_path'], proxy_frame_number)
+        if proxy_frame is not None:
+            return proxy_frame
+    return get_video_frame(video_path, frame_number)
+
+
+def prune_preview_proxies() -> None:
+    proxy_paths = sorted(glob.glob(os.path.join(PREVIEW_PROXY_DIRECTORY_PATH, '*.avi')), key=os.path.getmtime)
+    for proxy_path in proxy_paths[:-PREVIEW_PROXY_LIMIT]:
+        with THREAD_LOCK:
+            if any(preview_proxy['proxy_path'] == proxy_path for preview_proxy in PREVIEW_PROXIES.values()):
+                continue
+        # another build may prune the same proxy, a proxy still in use stays until the next prune
+        try:
+            os.remove(proxy_path)
+        except OSError:
+            pass
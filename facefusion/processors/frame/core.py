@@ -1,18 +1,28 @@
 import importlib
 import os
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from queue import Queue
 from types import ModuleType
-from typing import Any, List
+from typing import Any, List, Optional
 
 import facefusion.globals
 from facefusion import logger, wording
 from facefusion.execution_helper import encode_execution_providers
+from facefusion.face_store import get_face_presence
 from facefusion.ff_status import FFStatus
+from facefusion.frame_prefetcher import prefetch_frames
+from facefusion.frame_writer import flush_frames
+from facefusion.metrics import increment_counter
+from facefusion.profiler import trace_span, add_trace_event
 from facefusion.mytqdm import mytqdm as tqdm
 from facefusion.typing import Process_Frames, QueuePayload
+from facefusion.vision import read_image
 
 FRAME_PROCESSORS_MODULES: List[ModuleType] = []
+FRAME_LATENCIES: List[float] = []
+THREAD_LOCK: threading.Lock = threading.Lock()
 FRAME_PROCESSORS_METHODS = \
     [
         'get_frame_processor',
@@ -77,10 +87,17 @@ def clear_frame_processors_modules() -> None:
     FRAME_PROCESSORS_MODULES = []
 
 
-def multi_process_frames(source_paths: List[str], source_paths_2: List[str], temp_frame_paths: List[str], process_frames: Process_Frames) -> None:
-    queue_payloads = create_queue_payloads(temp_frame_paths)
-    with tqdm(total=len(queue_payloads), desc=wording.get('processing'), unit='frame', ascii=' =',
+def multi_process_frames(source_paths: List[str], source_paths_2: List[str], temp_frame_paths: List[str], process_frames: Process_Frames, face_presence_key: Optional[str] = None) -> bool:
+    queue_payloads = create_queue_payloads(temp_frame_paths, face_presence_key)
+    frame_total = len(queue_payloads)
+    # frames an earlier face processor left untouched are neither read nor written again
+    if face_presence_key:
+        queue_payloads = [queue_payload for queue_payload in queue_payloads if
+                          get_face_presence(face_presence_key, queue_payload.get('frame_number')) is not False]
+        increment_counter('frames_skipped', frame_total - len(queue_payloads))
+    with tqdm(total=frame_total, desc=wording.get('processing'), unit='frame', ascii=' =',
               disable=facefusion.globals.log_level in ['warn', 'error']) as progress:
+        progress.update(frame_total - len(queue_payloads))
         progress.set_postfix(
             {
                 'execution_providers': encode_execution_providers(facefusion.globals.execution_providers),
@@ -88,8 +105,21 @@ def multi_process_frames(source_paths: List[str], source_paths_2: List[str], tem
                 'execution_queue_count': facefusion.globals.execution_queue_count
             })
         status = FFStatus()
+        frame_timer = threading.local()
+
+        def run_process_frames(queue_payloads: List[QueuePayload]) -> None:
+            frame_timer.start_time = time.perf_counter()
+            frame_paths = [queue_payload.get('frame_path') for queue_payload in queue_payloads]
+            with trace_span('process_frames', 'worker'), prefetch_frames(frame_paths, read_image):
+                process_frames(source_paths, source_paths_2, queue_payloads, update_progress)
 
         def update_progress(preview_image=None) -> None:
+            current_time = time.perf_counter()
+            with THREAD_LOCK:
+                FRAME_LATENCIES.append(current_time - frame_timer.start_time)
+            add_trace_event('frame', 'worker', frame_timer.start_time, current_time)
+            frame_timer.start_time = current_time
+            increment_counter('frames')
             progress.update()
             if preview_image is not None:
                 current_step = status.job_current
@@ -103,11 +133,25 @@ def multi_process_frames(source_paths: List[str], source_paths_2: List[str], tem
                 len(queue_payloads) // facefusion.globals.execution_thread_count * facefusion.globals.execution_queue_count,
                 1)
             while not queue.empty():
-                future = executor.submit(process_frames, source_paths, source_paths_2, pick_queue(queue, queue_per_future),
-                                         update_progress)
+                future = executor.submit(run_process_frames, pick_queue(queue, queue_per_future))
                 futures.append(future)
             for future_done in as_completed(futures):
                 future_done.result()
+        # the next processor and the merge read the frames from disk
+        if not flush_frames():
+            logger.error(wording.get('writing_frames_failed'), __name__.upper())
+            return False
+    return True
+
+
+def get_frame_latencies() -> List[float]:
+    with THREAD_LOCK:
+        return FRAME_LATENCIES.copy()
+
+
+def clear_frame_latencies() -> None:
+    with THREAD_LOCK:
+        FRAME_LATENCIES.clear()
 
 
 def create_queue(queue_payloads: List[QueuePayload]) -> Queue[QueuePayload]:
@@ -125,7 +169,7 @@ def pick_queue(queue: Queue[QueuePayload], queue_per_future: int) -> List[QueueP
     return queues
 
 
-def create_queue_payloads(temp_frame_paths: List[str]) -> List[QueuePayload]:
+def create_queue_payloads(temp_frame_paths: List[str], face_presence_key: Optional[str] = None) -> List[QueuePayload]:
     queue_payloads = []
     temp_frame_paths = sorted(temp_frame_paths, key=os.path.basename)
 
@@ -134,7 +178,8 @@ def create_queue_payloads(temp_frame_paths: List[str]) -> List[QueuePayload]:
         frame_payload: QueuePayload = \
             {
                 'frame_number': frame_number,
-                'frame_path': frame_path
+                'frame_path': frame_path,
+                'face_presence_key': face_presence_key
             }
         queue_payloads.append(frame_payload)
     return queue_payloads
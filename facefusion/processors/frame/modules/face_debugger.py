@@ -7,15 +7,15 @@ import numpy
 import facefusion.globals
 import facefusion.processors.frame.core as frame_processors
 from facefusion import config, wording
-from facefusion.face_analyser import get_one_face, get_many_faces, find_similar_faces, clear_face_analyser
-from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, create_region_mask, \
-    clear_face_occluder, clear_face_parser
+from facefusion.face_analyser import get_one_face, get_many_faces, find_similar_faces, detect_face_presence
+from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, create_region_mask
 from facefusion.face_helper import warp_face_by_face_landmark_5, categorize_age, categorize_gender
-from facefusion.face_store import get_reference_faces
-from facefusion.content_analyser import clear_content_analyser
+from facefusion.face_store import get_reference_faces, get_face_presence_key
+from facefusion.model_registry import enforce_model_budget
 from facefusion.processors.frame.modules.face_swapper import update_padding
 from facefusion.typing import Face, VisionFrame, Update_Process, ProcessMode, QueuePayload
-from facefusion.vision import read_image, read_static_image, write_image
+from facefusion.frame_writer import read_frame, write_frame
+from facefusion.vision import read_static_image, write_image
 from facefusion.processors.frame.typings import FaceDebuggerInputs
 from facefusion.processors.frame import globals as frame_processors_globals, choices as frame_processors_choices
 
@@ -64,13 +64,7 @@ def pre_process(mode: ProcessMode) -> bool:
 
 def post_process() -> None:
     read_static_image.cache_clear()
-    if facefusion.globals.video_memory_strategy == 'strict' or facefusion.globals.video_memory_strategy == 'moderate':
-        clear_frame_processor()
-    if facefusion.globals.video_memory_strategy == 'strict':
-        clear_face_analyser()
-        clear_content_analyser()
-        clear_face_occluder()
-        clear_face_parser()
+    enforce_model_budget()
 
 
 def debug_face(target_face: Face, temp_vision_frame: VisionFrame, frame_number=-1) -> VisionFrame:
@@ -150,22 +144,23 @@ def process_frame(inputs: FaceDebuggerInputs) -> VisionFrame:
     target_vision_frame = inputs['target_vision_frame']
     source_frame = inputs.get('source_frame', target_vision_frame)
     target_frame_number = inputs['target_frame_number']
+    face_detector_size = inputs.get('face_detector_size')
 
     if 'reference' in facefusion.globals.face_selector_mode:
         for ref_faces in [reference_faces, reference_faces_2]:
             similar_faces = find_similar_faces(ref_faces, source_frame,
-                                               facefusion.globals.reference_face_distance)
+                                               facefusion.globals.reference_face_distance, face_detector_size)
             if similar_faces:
                 for similar_face in similar_faces:
                     target_vision_frame = debug_face(similar_face, target_vision_frame, target_frame_number)
         else:
             print("No similar face found in the reference frame")
     if 'one' in facefusion.globals.face_selector_mode:
-        target_face = get_one_face(source_frame)
+        target_face = get_one_face(source_frame, face_detector_size=face_detector_size)
         if target_face:
             target_vision_frame = debug_face(target_face, target_vision_frame, target_frame_number)
     if 'many' in facefusion.globals.face_selector_mode:
-        many_faces = get_many_faces(source_frame)
+        many_faces = get_many_faces(source_frame, face_detector_size)
         if many_faces:
             for target_face in many_faces:
                 target_vision_frame = debug_face(target_face, target_vision_frame, target_frame_number)
@@ -178,7 +173,11 @@ def process_frames(source_paths: List[str], source_paths_2: List[str], queue_pay
 
     for queue_payload in queue_payloads:
         target_vision_path = queue_payload['frame_path']
-        target_vision_frame = read_image(target_vision_path)
+        target_vision_frame = read_frame(target_vision_path)
+        if not detect_face_presence(queue_payload['face_presence_key'], queue_payload['frame_number'],
+                                    target_vision_frame, reference_faces, reference_faces_2):
+            update_progress(target_vision_path)
+            continue
         result_frame = process_frame(
             {
                 'reference_faces': reference_faces,
@@ -186,7 +185,7 @@ def process_frames(source_paths: List[str], source_paths_2: List[str], queue_pay
                 'target_vision_frame': target_vision_frame,
                 'target_frame_number': queue_payload['frame_number']
             })
-        write_image(target_vision_path, result_frame)
+        write_frame(target_vision_path, result_frame)
         update_progress(target_vision_path)
 
 
@@ -201,5 +200,6 @@ def process_image(source_paths: List[str], source_paths_2: List[str], target_pat
     write_image(output_path, result_frame)
 
 
-def process_video(source_paths: List[str], source_paths_2: List[str], temp_frame_paths: List[str]) -> None:
-    frame_processors.multi_process_frames(source_paths, source_paths_2, temp_frame_paths, process_frames)
+def process_video(source_paths: List[str], source_paths_2: List[str], temp_frame_paths: List[str]) -> bool:
+    return frame_processors.multi_process_frames(source_paths, source_paths_2, temp_frame_paths, process_frames,
+                                                 face_presence_key=get_face_presence_key(temp_frame_paths))
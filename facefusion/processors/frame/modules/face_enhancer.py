@@ -8,24 +8,25 @@ import onnxruntime
 import facefusion.globals
 import facefusion.processors.frame.core as frame_processors
 from facefusion import config, logger, wording
-from facefusion.face_analyser import get_many_faces, clear_face_analyser, find_similar_faces, get_one_face
-from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, clear_face_occluder
+from facefusion.face_analyser import get_many_faces, find_similar_faces, get_one_face, detect_face_presence
+from facefusion.face_masker import create_static_box_mask, create_occlusion_mask
 from facefusion.face_helper import warp_face_by_face_landmark_5, paste_back
 from facefusion.execution_helper import apply_execution_provider_options
-from facefusion.content_analyser import clear_content_analyser
-from facefusion.face_store import get_reference_faces
+from facefusion.face_store import get_reference_faces, get_face_presence_key
 from facefusion.typing import Face, VisionFrame, Update_Process, ProcessMode, ModelSet, OptionsWithModel, QueuePayload
 from facefusion.common_helper import create_metavar
 from facefusion.filesystem import is_file, is_image, is_video, resolve_relative_path
 from facefusion.download import conditional_download, is_download_done
-from facefusion.vision import read_image, read_static_image, write_image
+from facefusion.metrics import timed
+from facefusion.profiler import trace_lock
+from facefusion.model_registry import get_model, clear_model, enforce_model_budget
+from facefusion.frame_writer import read_frame, write_frame
+from facefusion.vision import read_static_image, write_image
 from facefusion.processors.frame.typings import FaceEnhancerInputs
 from facefusion.processors.frame import globals as frame_processors_globals
 from facefusion.processors.frame import choices as frame_processors_choices
 
-FRAME_PROCESSOR = None
 THREAD_SEMAPHORE: threading.Semaphore = threading.Semaphore()
-THREAD_LOCK: threading.Lock = threading.Lock()
 NAME = __name__.upper()
 MODELS: ModelSet = \
     {
@@ -83,20 +84,13 @@ OPTIONS: Optional[OptionsWithModel] = None
 
 
 def get_frame_processor() -> Any:
-    global FRAME_PROCESSOR
-
-    with THREAD_LOCK:
-        if FRAME_PROCESSOR is None:
-            model_path = get_options('model').get('path')
-            FRAME_PROCESSOR = onnxruntime.InferenceSession(model_path, providers=apply_execution_provider_options(
-                facefusion.globals.execution_providers))
-    return FRAME_PROCESSOR
+    model_path = get_options('model').get('path')
+    return get_model('face_enhancer', model_path, lambda: onnxruntime.InferenceSession(model_path,
+        providers=apply_execution_provider_options(facefusion.globals.execution_providers)))
 
 
 def clear_frame_processor() -> None:
-    global FRAME_PROCESSOR
-
-    FRAME_PROCESSOR = None
+    clear_model('face_enhancer')
 
 
 def get_options(key: Literal['model']) -> Any:
@@ -165,15 +159,10 @@ def pre_process(mode: ProcessMode) -> bool:
 
 def post_process() -> None:
     read_static_image.cache_clear()
-    if facefusion.globals.video_memory_strategy == 'strict' or facefusion.globals.video_memory_strategy == 'moderate':
-        clear_frame_processor()
-    if facefusion.globals.video_memory_strategy == 'strict':
-        clear_face_analyser()
-        clear_content_analyser()
-        clear_face_occluder()
+    enforce_model_budget()
 
 
-def enhance_face(target_face: Face, temp_vision_frame: VisionFrame) -> VisionFrame:
+def enhance_face(target_face: Face, temp_vision_frame: VisionFrame, face_enhancer_blend: Optional[int] = None) -> VisionFrame:
     model_template = get_options('model').get('template')
     model_size = get_options('model').get('size')
     crop_vision_frame, affine_matrix = warp_face_by_face_landmark_5(temp_vision_frame, target_face.landmark['5/68'],
@@ -193,10 +182,11 @@ def enhance_face(target_face: Face, temp_vision_frame: VisionFrame) -> VisionFra
     crop_vision_frame = normalize_crop_frame(crop_vision_frame)
     crop_mask = numpy.minimum.reduce(crop_mask_list).clip(0, 1)
     paste_vision_frame = paste_back(temp_vision_frame, crop_vision_frame, crop_mask, affine_matrix)
-    temp_vision_frame = blend_frame(temp_vision_frame, paste_vision_frame)
+    temp_vision_frame = blend_frame(temp_vision_frame, paste_vision_frame, face_enhancer_blend)
     return temp_vision_frame
 
 
+@timed('face_enhancer')
 def apply_enhance(crop_vision_frame: VisionFrame) -> VisionFrame:
     frame_processor = get_frame_processor()
     frame_processor_inputs = {}
@@ -207,7 +197,7 @@ def apply_enhance(crop_vision_frame: VisionFrame) -> VisionFrame:
         if frame_processor_input.name == 'weight':
             weight = numpy.array([1], dtype=numpy.double)
             frame_processor_inputs[frame_processor_input.name] = weight
-    with THREAD_SEMAPHORE:
+    with trace_lock(THREAD_SEMAPHORE, 'face_enhancer.semaphore'):
         crop_vision_frame = frame_processor.run(None, frame_processor_inputs)[0][0]
     return crop_vision_frame
 
@@ -228,8 +218,10 @@ def normalize_crop_frame(crop_vision_frame: VisionFrame) -> VisionFrame:
     return crop_vision_frame
 
 
-def blend_frame(temp_vision_frame: VisionFrame, paste_vision_frame: VisionFrame) -> VisionFrame:
-    face_enhancer_blend = 1 - (frame_processors_globals.face_enhancer_blend / 100)
+def blend_frame(temp_vision_frame: VisionFrame, paste_vision_frame: VisionFrame, face_enhancer_blend: Optional[int] = None) -> VisionFrame:
+    if face_enhancer_blend is None:
+        face_enhancer_blend = frame_processors_globals.face_enhancer_blend
+    face_enhancer_blend = 1 - (face_enhancer_blend / 100)
     temp_vision_frame = cv2.addWeighted(temp_vision_frame, face_enhancer_blend, paste_vision_frame,
                                         1 - face_enhancer_blend, 0)
     return temp_vision_frame
@@ -243,24 +235,26 @@ def process_frame(inputs: FaceEnhancerInputs) -> VisionFrame:
     reference_faces = inputs['reference_faces']
     reference_faces_2 = inputs['reference_faces_2']
     target_vision_frame = inputs['target_vision_frame']
+    face_enhancer_blend = inputs.get('face_enhancer_blend')
+    face_detector_size = inputs.get('face_detector_size')
 
     if 'reference' in facefusion.globals.face_selector_mode:
         for ref_faces in [reference_faces, reference_faces_2]:
             similar_faces = find_similar_faces(ref_faces, target_vision_frame,
-                                               facefusion.globals.reference_face_distance)
+                                               facefusion.globals.reference_face_distance, face_detector_size)
             if similar_faces:
                 for similar_face in similar_faces:
-                    target_vision_frame = enhance_face(similar_face, target_vision_frame)
+                    target_vision_frame = enhance_face(similar_face, target_vision_frame, face_enhancer_blend)
 
     if 'one' in facefusion.globals.face_selector_mode:
-        target_face = get_one_face(target_vision_frame)
+        target_face = get_one_face(target_vision_frame, face_detector_size=face_detector_size)
         if target_face:
-            target_vision_frame = enhance_face(target_face, target_vision_frame)
+            target_vision_frame = enhance_face(target_face, target_vision_frame, face_enhancer_blend)
     if 'many' in facefusion.globals.face_selector_mode:
-        many_faces = get_many_faces(target_vision_frame)
+        many_faces = get_many_faces(target_vision_frame, face_detector_size)
         if many_faces:
             for target_face in many_faces:
-                target_vision_frame = enhance_face(target_face, target_vision_frame)
+                target_vision_frame = enhance_face(target_face, target_vision_frame, face_enhancer_blend)
     return target_vision_frame
 
 
@@ -269,14 +263,18 @@ def process_frames(source_path: List[str], source_path_2: List[str], queue_paylo
 
     for queue_payload in queue_payloads:
         target_vision_path = queue_payload['frame_path']
-        target_vision_frame = read_image(target_vision_path)
+        target_vision_frame = read_frame(target_vision_path)
+        if not detect_face_presence(queue_payload['face_presence_key'], queue_payload['frame_number'],
+                                    target_vision_frame, reference_faces, reference_faces_2):
+            update_progress(target_vision_path)
+            continue
         result_frame = process_frame(
             {
                 'reference_faces': reference_faces,
                 'reference_faces_2': reference_faces_2,
                 'target_vision_frame': target_vision_frame
             })
-        write_image(target_vision_path, result_frame)
+        write_frame(target_vision_path, result_frame)
         update_progress(target_vision_path)
 
 
@@ -291,5 +289,6 @@ def process_image(source_path: str, source_path_2: str, target_path: str, output
     write_image(output_path, result_frame)
 
 
-def process_video(source_paths: List[str], source_paths_2: List[str], temp_frame_paths: List[str]) -> None:
-    frame_processors.multi_process_frames(None, None, temp_frame_paths, process_frames)
+def process_video(source_paths: List[str], source_paths_2: List[str], temp_frame_paths: List[str]) -> bool:
+    return frame_processors.multi_process_frames(None, None, temp_frame_paths, process_frames,
+                                                 face_presence_key=get_face_presence_key(temp_frame_paths))
@@ -1,6 +1,5 @@
 from typing import Any, List, Literal, Optional
 from argparse import ArgumentParser
-import threading
 import numpy
 import onnx
 import onnxruntime
@@ -11,24 +10,22 @@ import facefusion.processors.frame.core as frame_processors
 from facefusion import config, logger, wording
 from facefusion.execution_helper import apply_execution_provider_options
 from facefusion.face_analyser import get_one_face, get_average_face, get_many_faces, find_similar_faces, \
-    clear_face_analyser
-from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, create_region_mask, \
-    clear_face_occluder, clear_face_parser
+    detect_face_presence
+from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, create_region_mask
 from facefusion.face_helper import paste_back, warp_face_by_face_landmark_5
-from facefusion.face_store import get_reference_faces
-from facefusion.content_analyser import clear_content_analyser
+from facefusion.face_store import get_reference_faces, get_face_presence_key
 from facefusion.typing import Face, Embedding, VisionFrame, Update_Process, ProcessMode, ModelSet, OptionsWithModel, \
     QueuePayload, Padding
 from facefusion.filesystem import is_file, is_image, has_image, is_video, filter_image_paths, resolve_relative_path
 from facefusion.download import conditional_download, is_download_done
-from facefusion.vision import read_image, read_static_image, read_static_images, write_image
+from facefusion.metrics import timed
+from facefusion.model_registry import get_model, clear_model, enforce_model_budget
+from facefusion.frame_writer import read_frame, write_frame
+from facefusion.vision import read_static_image, read_static_images, write_image
 from facefusion.processors.frame.typings import FaceSwapperInputs
 from facefusion.processors.frame import globals as frame_processors_globals
 from facefusion.processors.frame import choices as frame_processors_choices
 
-FRAME_PROCESSOR = None
-MODEL_MATRIX = None
-THREAD_LOCK: threading.Lock = threading.Lock()
 NAME = __name__.upper()
 MODELS: ModelSet = \
     {
@@ -97,37 +94,23 @@ OPTIONS: Optional[OptionsWithModel] = None
 
 
 def get_frame_processor() -> Any:
-    global FRAME_PROCESSOR
-
-    with THREAD_LOCK:
-        if FRAME_PROCESSOR is None:
-            model_path = get_options('model').get('path')
-            FRAME_PROCESSOR = onnxruntime.InferenceSession(model_path, providers=apply_execution_provider_options(
-                facefusion.globals.execution_providers))
-    return FRAME_PROCESSOR
+    model_path = get_options('model').get('path')
+    return get_model('face_swapper', model_path, lambda: onnxruntime.InferenceSession(model_path,
+        providers=apply_execution_provider_options(facefusion.globals.execution_providers)))
 
 
 def clear_frame_processor() -> None:
-    global FRAME_PROCESSOR
-
-    FRAME_PROCESSOR = None
+    clear_model('face_swapper')
 
 
 def get_model_matrix() -> Any:
-    global MODEL_MATRIX
-
-    with THREAD_LOCK:
-        if MODEL_MATRIX is None:
-            model_path = get_options('model').get('path')
-            model = onnx.load(model_path)
-            MODEL_MATRIX = numpy_helper.to_array(model.graph.initializer[-1])
-    return MODEL_MATRIX
+    model_path = get_options('model').get('path')
+    return get_model('face_swapper_matrix', model_path,
+                     lambda: numpy_helper.to_array(onnx.load(model_path).graph.initializer[-1]))
 
 
 def clear_model_matrix() -> None:
-    global MODEL_MATRIX
-
-    MODEL_MATRIX = None
+    clear_model('face_swapper_matrix')
 
 
 def get_options(key: Literal['model']) -> Any:
@@ -213,14 +196,7 @@ def pre_process(mode: ProcessMode) -> bool:
 
 def post_process() -> None:
     read_static_image.cache_clear()
-    if facefusion.globals.video_memory_strategy == 'strict' or facefusion.globals.video_memory_strategy == 'moderate':
-        clear_frame_processor()
-        clear_model_matrix()
-    if facefusion.globals.video_memory_strategy == 'strict':
-        clear_face_analyser()
-        clear_content_analyser()
-        clear_face_occluder()
-        clear_face_parser()
+    enforce_model_budget()
 
 
 def update_padding(padding: Padding, frame_number: int) -> Padding:
@@ -270,6 +246,7 @@ def swap_face(source_face: Face, target_face: Face, temp_vision_frame: VisionFra
     return temp_vision_frame
 
 
+@timed('face_swapper')
 def apply_swap(source_face: Face, crop_vision_frame: VisionFrame) -> VisionFrame:
     frame_processor = get_frame_processor()
     model_type = get_options('model').get('type')
@@ -341,21 +318,22 @@ def process_frame(inputs: FaceSwapperInputs) -> VisionFrame:
     source_face_2 = inputs['source_face_2']
     target_vision_frame = inputs['target_vision_frame']
     frame_number = inputs['target_frame_number']
+    face_detector_size = inputs.get('face_detector_size')
 
     if 'reference' in facefusion.globals.face_selector_mode:
         for ref_faces, src_face in [(reference_faces, source_face), (reference_faces_2, source_face_2)]:
             similar_faces = find_similar_faces(ref_faces, target_vision_frame,
-                                               facefusion.globals.reference_face_distance)
+                                               facefusion.globals.reference_face_distance, face_detector_size)
             if similar_faces and src_face:
                 for similar_face in similar_faces:
                     target_vision_frame = swap_face(src_face, similar_face, target_vision_frame, frame_number)
 
     if 'one' in facefusion.globals.face_selector_mode:
-        target_face = get_one_face(target_vision_frame)
+        target_face = get_one_face(target_vision_frame, face_detector_size=face_detector_size)
         if target_face:
             target_vision_frame = swap_face(source_face, target_face, target_vision_frame, frame_number)
     if 'many' in facefusion.globals.face_selector_mode:
-        many_faces = get_many_faces(target_vision_frame)
+        many_faces = get_many_faces(target_vision_frame, face_detector_size)
         if many_faces:
             for target_face in many_faces:
                 target_vision_frame = swap_face(source_face, target_face, target_vision_frame, frame_number)
@@ -374,7 +352,11 @@ def process_frames(source_paths: List[str], source_paths_2: List[str], queue_pay
         target_vision_path = queue_payload['frame_path']
         target_frame_number = queue_payload['frame_number']
 
-        target_vision_frame = read_image(target_vision_path)
+        target_vision_frame = read_frame(target_vision_path)
+        if not detect_face_presence(queue_payload['face_presence_key'], target_frame_number, target_vision_frame,
+                                    reference_faces, reference_faces_2):
+            update_progress(target_vision_path)
+            continue
         result_frame = process_frame(
             {
                 'reference_faces': reference_faces,
@@ -384,7 +366,7 @@ def process_frames(source_paths: List[str], source_paths_2: List[str], queue_pay
                 'target_vision_frame': target_vision_frame,
                 'target_frame_number': target_frame_number
             })
-        write_image(target_vision_path, result_frame)
+        write_frame(target_vision_path, result_frame)
         update_progress(target_vision_path)
 
 
@@ -406,5 +388,6 @@ def process_image(source_paths: List[str], source_paths_2: List[str], target_pat
     write_image(output_path, result_frame)
 
 
-def process_video(source_paths: List[str], source_paths_2: List[str], temp_frame_paths: List[str]) -> None:
-    frame_processors.multi_process_frames(source_paths, source_paths_2, temp_frame_paths, process_frames)
+def process_video(source_paths: List[str], source_paths_2: List[str], temp_frame_paths: List[str]) -> bool:
+    return frame_processors.multi_process_frames(source_paths, source_paths_2, temp_frame_paths, process_frames,
+                                                 face_presence_key=get_face_presence_key(temp_frame_paths))
@@ -2,27 +2,25 @@ from typing import Any, List, Literal, Optional
 from argparse import ArgumentParser
 import threading
 import cv2
-from basicsr.archs.rrdbnet_arch import RRDBNet
-from realesrgan import RealESRGANer
 
 import facefusion.globals
 import facefusion.processors.frame.core as frame_processors
 from facefusion import config, logger, wording
-from facefusion.face_analyser import clear_face_analyser
-from facefusion.content_analyser import clear_content_analyser
 from facefusion.typing import Face, VisionFrame, Update_Process, ProcessMode, ModelSet, OptionsWithModel, QueuePayload
 from facefusion.common_helper import create_metavar
 from facefusion.execution_helper import map_torch_backend
 from facefusion.filesystem import is_file, resolve_relative_path
 from facefusion.download import conditional_download, is_download_done
-from facefusion.vision import read_image, read_static_image, write_image
+from facefusion.metrics import timed
+from facefusion.profiler import trace_lock
+from facefusion.model_registry import get_model, clear_model, enforce_model_budget
+from facefusion.frame_writer import read_frame, write_frame
+from facefusion.vision import read_static_image, write_image
 from facefusion.processors.frame.typings import FrameEnhancerInputs
 from facefusion.processors.frame import globals as frame_processors_globals
 from facefusion.processors.frame import choices as frame_processors_choices
 
-FRAME_PROCESSOR = None
 THREAD_SEMAPHORE: threading.Semaphore = threading.Semaphore()
-THREAD_LOCK: threading.Lock = threading.Lock()
 NAME = __name__.upper()
 MODELS: ModelSet = \
     {
@@ -49,29 +47,30 @@ OPTIONS: Optional[OptionsWithModel] = None
 
 
 def get_frame_processor() -> Any:
-    global FRAME_PROCESSOR
-
-    with THREAD_LOCK:
-        if FRAME_PROCESSOR is None:
-            model_path = get_options('model').get('path')
-            model_scale = get_options('model').get('scale')
-            FRAME_PROCESSOR = RealESRGANer(
-                model_path=model_path,
-                model=RRDBNet(
-                    num_in_ch=3,
-                    num_out_ch=3,
-                    scale=model_scale
-                ),
-                device=map_torch_backend(facefusion.globals.execution_providers),
-                scale=model_scale
-            )
-    return FRAME_PROCESSOR
+    model_path = get_options('model').get('path')
+    model_scale = get_options('model').get('scale')
+    return get_model('frame_enhancer', model_path, lambda: create_frame_processor(model_path, model_scale))
 
 
-def clear_frame_processor() -> None:
-    global FRAME_PROCESSOR
+def create_frame_processor(model_path: str, model_scale: int) -> Any:
+    # basicsr and realesrgan pull in torch, defer them to the first enhanced frame
+    from basicsr.archs.rrdbnet_arch import RRDBNet
+    from realesrgan import RealESRGANer
+
+    return RealESRGANer(
+        model_path=model_path,
+        model=RRDBNet(
+            num_in_ch=3,
+            num_out_ch=3,
+            scale=model_scale
+        ),
+        device=map_torch_backend(facefusion.globals.execution_providers),
+        scale=model_scale
+    )
 
-    FRAME_PROCESSOR = None
+
+def clear_frame_processor() -> None:
+    clear_model('frame_enhancer')
 
 
 def get_options(key: Literal['model']) -> Any:
@@ -136,22 +135,21 @@ def pre_process(mode: ProcessMode) -> bool:
 
 def post_process() -> None:
     read_static_image.cache_clear()
-    if facefusion.globals.video_memory_strategy == 'strict' or facefusion.globals.video_memory_strategy == 'moderate':
-        clear_frame_processor()
-    if facefusion.globals.video_memory_strategy == 'strict':
-        clear_face_analyser()
-        clear_content_analyser()
+    enforce_model_budget()
 
 
-def enhance_frame(temp_vision_frame: VisionFrame) -> VisionFrame:
-    with THREAD_SEMAPHORE:
+@timed('frame_enhancer')
+def enhance_frame(temp_vision_frame: VisionFrame, frame_enhancer_blend: Optional[int] = None) -> VisionFrame:
+    with trace_lock(THREAD_SEMAPHORE, 'frame_enhancer.semaphore'):
         paste_vision_frame, _ = get_frame_processor().enhance(temp_vision_frame)
-        temp_vision_frame = blend_frame(temp_vision_frame, paste_vision_frame)
+        temp_vision_frame = blend_frame(temp_vision_frame, paste_vision_frame, frame_enhancer_blend)
     return temp_vision_frame
 
 
-def blend_frame(temp_vision_frame: VisionFrame, paste_vision_frame: VisionFrame) -> VisionFrame:
-    frame_enhancer_blend = 1 - (frame_processors_globals.frame_enhancer_blend / 100)
+def blend_frame(temp_vision_frame: VisionFrame, paste_vision_frame: VisionFrame, frame_enhancer_blend: Optional[int] = None) -> VisionFrame:
+    if frame_enhancer_blend is None:
+        frame_enhancer_blend = frame_processors_globals.frame_enhancer_blend
+    frame_enhancer_blend = 1 - (frame_enhancer_blend / 100)
     temp_vision_frame = cv2.resize(temp_vision_frame, (paste_vision_frame.shape[1], paste_vision_frame.shape[0]))
     temp_vision_frame = cv2.addWeighted(temp_vision_frame, frame_enhancer_blend, paste_vision_frame,
                                         1 - frame_enhancer_blend, 0)
@@ -164,19 +162,19 @@ def get_reference_frame(source_face: Face, target_face: Face, temp_vision_frame:
 
 def process_frame(inputs: FrameEnhancerInputs) -> VisionFrame:
     target_vision_frame = inputs['target_vision_frame']
-    return enhance_frame(target_vision_frame)
+    return enhance_frame(target_vision_frame, inputs.get('frame_enhancer_blend'))
 
 
 def process_frames(source_paths: List[str], queue_payloads: List[QueuePayload],
                    update_progress: Update_Process) -> None:
     for queue_payload in queue_payloads:
         target_vision_path = queue_payload['frame_path']
-        target_vision_frame = read_image(target_vision_path)
+        target_vision_frame = read_frame(target_vision_path)
         result_frame = process_frame(
             {
                 'target_vision_frame': target_vision_frame
             })
-        write_image(target_vision_path, result_frame)
+        write_frame(target_vision_path, result_frame)
         update_progress(target_vision_path)
 
 
@@ -189,5 +187,5 @@ def process_image(source_paths: List[str], target_path: str, output_path: str) -
     write_image(output_path, result_frame)
 
 
-def process_video(source_paths: List[str], source_paths_2: List[str], temp_frame_paths: List[str]) -> None:
-    frame_processors.multi_process_frames(None, None, temp_frame_paths, process_frames)
+def process_video(source_paths: List[str], source_paths_2: List[str], temp_frame_paths: List[str]) -> bool:
+    return frame_processors.multi_process_frames(None, None, temp_frame_paths, process_frames)
@@ -1,6 +1,5 @@
 from typing import Any, List, Literal, Optional
 from argparse import ArgumentParser
-import threading
 import cv2
 import numpy
 import onnxruntime
@@ -9,25 +8,24 @@ import facefusion.globals
 import facefusion.processors.frame.core as frame_processors
 from facefusion import config, logger, wording
 from facefusion.execution_helper import apply_execution_provider_options
-from facefusion.face_analyser import get_one_face, get_many_faces, find_similar_faces, clear_face_analyser
-from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, create_mouth_mask, clear_face_occluder, clear_face_parser
+from facefusion.face_analyser import get_one_face, get_many_faces, find_similar_faces, detect_face_presence
+from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, create_mouth_mask
 from facefusion.face_helper import warp_face_by_face_landmark_5, warp_face_by_bounding_box, paste_back, create_bounding_box_from_landmark
-from facefusion.face_store import get_reference_faces
-from facefusion.content_analyser import clear_content_analyser
+from facefusion.face_store import get_reference_faces, get_face_presence_key
 from facefusion.typing import Face, VisionFrame, Update_Process, ProcessMode, ModelSet, OptionsWithModel, AudioFrame, QueuePayload
 from facefusion.filesystem import is_file, has_audio, resolve_relative_path
 from facefusion.download import conditional_download, is_download_done
+from facefusion.metrics import timed
+from facefusion.model_registry import get_model, clear_model, enforce_model_budget
 from facefusion.audio import read_static_audio, get_audio_frame
 from facefusion.filesystem import is_image, is_video, filter_audio_paths
 from facefusion.common_helper import get_first
-from facefusion.vision import read_image, write_image, read_static_image
+from facefusion.frame_writer import read_frame, write_frame
+from facefusion.vision import write_image, read_static_image
 from facefusion.processors.frame.typings import LipSyncerInputs
 from facefusion.processors.frame import globals as frame_processors_globals
 from facefusion.processors.frame import choices as frame_processors_choices
 
-FRAME_PROCESSOR = None
-MODEL_MATRIX = None
-THREAD_LOCK : threading.Lock = threading.Lock()
 NAME = __name__.upper()
 MODELS : ModelSet =\
 {
@@ -41,19 +39,12 @@ OPTIONS : Optional[OptionsWithModel] = None
 
 
 def get_frame_processor() -> Any:
-    global FRAME_PROCESSOR
-
-    with THREAD_LOCK:
-        if FRAME_PROCESSOR is None:
-            model_path = get_options('model').get('path')
-            FRAME_PROCESSOR = onnxruntime.InferenceSession(model_path, providers = apply_execution_provider_options(facefusion.globals.execution_providers))
-    return FRAME_PROCESSOR
+    model_path = get_options('model').get('path')
+    return get_model('lip_syncer', model_path, lambda: onnxruntime.InferenceSession(model_path, providers = apply_execution_provider_options(facefusion.globals.execution_providers)))
 
 
 def clear_frame_processor() -> None:
-    global FRAME_PROCESSOR
-
-    FRAME_PROCESSOR = None
+    clear_model('lip_syncer')
 
 
 def get_options(key : Literal['model']) -> Any:
@@ -118,15 +109,10 @@ def pre_process(mode : ProcessMode) -> bool:
 def post_process() -> None:
     read_static_image.cache_clear()
     read_static_audio.cache_clear()
-    if facefusion.globals.video_memory_strategy == 'strict' or facefusion.globals.video_memory_strategy == 'moderate':
-        clear_frame_processor()
-    if facefusion.globals.video_memory_strategy == 'strict':
-        clear_face_analyser()
-        clear_content_analyser()
-        clear_face_occluder()
-        clear_face_parser()
+    enforce_model_budget()
 
 
+@timed('lip_syncer')
 def sync_lip(target_face : Face, temp_audio_frame : AudioFrame, temp_vision_frame : VisionFrame) -> VisionFrame:
     frame_processor = get_frame_processor()
     temp_audio_frame = prepare_audio_frame(temp_audio_frame)
@@ -191,19 +177,20 @@ def process_frame(inputs : LipSyncerInputs) -> VisionFrame:
     reference_faces = inputs['reference_faces']
     source_audio_frame = inputs['source_audio_frame']
     target_vision_frame = inputs['target_vision_frame']
+    face_detector_size = inputs.get('face_detector_size')
     is_source_audio_frame = isinstance(source_audio_frame, numpy.ndarray) and source_audio_frame.any()
 
     if 'reference' in facefusion.globals.face_selector_mode:
-        similar_faces = find_similar_faces(reference_faces, target_vision_frame, facefusion.globals.reference_face_distance)
+        similar_faces = find_similar_faces(reference_faces, target_vision_frame, facefusion.globals.reference_face_distance, face_detector_size)
         if similar_faces and is_source_audio_frame:
             for similar_face in similar_faces:
                 target_vision_frame = sync_lip(similar_face, source_audio_frame, target_vision_frame)
     if 'one' in facefusion.globals.face_selector_mode:
-        target_face = get_one_face(target_vision_frame)
+        target_face = get_one_face(target_vision_frame, face_detector_size=face_detector_size)
         if target_face and is_source_audio_frame:
             target_vision_frame = sync_lip(target_face, source_audio_frame, target_vision_frame)
     if 'many' in facefusion.globals.face_selector_mode:
-        many_faces = get_many_faces(target_vision_frame)
+        many_faces = get_many_faces(target_vision_frame, face_detector_size)
         if many_faces and is_source_audio_frame:
             for target_face in many_faces:
                 target_vision_frame = sync_lip(target_face, source_audio_frame, target_vision_frame)
@@ -219,14 +206,18 @@ def process_frames(source_paths : List[str], queue_payloads : List[QueuePayload]
         frame_number = queue_payload['frame_number']
         target_vision_path = queue_payload['frame_path']
         source_audio_frame = get_audio_frame(source_audio_path, target_video_fps, frame_number)
-        target_vision_frame = read_image(target_vision_path)
+        target_vision_frame = read_frame(target_vision_path)
+        if not detect_face_presence(queue_payload['face_presence_key'], frame_number, target_vision_frame,
+                                    reference_faces, reference_faces_2):
+            update_progress(target_vision_path)
+            continue
         result_frame = process_frame(
         {
             'reference_faces': reference_faces,
             'source_audio_frame': source_audio_frame,
             'target_vision_frame': target_vision_frame
         })
-        write_image(target_vision_path, result_frame)
+        write_frame(target_vision_path, result_frame)
         update_progress(target_vision_path)
 
 
@@ -244,5 +235,6 @@ def process_image(source_paths: List[str], source_paths_2: List[str], target_pat
     write_image(output_path, result_frame)
 
 
-def process_video(source_paths: List[str], temp_frame_paths: List[str]) -> None:
-    frame_processors.multi_process_frames(source_paths, None, temp_frame_paths, process_frames)
+def process_video(source_paths: List[str], temp_frame_paths: List[str]) -> bool:
+    return frame_processors.multi_process_frames(source_paths, None, temp_frame_paths, process_frames,
+                                                 face_presence_key=get_face_presence_key(temp_frame_paths))
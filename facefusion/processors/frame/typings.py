@@ -1,4 +1,4 @@
-from typing import Literal, TypedDict
+from typing import Literal, Optional, TypedDict
 
 from facefusion.typing import Face, FaceSet, AudioFrame, VisionFrame
 
@@ -16,13 +16,15 @@ FaceDebuggerInputs = TypedDict('FaceDebuggerInputs',
                                    'reference_faces_2': FaceSet,
                                    'target_vision_frame': VisionFrame,
                                    'source_frame': VisionFrame,
-                                   'target_frame_number': int
+                                   'target_frame_number': int,
+                                   'face_detector_size': Optional[str]
                                })
 FaceEnhancerInputs = TypedDict('FaceEnhancerInputs',
                                {
                                    'reference_faces': FaceSet,
                                    'reference_faces_2': FaceSet,
-                                   'target_vision_frame': VisionFrame
+                                   'target_vision_frame': VisionFrame,
+                                   'face_detector_size': Optional[str]
                                })
 FaceSwapperInputs = TypedDict('FaceSwapperInputs',
                               {
@@ -31,7 +33,8 @@ FaceSwapperInputs = TypedDict('FaceSwapperInputs',
                                   'source_face': Face,
                                   'source_face_2': Face,
                                   'target_vision_frame': VisionFrame,
-                                  'target_frame_number': int
+                                  'target_frame_number': int,
+                                  'face_detector_size': Optional[str]
                               })
 FrameEnhancerInputs = TypedDict('FrameEnhancerInputs',
                                 {
@@ -42,5 +45,6 @@ LipSyncerInputs = TypedDict('LipSyncerInputs',
                                 'reference_faces': FaceSet,
                                 'reference_faces_2': FaceSet,
                                 'source_audio_frame': AudioFrame,
-                                'target_vision_frame': VisionFrame
+                                'target_vision_frame': VisionFrame,
+                                'face_detector_size': Optional[str]
                             })
@@ -0,0 +1,148 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from facefusion import logger, wording
+from facefusion.typing import ProfileMode
+
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_EVENTS: List[Dict[str, Any]] = []
+PROFILE_SAMPLES: Counter = Counter()
+PROFILE_MODES: List[ProfileMode] = []
+PROFILE_START: float = 0.0
+PROFILE_SAMPLER_EVENT: Optional[threading.Event] = None
+THREAD_LOCK: threading.Lock = threading.Lock()
+
+
+def is_tracing() -> bool:
+    return 'trace' in PROFILE_MODES
+
+
+def start_profile(profile_modes: List[ProfileMode]) -> None:
+    global PROFILE_MODES
+    global PROFILE_START
+    global PROFILE_SAMPLER_EVENT
+
+    with THREAD_LOCK:
+        PROFILE_EVENTS.clear()
+        PROFILE_SAMPLES.clear()
+    PROFILE_START = time.perf_counter()
+    PROFILE_MODES = list(profile_modes)
+    if 'flamegraph' in PROFILE_MODES:
+        PROFILE_SAMPLER_EVENT = threading.Event()
+        threading.Thread(target=run_sampler, args=(PROFILE_SAMPLER_EVENT,), daemon=True).start()
+
+
+def stop_profile(output_path: str) -> None:
+    global PROFILE_MODES
+    global PROFILE_SAMPLER_EVENT
+
+    profile_modes = PROFILE_MODES
+    PROFILE_MODES = []
+    if PROFILE_SAMPLER_EVENT:
+        PROFILE_SAMPLER_EVENT.set()
+        PROFILE_SAMPLER_EVENT = None
+    profile_path = os.path.splitext(output_path)[0]
+    try:
+        if 'trace' in profile_modes:
+            write_trace(profile_path + '.trace.json')
+        if 'flamegraph' in profile_modes:
+            write_flamegraph(profile_path + '.folded')
+    except OSError as exception:
+        logger.error(str(exception), __name__.upper())
+
+
+def add_trace_event(name: str, category: str, start_time: float, end_time: float) -> None:
+    if is_tracing():
+        trace_event =\
+            {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round((start_time - PROFILE_START) * 1000000, 1),
+                'dur': round((end_time - start_time) * 1000000, 1),
+                'pid': os.getpid(),
+                'tid': threading.get_ident()
+            }
+        with THREAD_LOCK:
+            PROFILE_EVENTS.append(trace_event)
+
+
+@contextmanager
+def trace_span(name: str, category: str) -> Iterator[None]:
+    if not is_tracing():
+        yield
+        return
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_trace_event(name, category, start_time, time.perf_counter())
+
+
+@contextmanager
+def trace_lock(lock: Any, name: str) -> Iterator[None]:
+    if not is_tracing():
+        with lock:
+            yield
+        return
+    wait_time = time.perf_counter()
+    with lock:
+        hold_time = time.perf_counter()
+        add_trace_event(name + '.wait', 'lock', wait_time, hold_time)
+        try:
+            yield
+        finally:
+            add_trace_event(name + '.hold', 'lock', hold_time, time.perf_counter())
+
+
+def write_trace(trace_path: str) -> None:
+    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+    with THREAD_LOCK:
+        trace_events = PROFILE_EVENTS.copy()
+    for thread_id in sorted({trace_event.get('tid') for trace_event in trace_events}):
+        trace_events.append(
+            {
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': os.getpid(),
+                'tid': thread_id,
+                'args':
+                    {
+                        'name': thread_names.get(thread_id, str(thread_id))
+                    }
+            })
+    with open(trace_path, 'w') as trace_file:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, trace_file)
+    logger.info(wording.get('trace_written').format(trace_path=trace_path), __name__.upper())
+
+
+def run_sampler(sampler_event: threading.Event) -> None:
+    sampler_thread_id = threading.get_ident()
+    while not sampler_event.wait(PROFILE_SAMPLE_INTERVAL):
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == sampler_thread_id:
+                continue
+            stack = []
+            while frame:
+                stack.append(frame.f_code.co_name + ' (' + os.path.basename(frame.f_code.co_filename) + ':' +
+                             str(frame.f_code.co_firstlineno) + ')')
+                frame = frame.f_back
+            stack.append(thread_names.get(thread_id, str(thread_id)))
+            with THREAD_LOCK:
+                PROFILE_SAMPLES[';'.join(reversed(stack))] += 1
+
+
+def write_flamegraph(flamegraph_path: str) -> None:
+    with THREAD_LOCK:
+        profile_samples = PROFILE_SAMPLES.copy()
+    with open(flamegraph_path, 'w') as flamegraph_file:
+        for stack, count in profile_samples.most_common():
+            flamegraph_file.write(stack + ' ' + str(count) + '\n')
+    logger.info(wording.get('flamegraph_written').format(flamegraph_path=flamegraph_path), __name__.upper())
@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy
+
+from facefusion.typing import VisionFrame
+
+RAW_FRAMES_NAME = 'frames.raw'
+RAW_FRAMES_MAGIC = b'FFRAW1\n'
+RAW_HEADER_SIZE = 4096
+RAW_FRAMES: Dict[str, numpy.memmap] = {}
+THREAD_LOCK: threading.Lock = threading.Lock()
+
+
+def create_raw_header(frame_shape: Tuple[int, ...], frame_dtype: str = 'uint8') -> bytes:
+    raw_header = RAW_FRAMES_MAGIC + json.dumps({'shape': list(frame_shape), 'dtype': frame_dtype}).encode()
+    return raw_header.ljust(RAW_HEADER_SIZE, b' ')
+
+
+def read_raw_header(raw_path: str) -> Optional[Tuple[Tuple[int, ...], str]]:
+    try:
+        with open(raw_path, 'rb') as raw_file:
+            raw_header = raw_file.read(RAW_HEADER_SIZE)
+    except OSError:
+        return None
+    if not raw_header.startswith(RAW_FRAMES_MAGIC):
+        return None
+    raw_metadata = json.loads(raw_header[len(RAW_FRAMES_MAGIC):].decode().strip())
+    return tuple(raw_metadata.get('shape')), raw_metadata.get('dtype')
+
+
+def finalize_raw_frames(raw_path: str, frame_resolution: Tuple[int, int]) -> int:
+    # the stream is written before its length is known, the frame total follows from the payload size
+    width, height = frame_resolution
+    frame_size = width * height * 3
+    frame_total = max(0, os.path.getsize(raw_path) - RAW_HEADER_SIZE) // frame_size
+    with open(raw_path, 'r+b') as raw_file:
+        raw_file.write(create_raw_header((frame_total, height, width, 3)))
+        raw_file.truncate(RAW_HEADER_SIZE + frame_total * frame_size)
+    return frame_total
+
+
+def get_raw_frames(raw_path: str) -> Optional[numpy.memmap]:
+    with THREAD_LOCK:
+        if raw_path not in RAW_FRAMES:
+            raw_header = read_raw_header(raw_path)
+            if raw_header is None or raw_header[0][0] == 0:
+                return None
+            frame_shape, frame_dtype = raw_header
+            RAW_FRAMES[raw_path] = numpy.memmap(raw_path, dtype=frame_dtype, mode='r+', offset=RAW_HEADER_SIZE,
+                                                shape=frame_shape)
+        return RAW_FRAMES.get(raw_path)
+
+
+def close_raw_frames(raw_path: str) -> None:
+    with THREAD_LOCK:
+        raw_frames = RAW_FRAMES.pop(raw_path, None)
+    if raw_frames is not None:
+        raw_frames.flush()
+        del raw_frames
+
+
+def get_raw_frame_paths(raw_path: str) -> List[str]:
+    raw_header = read_raw_header(raw_path)
+    if raw_header is None:
+        return []
+    return [os.path.join(raw_path, str(frame_number).zfill(4) + '.raw') for frame_number in
+            range(1, raw_header[0][0] + 1)]
+
+
+def is_raw_frame_path(frame_path: str) -> bool:
+    return os.path.basename(os.path.dirname(frame_path)) == RAW_FRAMES_NAME and frame_path.endswith('.raw')
+
+
+def resolve_raw_frame_path(frame_path: str) -> Tuple[str, int]:
+    # virtual paths keep the frame number in the basename like the image formats do
+    return os.path.dirname(frame_path), int(os.path.basename(frame_path).split('.')[0]) - 1
+
+
+def read_raw_frame(frame_path: str) -> Optional[VisionFrame]:
+    raw_path, frame_index = resolve_raw_frame_path(frame_path)
+    raw_frames = get_raw_frames(raw_path)
+    if raw_frames is not None and 0 <= frame_index < raw_frames.shape[0]:
+        return raw_frames[frame_index]
+    return None
+
+
+def write_raw_frame(frame_path: str, vision_frame: VisionFrame) -> bool:
+    raw_path, frame_index = resolve_raw_frame_path(frame_path)
+    raw_frames = get_raw_frames(raw_path)
+    if raw_frames is None or not 0 <= frame_index < raw_frames.shape[0]:
+        return False
+    if vision_frame.shape != raw_frames.shape[1:]:
+        return False
+    if not numpy.may_share_memory(raw_frames[frame_index], vision_frame):
+        raw_frames[frame_index] = vision_frame
+    return True
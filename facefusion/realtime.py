@@ -0,0 +1,338 @@
+import glob
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Deque, Dict, Generator, List, Optional, Tuple
+
+import cv2
+import numpy
+
+import facefusion.globals
+import facefusion.choices
+from facefusion import logger, wording
+from facefusion.content_analyser import analyse_stream, start_stream_analyser, stop_stream_analyser
+from facefusion.face_analyser import get_average_face
+from facefusion.ffmpeg import open_ffmpeg
+from facefusion.filesystem import is_video, is_directory, filter_image_paths
+from facefusion.frame_prefetcher import create_prefetch_queue, take_prefetched_frame, clear_prefetch_queue
+from facefusion.model_registry import hold_models
+from facefusion.mytqdm import mytqdm as tqdm
+from facefusion.processors.frame.core import get_frame_processors_modules
+from facefusion.typing import VisionFrame, Face, Fps, StreamStats, StreamSink
+from facefusion.vision import read_image, read_static_images
+
+STREAM_SCALES = [1.0, 0.75, 0.5]
+STREAM_ADAPT_INTERVAL = 1.0
+STREAM_STATS: StreamStats = \
+    {
+        'fps': 0.0,
+        'latency': 0.0,
+        'dropped': 0,
+        'scale': 1.0,
+        'face_detector_size': None
+    }
+STREAM_LATENCIES: Deque[float] = deque(maxlen=100000)
+STREAM_LATENCY_BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2500]
+THREAD_LOCK: threading.Lock = threading.Lock()
+
+
+class FileCapture:
+    """Replays a video or image sequence with the interface of cv2.VideoCapture."""
+
+    def __init__(self, capture_path: str, capture_fps: Optional[Fps] = None) -> None:
+        self.capture_fps = capture_fps
+        self.video_capture: Optional[cv2.VideoCapture] = None
+        self.frame_paths: List[str] = []
+        self.frame_index = 0
+        self.start_time: Optional[float] = None
+        if is_video(capture_path):
+            self.video_capture = cv2.VideoCapture(capture_path)
+        elif is_directory(capture_path):
+            self.frame_paths = filter_image_paths(sorted(glob.glob(os.path.join(capture_path, '*'))))
+        else:
+            self.frame_paths = filter_image_paths(sorted(glob.glob(capture_path)))
+        self.prefetch_queue = create_prefetch_queue(self.frame_paths, read_image)
+
+    def isOpened(self) -> bool:
+        if self.video_capture:
+            return self.video_capture.isOpened()
+        return self.frame_index < len(self.frame_paths)
+
+    def read(self) -> Tuple[bool, Optional[VisionFrame]]:
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        if self.capture_fps:
+            wait_time = self.start_time + self.frame_index / self.capture_fps - time.perf_counter()
+            if wait_time > 0:
+                time.sleep(wait_time)
+        if self.video_capture:
+            has_frame, capture_frame = self.video_capture.read()
+        elif self.frame_index < len(self.frame_paths):
+            capture_frame = take_prefetched_frame(self.prefetch_queue, self.frame_paths[self.frame_index])
+            if capture_frame is None:
+                capture_frame = read_image(self.frame_paths[self.frame_index])
+            has_frame = capture_frame is not None
+        else:
+            has_frame, capture_frame = False, None
+        self.frame_index += 1
+        return has_frame, capture_frame
+
+    def release(self) -> None:
+        if self.video_capture:
+            self.video_capture.release()
+        clear_prefetch_queue(self.prefetch_queue)
+        self.frame_paths = []
+
+
+def get_stream_stats() -> StreamStats:
+    with THREAD_LOCK:
+        return STREAM_STATS.copy()
+
+
+def update_stream_stats(**stream_stats: Any) -> None:
+    with THREAD_LOCK:
+        STREAM_STATS.update(stream_stats)
+
+
+def get_stream_latencies() -> List[float]:
+    with THREAD_LOCK:
+        return list(STREAM_LATENCIES)
+
+
+def run_capture(capture: cv2.VideoCapture, capture_slot: Dict[str, Any], capture_condition: threading.Condition,
+                capture_event: threading.Event) -> None:
+    while not capture_event.is_set() and capture and capture.isOpened():
+        has_frame, capture_frame = capture.read()
+        if not has_frame:
+            break
+        with capture_condition:
+            if capture_slot['frame'] is not None:
+                capture_slot['dropped'] += 1
+            capture_slot['frame'] = capture_frame
+            capture_slot['time'] = time.perf_counter()
+            capture_condition.notify()
+    with capture_condition:
+        capture_slot['closed'] = True
+        capture_condition.notify()
+
+
+def take_capture_frame(capture_slot: Dict[str, Any], capture_condition: threading.Condition,
+                       timeout: float) -> Tuple[Optional[VisionFrame], float]:
+    with capture_condition:
+        capture_condition.wait_for(lambda: capture_slot['frame'] is not None or capture_slot['closed'], timeout)
+        capture_frame, capture_time = capture_slot['frame'], capture_slot['time']
+        capture_slot['frame'] = None
+    return capture_frame, capture_time
+
+
+def multi_process_capture(source_face: Face, capture: cv2.VideoCapture,
+                          capture_fps: Fps) -> Generator[VisionFrame, None, None]:
+    in_flight_limit = facefusion.globals.stream_in_flight_limit or facefusion.globals.execution_thread_count
+    latency_target = facefusion.globals.stream_latency_target / 1000
+    face_detector_size = facefusion.globals.face_detector_size
+    stream_face_detector_size = face_detector_size
+    capture_slot = \
+        {
+            'frame': None,
+            'time': 0.0,
+            'dropped': 0,
+            'closed': False
+        }
+    capture_condition = threading.Condition()
+    capture_event = threading.Event()
+    in_flight: Deque[Tuple[Future, float]] = deque()
+    dropped_in_flight: List[Future] = []
+    stream_level = 0
+    stream_latency = 0.0
+    stream_dropped = 0
+    stream_times: Deque[float] = deque(maxlen=30)
+    adapt_time = time.perf_counter()
+
+    update_stream_stats(fps=0.0, latency=0.0, dropped=0, scale=1.0, face_detector_size=face_detector_size)
+    with THREAD_LOCK:
+        STREAM_LATENCIES.clear()
+    start_stream_analyser()
+    threading.Thread(target=run_capture, args=(capture, capture_slot, capture_condition, capture_event),
+                     daemon=True).start()
+    try:
+        with hold_models(), tqdm(desc=wording.get('processing'), unit='frame', ascii=' =',
+                                 disable=facefusion.globals.log_level in ['warn', 'error']) as progress:
+            with ThreadPoolExecutor(max_workers=in_flight_limit) as executor:
+                while not capture_slot['closed'] or capture_slot['frame'] is not None or in_flight:
+                    dropped_in_flight = [future for future in dropped_in_flight if not future.done()]
+                    if len(in_flight) + len(dropped_in_flight) < in_flight_limit:
+                        capture_frame, capture_time = take_capture_frame(capture_slot, capture_condition,
+                                                                         0.001 if in_flight else 0.1)
+                        if capture_frame is not None:
+                            if analyse_stream(capture_frame):
+                                return
+                            future = executor.submit(process_stream_frame, source_face, capture_frame,
+                                                     STREAM_SCALES[stream_level], stream_face_detector_size)
+                            in_flight.append((future, capture_time))
+                    else:
+                        time.sleep(0.001)
+                    while in_flight:
+                        future, capture_time = in_flight[0]
+                        if future.done():
+                            in_flight.popleft()
+                            capture_frame = future.result()
+                            current_time = time.perf_counter()
+                            frame_latency = current_time - capture_time
+                            stream_latency = stream_latency * 0.9 + frame_latency * 0.1 if stream_latency else frame_latency
+                            stream_times.append(current_time)
+                            with THREAD_LOCK:
+                                STREAM_LATENCIES.append(frame_latency * 1000)
+                            progress.update()
+                            yield capture_frame
+                            continue
+                        # drop a stalled frame once a newer one is ready and the latency target is exceeded
+                        is_late = time.perf_counter() - capture_time > latency_target
+                        if is_late and any(next_future.done() for next_future, _ in list(in_flight)[1:]):
+                            in_flight.popleft()
+                            # a running frame cannot be cancelled, it keeps its worker and its slot until done
+                            if not future.cancel():
+                                dropped_in_flight.append(future)
+                            stream_dropped += 1
+                            continue
+                        break
+                    current_time = time.perf_counter()
+                    if current_time - adapt_time > STREAM_ADAPT_INTERVAL:
+                        adapt_time = current_time
+                        if stream_latency > latency_target and stream_level < len(STREAM_SCALES) - 1:
+                            stream_level += 1
+                        elif stream_latency < latency_target / 2 and stream_level > 0:
+                            stream_level -= 1
+                        stream_face_detector_size = reduce_face_detector_size(face_detector_size, stream_level)
+                        stream_fps = calc_stream_fps(stream_times)
+                        update_stream_stats(fps=stream_fps, latency=stream_latency * 1000,
+                                            dropped=stream_dropped + capture_slot['dropped'],
+                                            scale=STREAM_SCALES[stream_level],
+                                            face_detector_size=stream_face_detector_size)
+                        progress.set_postfix(fps=round(stream_fps, 2), latency=round(stream_latency * 1000))
+    finally:
+        capture_event.set()
+        stop_stream_analyser()
+
+
+def calc_stream_fps(stream_times: Deque[float]) -> float:
+    if len(stream_times) > 1 and stream_times[-1] > stream_times[0]:
+        return (len(stream_times) - 1) / (stream_times[-1] - stream_times[0])
+    return 0.0
+
+
+def reduce_face_detector_size(face_detector_size: str, stream_level: int) -> str:
+    face_detector_sizes = facefusion.choices.face_detector_set.get(facefusion.globals.face_detector_model, [])
+    if face_detector_size in face_detector_sizes:
+        return face_detector_sizes[max(0, face_detector_sizes.index(face_detector_size) - stream_level)]
+    return face_detector_size
+
+
+def process_stream_frame(source_face: Face, target_vision_frame: VisionFrame, stream_scale: float = 1.0,
+                         face_detector_size: Optional[str] = None) -> VisionFrame:
+    if stream_scale < 1.0:
+        target_height, target_width = target_vision_frame.shape[:2]
+        target_vision_frame = cv2.resize(target_vision_frame,
+                                         (int(target_width * stream_scale), int(target_height * stream_scale)))
+    for frame_processor_module in get_frame_processors_modules(facefusion.globals.frame_processors):
+        logger.disable()
+        if frame_processor_module.pre_process('stream'):
+            logger.enable()
+            target_vision_frame = frame_processor_module.process_frame(
+            {
+                'source_face': source_face,
+                'reference_faces': None,
+                'source_audio_frame': None,
+                'target_vision_frame': target_vision_frame,
+                'face_detector_size': face_detector_size
+            })
+    if stream_scale < 1.0:
+        target_height, target_width = target_vision_frame.shape[:2]
+        target_vision_frame = cv2.resize(target_vision_frame,
+                                         (round(target_width / stream_scale), round(target_height / stream_scale)))
+    return target_vision_frame
+
+
+def open_stream_sink(stream_sink: StreamSink, stream_sink_path: Optional[str]) -> Dict[str, Any]:
+    if stream_sink in ['raw', 'ffmpeg'] and not stream_sink_path:
+        raise ValueError(wording.get('stream_sink_path_required').format(stream_sink=stream_sink))
+    return\
+        {
+            'sink': stream_sink,
+            'path': stream_sink_path,
+            'file': open(stream_sink_path, 'wb') if stream_sink == 'raw' else None,
+            'process': None
+        }
+
+
+def write_stream_sink(stream_sink: Dict[str, Any], vision_frame: VisionFrame, stream_fps: Fps) -> None:
+    if stream_sink['sink'] == 'raw':
+        stream_sink['file'].write(vision_frame.tobytes())
+    if stream_sink['sink'] == 'ffmpeg':
+        if stream_sink['process'] is None:
+            frame_height, frame_width = vision_frame.shape[:2]
+            commands = ['-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', str(frame_width) + 'x' + str(frame_height), '-r',
+                        str(stream_fps), '-i', '-', '-y', stream_sink['path']]
+            stream_sink['process'] = open_ffmpeg(commands)
+        stream_sink['process'].stdin.write(vision_frame.tobytes())
+
+
+def close_stream_sink(stream_sink: Dict[str, Any]) -> None:
+    if stream_sink['file']:
+        stream_sink['file'].close()
+    if stream_sink['process']:
+        stream_sink['process'].stdin.close()
+        stream_sink['process'].wait()
+
+
+def create_latency_histogram(latencies: List[float]) -> Dict[str, int]:
+    latency_histogram = {}
+    bucket_start = 0
+    for bucket_end in STREAM_LATENCY_BUCKETS:
+        latency_histogram[str(bucket_start) + '-' + str(bucket_end) + 'ms'] = \
+            sum(bucket_start <= latency < bucket_end for latency in latencies)
+        bucket_start = bucket_end
+    latency_histogram[str(bucket_start) + 'ms+'] = sum(latency >= bucket_start for latency in latencies)
+    return latency_histogram
+
+
+def run_stream_benchmark(stream_source_path: str, stream_source_fps: Optional[Fps], stream_sink: StreamSink,
+                         stream_sink_path: Optional[str]) -> Dict[str, Any]:
+    facefusion.globals.face_selector_mode = 'one'
+    facefusion.globals.face_analyser_order = 'large-small'
+    source_frames = read_static_images(facefusion.globals.source_paths)
+    source_face = get_average_face(source_frames)
+    capture = FileCapture(stream_source_path, stream_source_fps)
+    if not capture.isOpened():
+        raise ValueError(wording.get('stream_source_not_opened').format(stream_source_path=stream_source_path))
+    sink = open_stream_sink(stream_sink, stream_sink_path)
+    frame_total = 0
+    start_time = time.perf_counter()
+    try:
+        for capture_frame in multi_process_capture(source_face, capture, stream_source_fps or 25):
+            write_stream_sink(sink, capture_frame, stream_source_fps or 25)
+            frame_total += 1
+    finally:
+        capture.release()
+        close_stream_sink(sink)
+    process_time = time.perf_counter() - start_time
+    latencies = get_stream_latencies()
+    stream_report = \
+        {
+            'stream_source_path': stream_source_path,
+            'stream_source_fps': stream_source_fps,
+            'stream_sink': stream_sink,
+            'frame_total': frame_total,
+            'process_time': round(process_time, 3),
+            'fps': round(frame_total / process_time, 2) if process_time else 0.0,
+            'dropped': get_stream_stats().get('dropped'),
+            'latency_mean': round(float(numpy.mean(latencies)), 2) if latencies else None,
+            'latency_p50': round(float(numpy.percentile(latencies, 50)), 2) if latencies else None,
+            'latency_p95': round(float(numpy.percentile(latencies, 95)), 2) if latencies else None,
+            'latency_p99': round(float(numpy.percentile(latencies, 99)), 2) if latencies else None,
+            'latency_histogram': create_latency_histogram(latencies)
+        }
+    logger.info(wording.get('stream_replayed').format(frame_total=frame_total, fps=stream_report.get('fps')),
+                __name__.upper())
+    return stream_report
@@ -1,4 +1,4 @@
-from typing import Any, Literal, Callable, List, Tuple, Dict, TypedDict
+from typing import Any, Literal, Callable, List, Tuple, Dict, TypedDict, Optional
 from collections import namedtuple
 import numpy
 
@@ -30,7 +30,30 @@ FaceStore = TypedDict('FaceStore',
                           'static_faces': FaceSet,
                           'reference_faces': FaceSet
                       })
+VideoMetadata = namedtuple('VideoMetadata',
+                           [
+                               'path',
+                               'mtime',
+                               'size',
+                               'fps',
+                               'frame_total',
+                               'resolution',
+                               'keyframes',
+                               'has_audio',
+                               'streams'
+                           ])
+Workspace = namedtuple('Workspace',
+                       [
+                           'job_id',
+                           'target_path',
+                           'directory_path',
+                           'tier',
+                           'size',
+                           'temp_frame_format',
+                           'temp_frame_compression'
+                       ])
 VisionFrame = numpy.ndarray[Any, Any]
+VideoDecoder = Dict[str, Any]
 Mask = numpy.ndarray[Any, Any]
 Matrix = numpy.ndarray[Any, Any]
 Translation = numpy.ndarray[Any, Any]
@@ -43,16 +66,97 @@ Fps = float
 Padding = Tuple[int, int, int, int]
 Resolution = Tuple[int, int]
 
+PreviewProxy = TypedDict('PreviewProxy',
+                         {
+                             'proxy_path': str,
+                             'frame_map': List[int]
+                         })
+StreamStats = TypedDict('StreamStats',
+                        {
+                            'fps': float,
+                            'latency': float,
+                            'dropped': int,
+                            'scale': float,
+                            'face_detector_size': Optional[str]
+                        })
+ModelEntry = TypedDict('ModelEntry',
+                       {
+                           'key': str,
+                           'name': str,
+                           'path': str,
+                           'model': Any,
+                           'size': int,
+                           'references': int
+                       })
+ModelManifestEntry = TypedDict('ModelManifestEntry',
+                               {
+                                   'url': str,
+                                   'size': int,
+                                   'sha256': str,
+                                   'mtime': float
+                               })
+ModelChecksum = TypedDict('ModelChecksum',
+                          {
+                              'size': int,
+                              'sha256': str
+                          })
+TempFrameCodec = TypedDict('TempFrameCodec',
+                           {
+                               'temp_frame_format': str,
+                               'temp_frame_quality': int,
+                               'temp_frame_compression': Optional[int],
+                               'encode_time': float,
+                               'decode_time': float,
+                               'frame_size': int,
+                               'psnr': float
+                           })
+ImportTime = TypedDict('ImportTime',
+                       {
+                           'module': str,
+                           'self': float,
+                           'cumulative': float
+                       })
+MemorySnapshot = TypedDict('MemorySnapshot',
+                           {
+                               'rss': int,
+                               'allocated': int,
+                               'device': int
+                           })
+Metric = TypedDict('Metric',
+                   {
+                       'count': int,
+                       'total': float,
+                       'min': float,
+                       'max': float,
+                       'buckets': List[int]
+                   })
+BenchmarkSetup = TypedDict('BenchmarkSetup',
+                           {
+                               'name': str,
+                               'frame_processors': List[str],
+                               'frame_processor_models': Dict[str, str],
+                               'execution_providers': List[str]
+                           })
 QueuePayload = TypedDict('QueuePayload',
                          {
                              'frame_number': int,
-                             'frame_path': str
+                             'frame_path': str,
+                             'face_presence_key': Optional[str]
                          })
+PrefetchQueue = TypedDict('PrefetchQueue',
+                          {
+                              'frame_paths': Any,
+                              'futures': Dict[str, Any],
+                              'read_frame': Callable[[str], Any],
+                              'depth': int
+                          })
 Update_Process = Callable[[str], None]
 Process_Frames = Callable[[List[str], List[QueuePayload], Update_Process], None]
 
 Template = Literal['arcface_112_v1', 'arcface_112_v2', 'arcface_128_v2', 'ffhq_512']
 ProcessMode = Literal['output', 'preview', 'stream']
+StreamSink = Literal['null', 'raw', 'ffmpeg']
+ProfileMode = Literal['trace', 'flamegraph', 'imports']
 
 LogLevel = Literal['error', 'warn', 'info', 'debug']
 VideoMemoryStrategy = Literal['strict', 'moderate', 'tolerant']
@@ -66,7 +170,7 @@ FaceRecognizerModel = Literal['arcface_blendswap', 'arcface_inswapper', 'arcface
 FaceMaskType = Literal['box', 'occlusion', 'region']
 FaceMaskRegion = Literal[
     'skin', 'left-eyebrow', 'right-eyebrow', 'left-eye', 'right-eye', 'eye-glasses', 'nose', 'mouth', 'upper-lip', 'lower-lip']
-TempFrameFormat = Literal['jpg', 'png', 'bmp']
+TempFrameFormat = Literal['jpg', 'png', 'bmp', 'tiff', 'raw']
 OutputVideoEncoder = Literal['libx264', 'libx265', 'libvpx-vp9', 'h264_nvenc', 'hevc_nvenc']
 OutputVideoPreset = Literal[
     'ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow', 'slower', 'veryslow']
@@ -4,7 +4,8 @@ import gradio
 
 import facefusion.globals
 import facefusion.choices
-from facefusion import wording
+from facefusion import face_analyser, wording
+from facefusion.model_warmer import warm_up_models_async
 from facefusion.typing import FaceAnalyserOrder, FaceAnalyserAge, FaceAnalyserGender, FaceDetectorModel
 from facefusion.uis.core import register_ui_component
 
@@ -91,6 +92,8 @@ def update_face_analyser_gender(face_analyser_gender: FaceAnalyserGender) -> Non
 
 def update_face_detector_model(face_detector_model: FaceDetectorModel) -> None:
     facefusion.globals.face_detector_model = face_detector_model
+    face_analyser.pre_check()
+    warm_up_models_async(facefusion.globals.frame_processors, facefusion.globals.face_mask_types)
 
 
 def update_face_detector_size(face_detector_size: str) -> None:
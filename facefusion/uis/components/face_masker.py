@@ -3,7 +3,7 @@ import gradio
 
 import facefusion.globals
 import facefusion.choices
-from facefusion import wording
+from facefusion import face_masker, wording
 from facefusion.typing import FaceMaskType, FaceMaskRegion
 from facefusion.uis.core import register_ui_component, get_ui_component
 
@@ -204,6 +204,7 @@ def update_face_mask_type(face_mask_types: List[FaceMaskType]) -> Tuple[gradio.u
     if not face_mask_types:
         face_mask_types = facefusion.choices.face_mask_types
     facefusion.globals.face_mask_types = face_mask_types
+    face_masker.pre_check()
     has_box_mask = 'box' in face_mask_types
     has_region_mask = 'region' in face_mask_types
     return gradio.update(value=face_mask_types), gradio.update(visible=has_box_mask), gradio.update(
@@ -6,6 +6,7 @@ import facefusion.globals
 from facefusion import wording
 from facefusion.processors.frame.core import load_frame_processor_module, clear_frame_processors_modules
 from facefusion.filesystem import list_directory
+from facefusion.model_warmer import warm_up_models_async
 from facefusion.uis.core import register_ui_component
 
 FRAME_PROCESSORS_CHECKBOX_GROUP: Optional[gradio.CheckboxGroup] = None
@@ -35,6 +36,7 @@ def update_frame_processors(frame_processors: List[str]) -> gradio.CheckboxGroup
         frame_processor_module = load_frame_processor_module(frame_processor)
         if not frame_processor_module.pre_check():
             return gradio.update(visible=True)
+    warm_up_models_async(frame_processors, facefusion.globals.face_mask_types)
     return gradio.update(value=frame_processors, choices=sort_frame_processors(frame_processors))
 
 
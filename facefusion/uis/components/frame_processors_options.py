@@ -3,7 +3,8 @@ from typing import List, Optional, Tuple
 import gradio
 
 import facefusion.globals
-from facefusion import wording
+from facefusion import face_analyser, wording
+from facefusion.model_warmer import warm_up_models_async
 from facefusion.processors.frame.core import load_frame_processor_module
 from facefusion.processors.frame import globals as frame_processors_globals, choices as frame_processors_choices
 from facefusion.processors.frame.typings import FaceDebuggerItem, FaceEnhancerModel, FaceSwapperModel, \
@@ -134,6 +135,7 @@ def update_face_enhancer_model(face_enhancer_model: FaceEnhancerModel) -> gradio
     face_enhancer_module.set_options('model', face_enhancer_module.MODELS[face_enhancer_model])
     if not face_enhancer_module.pre_check():
         return gradio.update(visible=True)
+    warm_up_models_async(facefusion.globals.frame_processors, facefusion.globals.face_mask_types)
     return gradio.update(value=face_enhancer_model)
 
 
@@ -151,11 +153,13 @@ def update_face_swapper_model(face_swapper_model: FaceSwapperModel) -> gradio.up
         facefusion.globals.face_recognizer_model = 'arcface_simswap'
     if face_swapper_model == 'uniface_256':
         facefusion.globals.face_recognizer_model = 'arcface_uniface'
+    face_analyser.pre_check()
     face_swapper_module = load_frame_processor_module('face_swapper')
     face_swapper_module.clear_frame_processor()
     face_swapper_module.set_options('model', face_swapper_module.MODELS[face_swapper_model])
     if not face_swapper_module.pre_check():
         return gradio.update()
+    warm_up_models_async(facefusion.globals.frame_processors, facefusion.globals.face_mask_types)
     return gradio.update(value=face_swapper_model)
 
 
@@ -166,6 +170,7 @@ def update_frame_enhancer_model(frame_enhancer_model: FrameEnhancerModel) -> gra
     frame_enhancer_module.set_options('model', frame_enhancer_module.MODELS[frame_enhancer_model])
     if not frame_enhancer_module.pre_check():
         return gradio.update()
+    warm_up_models_async(facefusion.globals.frame_processors, facefusion.globals.face_mask_types)
     return gradio.update(value=frame_enhancer_model)
 
 
@@ -179,5 +184,6 @@ def update_lip_syncer_model(lip_syncer_model: LipSyncerModel) -> gradio.Dropdown
     lip_syncer_module.clear_frame_processor()
     lip_syncer_module.set_options('model', lip_syncer_module.MODELS[lip_syncer_model])
     if lip_syncer_module.pre_check():
+        warm_up_models_async(facefusion.globals.frame_processors, facefusion.globals.face_mask_types)
         return gradio.Dropdown(value=lip_syncer_model)
     return gradio.Dropdown()
@@ -1,5 +1,8 @@
+import hashlib
+import threading
+from collections import OrderedDict
 from time import sleep
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import cv2
 import gradio
@@ -11,14 +14,17 @@ from facefusion.common_helper import get_first
 from facefusion.content_analyser import analyse_frame
 from facefusion.core import conditional_append_reference_faces
 from facefusion.face_analyser import clear_face_analyser, get_average_face
-from facefusion.face_store import clear_static_faces, get_reference_faces, clear_reference_faces
+from facefusion.face_store import clear_static_faces, get_reference_faces, clear_reference_faces, create_frame_hash
 from facefusion.filesystem import is_video, is_image, filter_audio_paths
+from facefusion.model_registry import hold_models
+from facefusion.preview_proxy import get_preview_frame
 from facefusion.processors.frame.core import load_frame_processor_module
+from facefusion.processors.frame import globals as frame_processors_globals
 from facefusion.typing import Face, FaceSet, AudioFrame, VisionFrame
 from facefusion.uis.components.face_masker import update_mask_buttons
 from facefusion.uis.core import get_ui_component, register_ui_component
 from facefusion.uis.typing import ComponentName
-from facefusion.vision import get_video_frame, count_video_frame_total, normalize_frame_color, \
+from facefusion.vision import count_video_frame_total, normalize_frame_color, \
     read_static_image, read_static_images, detect_fps, resize_frame_resolution
 
 PREVIEW_IMAGE: Optional[gradio.Image] = None
@@ -27,6 +33,16 @@ PREVIEW_FRAME_BACK_BUTTON: Optional[gradio.Button] = None
 PREVIEW_FRAME_FORWARD_BUTTON: Optional[gradio.Button] = None
 PREVIEW_FRAME_BACK_FIVE_BUTTON: Optional[gradio.Button] = None
 PREVIEW_FRAME_FORWARD_FIVE_BUTTON: Optional[gradio.Button] = None
+PREVIEW_CACHE: 'OrderedDict[str, Any]' = OrderedDict()
+PREVIEW_CACHE_SIZE = 48
+PREVIEW_DEBOUNCE = 0.1
+PREVIEW_GENERATION = 0
+PREVIEW_BLEND_OPTIONS = \
+    {
+        'face_enhancer': 'face_enhancer_blend',
+        'frame_enhancer': 'frame_enhancer_blend'
+    }
+THREAD_LOCK: threading.Lock = threading.Lock()
 
 
 def render() -> None:
@@ -68,7 +84,7 @@ def render() -> None:
         preview_image_args['value'] = normalize_frame_color(preview_frame)
     if is_video(facefusion.globals.target_path):
         frame_number = facefusion.globals.reference_frame_number
-        temp_frame = get_video_frame(facefusion.globals.target_path, frame_number)
+        temp_frame = get_preview_frame(facefusion.globals.target_path, frame_number)
         preview_frame = process_preview_frame(reference_faces, reference_faces_2, source_face, source_face_2, source_audio_frame, temp_frame, frame_number)
         preview_image_args['value'] = normalize_frame_color(preview_frame)
         preview_image_args['visible'] = True
@@ -205,6 +221,7 @@ def listen() -> None:
 
 
 def clear_and_update_preview_image(frame_number: int = 0) -> gradio.Image:
+    clear_preview_cache()
     clear_face_analyser()
     clear_reference_faces()
     clear_static_faces()
@@ -213,6 +230,16 @@ def clear_and_update_preview_image(frame_number: int = 0) -> gradio.Image:
 
 
 def update_preview_image(frame_number: int = 0) -> gradio.Image:
+    preview_generation = next_preview_generation()
+    sleep(PREVIEW_DEBOUNCE)
+    if is_preview_stale(preview_generation):
+        return gradio.update(), gradio.update(), gradio.update()
+    # the preview runs outside a job, hold its models so they are not evicted between processors
+    with hold_models():
+        return render_preview_image(frame_number, preview_generation)
+
+
+def render_preview_image(frame_number: int, preview_generation: int) -> gradio.Image:
     global_processors = facefusion.globals.frame_processors
     from facefusion.uis.components.frame_processors import sort_frame_processors
     global_processors = sort_frame_processors(global_processors)
@@ -237,12 +264,16 @@ def update_preview_image(frame_number: int = 0) -> gradio.Image:
     reference_faces, reference_faces_2 = get_reference_faces() if 'reference' in facefusion.globals.face_selector_mode else None
     if is_image(facefusion.globals.target_path):
         target_frame = read_static_image(facefusion.globals.target_path)
-        preview_frame = process_preview_frame(reference_faces, reference_faces_2, source_face, source_face_2, source_audio_frame, target_frame, -1)
+        preview_frame = process_preview_frame(reference_faces, reference_faces_2, source_face, source_face_2, source_audio_frame, target_frame, -1, preview_generation)
+        if preview_frame is None:
+            return gradio.update(), gradio.update(), gradio.update()
         preview_frame = normalize_frame_color(preview_frame)
         return gradio.update(value=preview_frame, visible=True), enable_button, disable_button
     if is_video(facefusion.globals.target_path):
-        temp_frame = get_video_frame(facefusion.globals.target_path, frame_number)
-        preview_frame = process_preview_frame(reference_faces, reference_faces_2, source_face, source_face_2, source_audio_frame, temp_frame, frame_number)
+        temp_frame = get_preview_frame(facefusion.globals.target_path, frame_number)
+        preview_frame = process_preview_frame(reference_faces, reference_faces_2, source_face, source_face_2, source_audio_frame, temp_frame, frame_number, preview_generation)
+        if preview_frame is None:
+            return gradio.update(), gradio.update(), gradio.update()
         preview_frame = normalize_frame_color(preview_frame)
         return gradio.update(value=preview_frame, visible=True), enable_button, disable_button
     return gradio.update(value=None, visible=True), enable_button, disable_button
@@ -288,9 +319,14 @@ def update_preview_frame_slider() -> gradio.update:
 
 
 def process_preview_frame(reference_faces: FaceSet, reference_faces_2: FaceSet, source_face: Face, source_face_2: Face, source_audio_frame: AudioFrame,
-                          target_vision_frame: VisionFrame, frame_number=-1) -> VisionFrame:
+                          target_vision_frame: VisionFrame, frame_number=-1, preview_generation: Optional[int] = None) -> Optional[VisionFrame]:
     target_vision_frame = resize_frame_resolution(target_vision_frame, 640, 640)
-    if analyse_frame(target_vision_frame):
+    preview_key = create_frame_hash(target_vision_frame) or str(frame_number)
+    is_nsfw = get_preview_cache('analyse:' + preview_key)
+    if is_nsfw is None:
+        is_nsfw = analyse_frame(target_vision_frame)
+        set_preview_cache('analyse:' + preview_key, is_nsfw)
+    if is_nsfw:
         return cv2.GaussianBlur(target_vision_frame, (99, 99), 0)
     global_processors = facefusion.globals.frame_processors
     priority_order = ['face_swapper', 'lip_syncer', 'face_enhancer', 'frame_enhancer', 'face_debugger']
@@ -301,23 +337,136 @@ def process_preview_frame(reference_faces: FaceSet, reference_faces_2: FaceSet,
         key=lambda fp: priority_order.index(fp) if fp in priority_order else len(priority_order)
     )
     source_frame = target_vision_frame.copy()
+    preview_key = create_preview_key(preview_key, create_face_options(frame_number))
     for frame_processor in global_processors:
-        print("Processing with frame processor: ", frame_processor)
-        frame_processor_module = load_frame_processor_module(frame_processor)
-        logger.disable()
-        if frame_processor_module.pre_process('preview'):
-            logger.enable()
-            target_vision_frame = frame_processor_module.process_frame(
-                {
-                    'reference_faces': reference_faces,
-                    'reference_faces_2': reference_faces_2,
-                    'source_face': source_face,
-                    'source_face_2': source_face_2,
-                    'source_audio_frame': source_audio_frame,
-                    'target_vision_frame': target_vision_frame,
-                    'target_frame_number': frame_number,
-                    'source_frame': source_frame,
-                })
-        # Apply overlay to temp_frame
+        if is_preview_stale(preview_generation):
+            return None
+        preview_key = create_preview_key(preview_key, frame_processor, create_frame_processor_options(frame_processor))
+        blend_option = PREVIEW_BLEND_OPTIONS.get(frame_processor)
+        paste_vision_frame = get_preview_cache(preview_key)
+        if paste_vision_frame is None:
+            print("Processing with frame processor: ", frame_processor)
+            frame_processor_module = load_frame_processor_module(frame_processor)
+            logger.disable()
+            if frame_processor_module.pre_process('preview'):
+                logger.enable()
+                frame_processor_inputs = \
+                    {
+                        'reference_faces': reference_faces,
+                        'reference_faces_2': reference_faces_2,
+                        'source_face': source_face,
+                        'source_face_2': source_face_2,
+                        'source_audio_frame': source_audio_frame,
+                        'target_vision_frame': target_vision_frame.copy(),
+                        'target_frame_number': frame_number,
+                        'source_frame': source_frame,
+                    }
+                if blend_option:
+                    frame_processor_inputs[blend_option] = 100
+                paste_vision_frame = frame_processor_module.process_frame(frame_processor_inputs)
+                set_preview_cache(preview_key, paste_vision_frame)
+            else:
+                paste_vision_frame = target_vision_frame
+        # Enhancers are cached at full strength and re-blended, so blend changes skip the inference
+        if blend_option:
+            blend = getattr(frame_processors_globals, blend_option)
+            paste_vision_frame = blend_preview_frame(target_vision_frame, paste_vision_frame, blend)
+            preview_key = create_preview_key(preview_key, blend)
+        target_vision_frame = paste_vision_frame
 
     return target_vision_frame
+
+
+def blend_preview_frame(target_vision_frame: VisionFrame, paste_vision_frame: VisionFrame, blend: int) -> VisionFrame:
+    if blend >= 100:
+        return paste_vision_frame
+    target_vision_frame = cv2.resize(target_vision_frame, (paste_vision_frame.shape[1], paste_vision_frame.shape[0]))
+    return cv2.addWeighted(target_vision_frame, 1 - blend / 100, paste_vision_frame, blend / 100, 0)
+
+
+def create_face_options(frame_number: int) -> Tuple[Any, ...]:
+    reference_face_dict = facefusion.globals.reference_face_dict or {}
+    reference_face_dict_2 = facefusion.globals.reference_face_dict_2 or {}
+    return \
+        (
+            facefusion.globals.source_paths,
+            facefusion.globals.source_paths_2,
+            facefusion.globals.face_selector_mode,
+            facefusion.globals.reference_face_position,
+            facefusion.globals.reference_face_distance,
+            facefusion.globals.reference_frame_number,
+            create_reference_faces_key(reference_face_dict),
+            create_reference_faces_key(reference_face_dict_2),
+            facefusion.globals.face_analyser_order,
+            facefusion.globals.face_analyser_age,
+            facefusion.globals.face_analyser_gender,
+            facefusion.globals.face_detector_model,
+            facefusion.globals.face_detector_size,
+            facefusion.globals.face_detector_score,
+            facefusion.globals.face_mask_types,
+            facefusion.globals.face_mask_blur,
+            facefusion.globals.face_mask_padding,
+            facefusion.globals.face_mask_regions,
+            facefusion.globals.mask_enabled_times,
+            facefusion.globals.mask_disabled_times,
+            facefusion.globals.output_video_fps,
+            frame_number
+        )
+
+
+def create_reference_faces_key(reference_face_dict: Dict[Any, List[Face]]) -> List[Tuple[str, List[str]]]:
+    # faces are told apart by their content, another face picked on the same frame must not hit the cache
+    return sorted((str(frame_number), [create_face_hash(face) for face in faces]) for frame_number, faces in
+                  reference_face_dict.items())
+
+
+def create_face_hash(face: Face) -> str:
+    face_hash = hashlib.sha1()
+    for face_value in [getattr(face, 'normed_embedding', None), getattr(face, 'bounding_box', None)]:
+        if face_value is not None:
+            face_hash.update(face_value.tobytes())
+    return face_hash.hexdigest()
+
+
+def create_frame_processor_options(frame_processor: str) -> Tuple[Any, ...]:
+    if frame_processor == 'face_debugger':
+        return tuple(frame_processors_globals.face_debugger_items)
+    if frame_processor in ['face_swapper', 'face_enhancer', 'frame_enhancer', 'lip_syncer']:
+        return getattr(frame_processors_globals, frame_processor + '_model'),
+    return ()
+
+
+def create_preview_key(*values: Any) -> str:
+    return hashlib.sha1(repr(values).encode('utf-8')).hexdigest()
+
+
+def get_preview_cache(preview_key: str) -> Any:
+    with THREAD_LOCK:
+        if preview_key in PREVIEW_CACHE:
+            PREVIEW_CACHE.move_to_end(preview_key)
+            return PREVIEW_CACHE[preview_key]
+    return None
+
+
+def set_preview_cache(preview_key: str, value: Any) -> None:
+    with THREAD_LOCK:
+        PREVIEW_CACHE[preview_key] = value
+        while len(PREVIEW_CACHE) > PREVIEW_CACHE_SIZE:
+            PREVIEW_CACHE.popitem(last=False)
+
+
+def clear_preview_cache() -> None:
+    with THREAD_LOCK:
+        PREVIEW_CACHE.clear()
+
+
+def next_preview_generation() -> int:
+    global PREVIEW_GENERATION
+
+    with THREAD_LOCK:
+        PREVIEW_GENERATION += 1
+        return PREVIEW_GENERATION
+
+
+def is_preview_stale(preview_generation: Optional[int]) -> bool:
+    return preview_generation is not None and preview_generation != PREVIEW_GENERATION
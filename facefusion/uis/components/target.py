@@ -10,6 +10,7 @@ from facefusion.download import download_video
 from facefusion.face_store import clear_reference_faces, clear_static_faces
 from facefusion.ffmpeg import extract_audio_from_video
 from facefusion.filesystem import is_image, is_video, is_url, TEMP_DIRECTORY_PATH, clear_temp
+from facefusion.preview_proxy import create_preview_proxy
 from facefusion.uis.core import register_ui_component, get_ui_component
 from facefusion.uis.components.source import update as source_update
 from facefusion.uis.typing import File
@@ -108,6 +109,7 @@ def update_from_path(path: str) -> Tuple[gradio.update, gradio.update, gradio.up
     if is_video(path):
         facefusion.globals.target_path = path
         clear_temp()
+        create_preview_proxy(path)
         return gradio.update(value=path, visible=True), gradio.update(value=path, visible=True), gradio.update(
             value=None, visible=False), gradio.update(value=path, visible=True)
     print(f"Invalid path {path}")
@@ -149,6 +151,7 @@ def update(file: IO[Any]) -> Tuple[gradio.Image, gradio.Video]:
                 gradio.update(visible=False))
     if file_path and is_video(file_path):
         facefusion.globals.target_path = file_path
+        create_preview_proxy(file_path)
         return (gradio.update(value=file_path, visible=False),
                 gradio.update(value=None, visible=False),
                 gradio.update(value=file_path, visible=True),
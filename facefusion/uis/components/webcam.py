@@ -1,21 +1,18 @@
-from typing import Optional, Generator, Deque, List
+from typing import Optional, Generator, List
 import os
 import platform
 import subprocess
 import cv2
 import gradio
 from time import sleep
-from concurrent.futures import ThreadPoolExecutor
-from collections import deque
 
 import facefusion.globals
 from facefusion import logger, wording
-from facefusion.content_analyser import analyse_stream
-from facefusion.typing import VisionFrame, Face, Fps
+from facefusion.typing import VisionFrame, Fps
 from facefusion.face_analyser import get_average_face
-from facefusion.processors.frame.core import get_frame_processors_modules, load_frame_processor_module
+from facefusion.processors.frame.core import load_frame_processor_module
 from facefusion.ffmpeg import open_ffmpeg
-from facefusion.mytqdm import mytqdm as tqdm
+from facefusion.realtime import multi_process_capture
 from facefusion.vision import normalize_frame_color, read_static_images, unpack_resolution
 from facefusion.uis.typing import StreamMode, WebcamMode, ComponentName
 from facefusion.uis.core import get_ui_component
@@ -115,26 +112,6 @@ def start(webcam_mode: WebcamMode, webcam_resolution: str, webcam_fps: Fps) -> G
                 yield None
 
 
-def multi_process_capture(source_face : Face, webcam_capture : cv2.VideoCapture, webcam_fps : Fps) -> Generator[VisionFrame, None, None]:
-    with tqdm(desc = wording.get('processing'), unit = 'frame', ascii = ' =', disable = facefusion.globals.log_level in [ 'warn', 'error' ]) as progress:
-        with ThreadPoolExecutor(max_workers=facefusion.globals.execution_thread_count) as executor:
-            futures = []
-            deque_capture_frames: Deque[VisionFrame] = deque()
-            while webcam_capture and webcam_capture.isOpened():
-                _, capture_frame = webcam_capture.read()
-                if analyse_stream(capture_frame, webcam_fps):
-                    return
-                future = executor.submit(process_stream_frame, source_face, capture_frame)
-                futures.append(future)
-                for future_done in [future for future in futures if future.done()]:
-                    capture_frame = future_done.result()
-                    deque_capture_frames.append(capture_frame)
-                    futures.remove(future_done)
-                while deque_capture_frames:
-                    progress.update()
-                    yield deque_capture_frames.popleft()
-
-
 def update() -> None:
     for frame_processor in facefusion.globals.frame_processors:
         frame_processor_module = load_frame_processor_module(frame_processor)
@@ -149,21 +126,6 @@ def stop() -> gradio.Image:
     return gradio.Image(value=None)
 
 
-def process_stream_frame(source_face : Face, target_vision_frame : VisionFrame) -> VisionFrame:
-    for frame_processor_module in get_frame_processors_modules(facefusion.globals.frame_processors):
-        logger.disable()
-        if frame_processor_module.pre_process('stream'):
-            logger.enable()
-            target_vision_frame = frame_processor_module.process_frame(
-            {
-                'source_face': source_face,
-                'reference_faces': None,
-                'source_audio_frame': None,
-                'target_vision_frame': target_vision_frame
-            })
-    return target_vision_frame
-
-
 def open_stream(stream_mode: StreamMode, stream_resolution: str, stream_fps: Fps) -> subprocess.Popen[bytes]:
     commands = ['-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', stream_resolution, '-r', str(stream_fps), '-i', '-']
     if stream_mode == 'udp':
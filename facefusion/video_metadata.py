@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from facefusion import logger
+from facefusion.filesystem import is_video, output_dir
+from facefusion.typing import VideoMetadata, Fps
+
+VIDEO_METADATA_DIRECTORY_PATH = os.path.join(output_dir, 'facefusion', 'metadata')
+VIDEO_METADATA: Dict[Tuple[str, float, int], VideoMetadata] = {}
+VIDEO_METADATA_LOCKS: Dict[str, threading.Lock] = {}
+KEYFRAME_PROBES: Set[Tuple[str, float, int]] = set()
+THREAD_LOCK: threading.Lock = threading.Lock()
+
+
+def get_video_metadata(video_path: str) -> Optional[VideoMetadata]:
+    if not is_video(video_path):
+        return None
+    video_path = os.path.abspath(video_path)
+    video_stat = os.stat(video_path)
+    video_key = (video_path, video_stat.st_mtime, video_stat.st_size)
+
+    with THREAD_LOCK:
+        video_metadata = VIDEO_METADATA.get(video_key)
+        if video_metadata:
+            return video_metadata
+        video_metadata_lock = VIDEO_METADATA_LOCKS.setdefault(video_path, threading.Lock())
+
+    # the probe holds a lock per path only, lookups of other videos are never blocked
+    with video_metadata_lock:
+        with THREAD_LOCK:
+            video_metadata = VIDEO_METADATA.get(video_key)
+        if video_metadata is None:
+            video_metadata = read_video_metadata(video_key)
+        if video_metadata is None:
+            video_metadata = probe_video_metadata(video_key)
+            if video_metadata:
+                write_video_metadata(video_metadata)
+        if video_metadata:
+            with THREAD_LOCK:
+                VIDEO_METADATA[video_key] = video_metadata
+            if video_metadata.keyframes is None:
+                probe_video_keyframes_async(video_key)
+    return video_metadata
+
+
+def clear_video_metadata() -> None:
+    with THREAD_LOCK:
+        VIDEO_METADATA.clear()
+
+
+def probe_video_metadata(video_key: Tuple[str, float, int]) -> Optional[VideoMetadata]:
+    video_path, video_mtime, video_size = video_key
+    commands = ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_streams', '-show_format', video_path]
+    try:
+        result = subprocess.run(commands, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        probe = json.loads(result.stdout)
+    except (OSError, ValueError, subprocess.CalledProcessError) as exception:
+        logger.debug(str(exception), __name__.upper())
+        return None
+    streams = probe.get('streams', [])
+    video_stream = next((stream for stream in streams if stream.get('codec_type') == 'video'), None)
+    if video_stream is None:
+        return None
+    video_fps = parse_frame_rate(video_stream)
+    video_duration = float(video_stream.get('duration') or probe.get('format', {}).get('duration') or 0)
+    frame_total = int(video_stream.get('nb_frames') or round(video_duration * (video_fps or 0)))
+    return VideoMetadata(
+        path=video_path,
+        mtime=video_mtime,
+        size=video_size,
+        fps=video_fps,
+        frame_total=frame_total,
+        resolution=(int(video_stream.get('width', 0)), int(video_stream.get('height', 0))),
+        keyframes=None,
+        has_audio=any(stream.get('codec_type') == 'audio' for stream in streams),
+        streams=streams
+    )
+
+
+def probe_video_keyframes(video_key: Tuple[str, float, int]) -> None:
+    # only keyframes are decoded, yet the whole file is read, so this stays off the lookup path
+    commands = ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-select_streams', 'v:0', '-skip_frame', 'nokey',
+                '-show_entries', 'frame=best_effort_timestamp_time', video_key[0]]
+    try:
+        result = subprocess.run(commands, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        probe = json.loads(result.stdout)
+        keyframes = [float(frame.get('best_effort_timestamp_time')) for frame in probe.get('frames', []) if
+                     frame.get('best_effort_timestamp_time') is not None]
+    except (OSError, ValueError, subprocess.CalledProcessError) as exception:
+        logger.debug(str(exception), __name__.upper())
+        keyframes = []
+    with THREAD_LOCK:
+        KEYFRAME_PROBES.discard(video_key)
+        video_metadata = VIDEO_METADATA.get(video_key)
+        if video_metadata:
+            video_metadata = video_metadata._replace(keyframes=keyframes)
+            VIDEO_METADATA[video_key] = video_metadata
+    if video_metadata:
+        write_video_metadata(video_metadata)
+
+
+def probe_video_keyframes_async(video_key: Tuple[str, float, int]) -> None:
+    with THREAD_LOCK:
+        if video_key in KEYFRAME_PROBES:
+            return
+        KEYFRAME_PROBES.add(video_key)
+    threading.Thread(target=probe_video_keyframes, args=(video_key,), name='keyframe_probe', daemon=True).start()
+
+
+def parse_frame_rate(video_stream: Dict[str, Any]) -> Optional[Fps]:
+    for frame_rate in [video_stream.get('avg_frame_rate'), video_stream.get('r_frame_rate')]:
+        if frame_rate and '/' in frame_rate:
+            numerator, denominator = map(float, frame_rate.split('/'))
+            if numerator and denominator:
+                return numerator / denominator
+    return None
+
+
+def get_video_metadata_path(video_path: str) -> str:
+    video_hash = hashlib.sha1(video_path.encode('utf-8')).hexdigest()
+    return os.path.join(VIDEO_METADATA_DIRECTORY_PATH, video_hash + '.json')
+
+
+def read_video_metadata(video_key: Tuple[str, float, int]) -> Optional[VideoMetadata]:
+    video_metadata_path = get_video_metadata_path(video_key[0])
+    if os.path.isfile(video_metadata_path):
+        try:
+            with open(video_metadata_path, 'r') as video_metadata_file:
+                video_metadata = VideoMetadata(**json.load(video_metadata_file))
+        except (OSError, ValueError, TypeError):
+            return None
+        if (video_metadata.path, video_metadata.mtime, video_metadata.size) == video_key:
+            return video_metadata._replace(resolution=tuple(video_metadata.resolution))
+    return None
+
+
+def write_video_metadata(video_metadata: VideoMetadata) -> None:
+    video_metadata_path = get_video_metadata_path(video_metadata.path)
+    try:
+        os.makedirs(VIDEO_METADATA_DIRECTORY_PATH, exist_ok=True)
+        with open(video_metadata_path + '.tmp', 'w') as video_metadata_file:
+            json.dump(video_metadata._asdict(), video_metadata_file)
+        os.replace(video_metadata_path + '.tmp', video_metadata_path)
+    except OSError as exception:
+        logger.debug(str(exception), __name__.upper())
+
+
+def get_keyframe_before(video_path: str, frame_number: int) -> Optional[int]:
+    video_metadata = get_video_metadata(video_path)
+    if video_metadata and video_metadata.fps and video_metadata.keyframes:
+        frame_time = frame_number / video_metadata.fps
+        keyframes: List[float] = [keyframe for keyframe in video_metadata.keyframes if keyframe <= frame_time]
+        if keyframes:
+            return int(round(keyframes[-1] * video_metadata.fps))
+        return 0
+    return None
@@ -1,72 +1,147 @@
+import os
+import threading
+from collections import OrderedDict
 from functools import lru_cache
 from typing import Optional, List, Tuple
 
 import cv2
 
+import facefusion.globals
 from facefusion.choices import video_template_sizes
-from facefusion.filesystem import is_image, is_video
-from facefusion.typing import VisionFrame, Resolution
+from facefusion.filesystem import is_image, is_video, find_workspace
+from facefusion.metrics import timed
+from facefusion.raw_frames import is_raw_frame_path, read_raw_frame, write_raw_frame
+from facefusion.typing import VisionFrame, Resolution, VideoDecoder
+from facefusion.video_metadata import get_video_metadata, get_keyframe_before
 
-LAST_VIDEO_PATH = None
-LAST_FPS = None
+VIDEO_DECODER_POOL_SIZE = 4
+VIDEO_DECODER_GRAB_LIMIT = 60
+VIDEO_FRAME_CACHE_MEMORY = 1024 ** 2 * 256
+VIDEO_DECODERS: 'OrderedDict[str, VideoDecoder]' = OrderedDict()
+VIDEO_FRAME_CACHE: 'OrderedDict[Tuple[str, float, int], VisionFrame]' = OrderedDict()
+VIDEO_FRAME_CACHE_BYTES = 0
+THREAD_LOCK: threading.Lock = threading.Lock()
 
 
 def get_video_frame(video_path: str, frame_number: int = 0) -> Optional[VisionFrame]:
+    global VIDEO_FRAME_CACHE_BYTES
+
     if is_video(video_path):
-        video_capture = cv2.VideoCapture(video_path)
-        if video_capture.isOpened():
-            frame_total = video_capture.get(cv2.CAP_PROP_FRAME_COUNT)
-            video_capture.set(cv2.CAP_PROP_POS_FRAMES, min(frame_total, frame_number - 1))
-            has_vision_frame, vision_frame = video_capture.read()
-            video_capture.release()
-            if has_vision_frame:
-                return vision_frame
+        frame_total = count_video_frame_total(video_path)
+        frame_index = max(0, min(frame_total - 1, frame_number - 1))
+        frame_key = (os.path.abspath(video_path), os.path.getmtime(video_path), frame_index)
+
+        with THREAD_LOCK:
+            vision_frame = VIDEO_FRAME_CACHE.get(frame_key)
+            if vision_frame is not None:
+                VIDEO_FRAME_CACHE.move_to_end(frame_key)
+                return vision_frame.copy()
+        video_decoder = get_video_decoder(video_path)
+        if video_decoder:
+            with video_decoder['lock']:
+                vision_frame = read_video_decoder_frame(video_decoder, frame_index)
+            if vision_frame is not None:
+                with THREAD_LOCK:
+                    if frame_key not in VIDEO_FRAME_CACHE:
+                        VIDEO_FRAME_CACHE[frame_key] = vision_frame
+                        VIDEO_FRAME_CACHE_BYTES += vision_frame.nbytes
+                    # the cache is bounded by bytes since a single 4k frame weighs 25 megabytes
+                    while VIDEO_FRAME_CACHE_BYTES > VIDEO_FRAME_CACHE_MEMORY and len(VIDEO_FRAME_CACHE) > 1:
+                        _, evicted_vision_frame = VIDEO_FRAME_CACHE.popitem(last=False)
+                        VIDEO_FRAME_CACHE_BYTES -= evicted_vision_frame.nbytes
+                return vision_frame.copy()
     return None
 
 
-def detect_fps(video_path: str) -> Optional[float]:
-    global LAST_VIDEO_PATH, LAST_FPS
-    if video_path:
-        if LAST_VIDEO_PATH == video_path and LAST_FPS is not None:
-            return LAST_FPS
-        if is_video(video_path):
+def get_video_decoder(video_path: str) -> Optional[VideoDecoder]:
+    video_path = os.path.abspath(video_path)
+    video_mtime = os.path.getmtime(video_path)
+
+    with THREAD_LOCK:
+        video_decoder = VIDEO_DECODERS.get(video_path)
+        if video_decoder and video_decoder['mtime'] != video_mtime:
+            release_video_decoder(VIDEO_DECODERS.pop(video_path))
+            video_decoder = None
+        if video_decoder is None:
             video_capture = cv2.VideoCapture(video_path)
-            if video_capture.isOpened():
-                video_fps = video_capture.get(cv2.CAP_PROP_FPS)
-                video_capture.release()
-                LAST_VIDEO_PATH = video_path
-                LAST_FPS = video_fps
-                return video_fps
+            if not video_capture.isOpened():
+                return None
+            video_decoder =\
+                {
+                    'capture': video_capture,
+                    'path': video_path,
+                    'position': 0,
+                    'mtime': video_mtime,
+                    'lock': threading.Lock()
+                }
+            VIDEO_DECODERS[video_path] = video_decoder
+            while len(VIDEO_DECODERS) > VIDEO_DECODER_POOL_SIZE:
+                _, evicted_video_decoder = VIDEO_DECODERS.popitem(last=False)
+                release_video_decoder(evicted_video_decoder)
+        VIDEO_DECODERS.move_to_end(video_path)
+    return video_decoder
+
+
+def read_video_decoder_frame(video_decoder: VideoDecoder, frame_index: int) -> Optional[VisionFrame]:
+    video_capture = video_decoder['capture']
+    if not video_capture.isOpened():
+        return None
+    frame_offset = frame_index - video_decoder['position']
+    keyframe_index = None
+    if frame_offset > VIDEO_DECODER_GRAB_LIMIT:
+        keyframe_index = get_keyframe_before(video_decoder['path'], frame_index)
+    # without keyframe information a far jump seeks rather than grabbing every frame in between
+    if frame_offset < 0 or frame_offset > VIDEO_DECODER_GRAB_LIMIT and \
+            (keyframe_index is None or keyframe_index > video_decoder['position']):
+        video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+    else:
+        for _ in range(frame_offset):
+            video_capture.grab()
+    has_vision_frame, vision_frame = video_capture.read()
+    video_decoder['position'] = frame_index + 1
+    if has_vision_frame:
+        return vision_frame
+    return None
+
+
+def release_video_decoder(video_decoder: VideoDecoder) -> None:
+    with video_decoder['lock']:
+        video_decoder['capture'].release()
+
+
+def clear_video_decoders() -> None:
+    global VIDEO_FRAME_CACHE_BYTES
+
+    with THREAD_LOCK:
+        while VIDEO_DECODERS:
+            _, video_decoder = VIDEO_DECODERS.popitem()
+            release_video_decoder(video_decoder)
+        VIDEO_FRAME_CACHE.clear()
+        VIDEO_FRAME_CACHE_BYTES = 0
+
+
+def detect_fps(video_path: str) -> Optional[float]:
+    return detect_video_fps(video_path)
 
 
 def count_video_frame_total(video_path: str) -> int:
-    if is_video(video_path):
-        video_capture = cv2.VideoCapture(video_path)
-        if video_capture.isOpened():
-            video_frame_total = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
-            video_capture.release()
-            return video_frame_total
+    video_metadata = get_video_metadata(video_path)
+    if video_metadata:
+        return video_metadata.frame_total
     return 0
 
 
 def detect_video_fps(video_path: str) -> Optional[float]:
-    if is_video(video_path):
-        video_capture = cv2.VideoCapture(video_path)
-        if video_capture.isOpened():
-            video_fps = video_capture.get(cv2.CAP_PROP_FPS)
-            video_capture.release()
-            return video_fps
+    video_metadata = get_video_metadata(video_path)
+    if video_metadata:
+        return video_metadata.fps
     return None
 
 
 def detect_video_resolution(video_path: str) -> Optional[Tuple[float, float]]:
-    if is_video(video_path):
-        video_capture = cv2.VideoCapture(video_path)
-        if video_capture.isOpened():
-            width = video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)
-            height = video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT)
-            video_capture.release()
-            return width, height
+    video_metadata = get_video_metadata(video_path)
+    if video_metadata:
+        return video_metadata.resolution
     return None
 
 
@@ -138,16 +213,39 @@ def read_static_images(image_paths: List[str]) -> Optional[List[VisionFrame]]:
     return frames
 
 
+@timed('read_image')
 def read_image(image_path: str) -> Optional[VisionFrame]:
+    if is_raw_frame_path(image_path):
+        return read_raw_frame(image_path)
     if is_image(image_path):
         return cv2.imread(image_path)
     return None
 
 
+@timed('write_image')
 def write_image(image_path: str, frame: VisionFrame) -> bool:
+    if image_path and is_raw_frame_path(image_path):
+        return write_raw_frame(image_path, frame)
     if image_path:
         try:
-            return cv2.imwrite(image_path, frame)
+            return cv2.imwrite(image_path, frame, get_image_write_params(image_path))
         except:
             return False
     return False
+
+
+def get_image_write_params(image_path: str) -> List[int]:
+    image_extension = os.path.splitext(image_path)[1].lower()
+    workspace = find_workspace(image_path)
+    image_compression = workspace.temp_frame_compression if workspace else None
+    return create_image_write_params(image_extension, facefusion.globals.temp_frame_quality, image_compression)
+
+
+def create_image_write_params(image_extension: str, image_quality: int, image_compression: Optional[int]) -> List[int]:
+    if image_extension in ['.jpg', '.jpeg']:
+        return [cv2.IMWRITE_JPEG_QUALITY, image_quality]
+    if image_extension == '.png' and image_compression is not None:
+        return [cv2.IMWRITE_PNG_COMPRESSION, image_compression]
+    if image_extension in ['.tif', '.tiff']:
+        return [cv2.IMWRITE_TIFF_COMPRESSION, 1]
+    return []
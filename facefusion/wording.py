@@ -10,6 +10,13 @@ WORDING : Dict[str, Any] =\
     'processing': 'Processing',
     'downloading': 'Downloading',
     'temp_frames_not_found': 'Temporary frames not found',
+    'ram_workspace_exhausted': 'Temporary frames exceed the memory workspace, extracting them to disk',
+    'writing_frame_failed': 'Writing frame {frame_path} failed',
+    'writing_frames_failed': 'Writing temporary frames failed',
+    'temp_frame_format_not_supported': 'Temporary frame format {temp_frame_format} does not fit the frame processors, falling back to {fallback_format}',
+    'temp_frame_codec_selected': 'Selected {temp_frame_format} for the temporary frames',
+    'temp_frame_codec_measured': 'Measured {temp_frame_format} {temp_frame_compression} at {milliseconds}ms with {frame_size} bytes and {psnr}dB',
+    'temp_frame_codec_exceeds_budget': 'No temporary frame codec meets the quality within the workspace budget',
     'compressing_image_succeed': 'Compressing image succeed',
     'compressing_image_skipped': 'Compressing image skipped',
     'merging_video_fps': 'Merging video with {video_fps} FPS',
@@ -23,8 +30,23 @@ WORDING : Dict[str, Any] =\
     'processing_video_succeed': 'Processing to video succeed in {seconds} seconds',
     'processing_video_failed': 'Processing to video failed',
     'model_download_not_done': 'Download of the model is not done',
+    'download_size_mismatch': 'Size of the download does not match',
+    'download_checksum_mismatch': 'Checksum of the download does not match',
+    'download_failed': 'Download of {url} failed on attempt {attempt}: {exception}',
+    'profiling_imports_failed': 'Profiling imports of {module_name} failed',
+    'trace_written': 'Trace written to {trace_path}',
+    'flamegraph_written': 'Flamegraph samples written to {flamegraph_path}',
+    'download_gave_up': 'Download of {url} gave up after all retries',
     'model_file_not_present': 'File of the model is not present',
+    'model_evicted': 'Evicted model {model_name}',
+    'warm_up_failed': 'Warm up of {model_name} failed: {exception}',
+    'warm_up_done': 'Warmed up {model_total} models in {seconds} seconds',
     'select_image_source': 'Select a image for source path',
+    'benchmark_target_not_created': 'Benchmark target {target_path} could not be created',
+    'benchmark_report_written': 'Benchmark report written to {report_path}',
+    'benchmark_regression': 'Benchmark regression {regression}',
+    'benchmark_result': '{setup} {target} {fps} FPS',
+    'benchmark_regression_value': '{setup} {target} {key} {baseline} -> {value}',
     'select_audio_source': 'Select a audio for source path',
     'select_video_target': 'Select a video for target path',
     'select_image_or_video_target': 'Select a image or video for target path',
@@ -35,6 +57,10 @@ WORDING : Dict[str, Any] =\
     'ui_layout_not_loaded': 'UI layout {ui_layout} could not be loaded',
     'ui_layout_not_implemented': 'UI layout {ui_layout} not implemented correctly',
     'stream_not_loaded': 'Stream {stream_mode} could not be loaded',
+    'stream_sink_path_required': 'Stream sink {stream_sink} requires a sink path',
+    'stream_source_not_opened': 'Stream source {stream_source_path} could not be opened',
+    'stream_replayed': 'Stream replayed {frame_total} frames at {fps} FPS',
+    'preview_proxy_not_created': 'Preview proxy for {video_path} could not be created',
     'point': '.',
     'comma': ',',
     'colon': ':',
@@ -51,8 +77,12 @@ WORDING : Dict[str, Any] =\
         'output': 'specify the output file or directory',
         # misc
         'skip_download': 'omit automate downloads and remote lookups',
+        'model_mirror': 'download models from a mirror url or local directory instead of their origin',
         'headless': 'run the program without a user interface',
         'log_level': 'adjust the message severity displayed in the terminal',
+        'content_analyser_interval': 'specify the seconds between content checks of a live stream',
+        'metrics': 'collect stage timings and counters per job for the metrics api',
+        'profile_modes': 'save a chrome trace, flamegraph samples or the slowest imports (choices: {choices})',
         # execution
         'execution_providers': 'accelerate the model inference using different providers (choices: {choices}, ...)',
         'execution_thread_count': 'specify the amount of parallel threads while processing',
@@ -60,6 +90,26 @@ WORDING : Dict[str, Any] =\
         # memory
         'video_memory_strategy': 'balance fast frame processing and low vram usage',
         'system_memory_limit': 'limit the available ram that can be used while processing',
+        'memory_profile': 'measure the memory of each stage and model load for the memory api',
+        'model_memory_budget': 'limit the megabytes of loaded models before unused ones are evicted',
+        # stream
+        'stream_latency_target': 'specify the end to end latency in milliseconds the live stream adapts to',
+        'stream_in_flight_limit': 'specify the amount of live frames processed at once (defaults to the thread count)',
+        'stream_source_path': 'replay a video or image sequence as live stream in headless mode',
+        'stream_source_fps': 'specify the replay rate of the stream source (0 replays as fast as possible)',
+        'stream_sink': 'choose where the processed stream frames are written: {choices}',
+        'stream_sink_path': 'specify the file the raw or ffmpeg stream sink writes to',
+        # benchmark
+        'benchmark': 'run the benchmark suite on synthetic targets in headless mode',
+        'benchmark_resolutions': 'specify the heights of the synthetic benchmark targets',
+        'benchmark_face_counts': 'specify the amount of faces pasted into the synthetic benchmark targets',
+        'benchmark_frame_total': 'specify the amount of frames of the synthetic benchmark targets',
+        'benchmark_cycles': 'specify the amount of measured runs per benchmark',
+        'benchmark_warmup_cycles': 'specify the amount of unmeasured runs before each benchmark',
+        'benchmark_matrix': 'specify the benchmark setups as processor:model,processor@provider',
+        'benchmark_report_path': 'specify the JSON report path, a CSV report is written next to it',
+        'benchmark_baseline_path': 'compare the results against a stored JSON report',
+        'benchmark_regression_tolerance': 'specify the relative change that is flagged as regression',
         # face analyser
         'face_analyser_order': 'specify the order in which the face analyser detects faces.',
         'face_analyser_age': 'filter the detected faces based on their age',
@@ -82,7 +132,11 @@ WORDING : Dict[str, Any] =\
         'trim_frame_end': 'specify the the end frame of the target video',
         'temp_frame_format': 'specify the temporary resources format',
         'temp_frame_quality': 'specify the temporary resources quality',
+        'temp_frame_compression': 'specify the png compression level of the temporary resources',
+        'temp_frame_calibration': 'measure the temporary frame codecs on the target and pick the fastest that fits',
         'keep_temp': 'keep the temporary resources after processing',
+        'temp_ram_path': 'specify the tmpfs directory for temporary frames',
+        'temp_ram_budget': 'specify the megabytes of temporary frames kept in the tmpfs before spilling to disk',
         # output creation
         'output_image_quality': 'specify the image quality which translates to the compression factor',
         'output_video_encoder': 'specify the encoder use for the video compression',
@@ -3,7 +3,7 @@ import logging
 from fastapi import FastAPI
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette import status
 from starlette.requests import Request
 
@@ -33,6 +33,31 @@ def facefusion_api(_, app: FastAPI):
         from facefusion.uis.components.job_queue import JOB_QUEUE
         return {"queue": [job.to_dict() for job in JOB_QUEUE]}
 
+    @app.get("/facefusion/stream")
+    async def get_stream():
+        from facefusion.realtime import get_stream_stats
+        return get_stream_stats()
+
+    @app.get("/facefusion/memory")
+    async def get_memory():
+        from facefusion.memory_profiler import get_memory_report
+        return get_memory_report()
+
+    @app.get("/facefusion/models")
+    async def get_models():
+        from facefusion.model_registry import get_model_registry
+        return get_model_registry()
+
+    @app.get("/facefusion/metrics")
+    async def get_metrics():
+        from facefusion.metrics import get_metrics
+        return get_metrics()
+
+    @app.get("/facefusion/metrics/prometheus")
+    async def get_prometheus_metrics():
+        from facefusion.metrics import export_prometheus_metrics
+        return PlainTextResponse(export_prometheus_metrics(), media_type="text/plain; version=0.0.4")
+
 
 try:
     from modules.shared import cmd_opts
@@ -1,21 +1,18 @@
-import importlib
-import inspect
 import os
-import pkgutil
 import time
 from typing import Union, List
 
 import gradio
 import gradio as gr
+import numpy
 from PIL import Image
-from transformers.image_transforms import to_pil_image
 
 from facefusion import face_analyser, wording, globals
 from facefusion.processors.frame import choices as frame_processors_choices, globals as frame_processors_globals
-from facefusion.download import conditional_download
-from facefusion.filesystem import TEMP_DIRECTORY_PATH
+from facefusion.filesystem import TEMP_DIRECTORY_PATH, sweep_workspaces
 from facefusion.job_params import JobParams
 from facefusion.memory import tune_performance
+from facefusion.model_warmer import warm_up_models_async
 from facefusion.uis.components.output import start_job
 from facefusion.uis.core import load_ui_layout_module
 from modules import script_callbacks, scripts, scripts_postprocessing, ui_components
@@ -24,39 +21,32 @@ from modules import script_callbacks, scripts, scripts_postprocessing, ui_compon
 os.environ['CUDA_MODULE_LOADING'] = 'LAZY'
 
 
-def run_pre_checks(package):
-    # Recursively find all submodules in a given package
-    def find_submodules(package):
-        if hasattr(package, '__path__'):
-            for importer, modname, ispkg in pkgutil.walk_packages(package.__path__, package.__name__ + '.'):
-                # Import the module
-                module = importlib.import_module(modname)
+def run_pre_checks():
+    from facefusion import content_analyser, face_masker
+    from facefusion.processors.frame.core import load_frame_processor_module
 
-                # Check if the module has a 'pre_check' function
-                if hasattr(module, 'pre_check') and inspect.isfunction(module.pre_check):
-                    # Run the 'pre_check' function
-                    module.pre_check()
+    # only fetch the selected models, the ui pre checks again when another one is chosen
+    for module in [content_analyser, face_analyser, face_masker]:
+        module.pre_check()
+    for frame_processor in globals.frame_processors:
+        load_frame_processor_module(frame_processor).pre_check()
 
-                if hasattr(module, "MODELS"):
-                    for model in module.MODELS:
-                        model_path = os.path.dirname(module.MODELS[model]["path"])
-                        if model_path.endswith("models"):
-                            # Remove the path and the trailing slash
-                            model_path = model_path[:-7]
-                        model_url = module.MODELS[model]["url"]
-                        conditional_download(model_path, [model_url])
-                # Recursively check for submodules
-                find_submodules(module)
 
-    # Start the recursive search from the initial package
-    find_submodules(package)
+def to_pil_image(image) -> Image.Image:
+    image = numpy.asarray(image)
+    if image.ndim == 3 and image.shape[0] in (1, 3, 4) and image.shape[-1] not in (1, 3, 4):
+        image = image.transpose(1, 2, 0)
+    if image.dtype != numpy.uint8:
+        image = (numpy.clip(image, 0, 1) * 255 if image.max() <= 1 else numpy.clip(image, 0, 255)).astype(numpy.uint8)
+    return Image.fromarray(image.squeeze())
 
 
 def load_facefusion():
-    import facefusion
-    run_pre_checks(facefusion)
+    run_pre_checks()
+    sweep_workspaces(owned=True)
     face_analyser.pre_check()
     tune_performance()
+    warm_up_models_async(globals.frame_processors, globals.face_mask_types)
     with gr.Blocks() as ff_ui:
         with gr.Tabs():
             with gr.Tab(label="File"):
@@ -3,7 +3,6 @@ import time
 
 import gradio as gr
 from PIL import Image
-from transformers.image_transforms import to_pil_image
 
 from facefusion.filesystem import TEMP_DIRECTORY_PATH
 from facefusion.job_params import JobParams
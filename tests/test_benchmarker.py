@@ -0,0 +1,25 @@
+from facefusion.benchmarker import parse_benchmark_matrix, compare_benchmark_results
+
+
+def test_parse_benchmark_matrix() -> None:
+    benchmark_setups = parse_benchmark_matrix(['face_swapper:inswapper_128,face_enhancer@cuda', 'frame_enhancer'])
+
+    assert benchmark_setups[0].get('name') == 'face_swapper:inswapper_128,face_enhancer@cuda'
+    assert benchmark_setups[0].get('frame_processors') == ['face_swapper', 'face_enhancer']
+    assert benchmark_setups[0].get('frame_processor_models') == {'face_swapper': 'inswapper_128'}
+    assert benchmark_setups[0].get('execution_providers') == ['cuda']
+    assert benchmark_setups[1].get('frame_processors') == ['frame_enhancer']
+    assert benchmark_setups[1].get('frame_processor_models') == {}
+    assert benchmark_setups[1].get('execution_providers') == []
+
+
+def test_compare_benchmark_results() -> None:
+    baseline_results =\
+        [
+            {'setup': 'face_swapper', 'target': 'target-360p.mp4', 'fps': 20.0, 'latency_p95': 100.0, 'peak_memory': 1000}
+        ]
+
+    assert compare_benchmark_results([{'setup': 'face_swapper', 'target': 'target-360p.mp4', 'fps': 19.0, 'latency_p95': 105.0, 'peak_memory': 1050}], baseline_results, 0.1) == []
+    assert len(compare_benchmark_results([{'setup': 'face_swapper', 'target': 'target-360p.mp4', 'fps': 10.0, 'latency_p95': 200.0, 'peak_memory': 1000}], baseline_results, 0.1)) == 2
+    assert compare_benchmark_results([{'setup': 'face_swapper', 'target': 'target-720p.mp4', 'fps': 1.0}], baseline_results, 0.1) == []
+    assert compare_benchmark_results([{'setup': 'face_swapper', 'target': 'target-360p.mp4', 'fps': None}], baseline_results, 0.1) == []
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from tqdm import tqdm
+
+from facefusion import download
+from facefusion.download import download_file, verify_download
+
+MODEL_DATA = bytes(range(256)) * 4096
+REQUESTS: List[Dict[str, Any]] = []
+FAILURES: Dict[str, int] = {}
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        REQUESTS.append({'path': self.path, 'range': self.headers.get('Range')})
+        if FAILURES.get(self.path):
+            FAILURES[self.path] -= 1
+            self.send_error(500)
+            return
+        start = 0
+        if self.headers.get('Range'):
+            start = int(self.headers.get('Range').split('=')[1].split('-')[0])
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes ' + str(start) + '-' + str(len(MODEL_DATA) - 1) + '/' +
+                             str(len(MODEL_DATA)))
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(MODEL_DATA) - start))
+        self.end_headers()
+        self.wfile.write(MODEL_DATA[start:])
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture(scope='module')
+def server_url() -> Iterator[str]:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RangeRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:' + str(server.server_address[1])
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def before_each(tmp_path: Any, monkeypatch: Any) -> None:
+    REQUESTS.clear()
+    FAILURES.clear()
+    monkeypatch.setattr(download, 'MODEL_MANIFEST_PATH', str(tmp_path / 'manifest.json'))
+    monkeypatch.setattr(download, 'MODEL_MANIFEST', {})
+    monkeypatch.setattr(download, 'DOWNLOAD_BACKOFF', 0)
+
+
+def test_download_file(server_url: str, tmp_path: Any) -> None:
+    model_path = str(tmp_path / 'model.onnx')
+
+    assert download_file(server_url + '/model.onnx', model_path, len(MODEL_DATA), tqdm(disable=True)) is True
+    assert open(model_path, 'rb').read() == MODEL_DATA
+    assert not (tmp_path / 'model.onnx.part').exists()
+    assert verify_download(model_path) is True
+    assert download.MODEL_MANIFEST.get('model.onnx').get('sha256') == hashlib.sha256(MODEL_DATA).hexdigest()
+
+
+def test_download_file_resume(server_url: str, tmp_path: Any) -> None:
+    model_path = str(tmp_path / 'model.onnx')
+    open(model_path + '.part', 'wb').write(MODEL_DATA[:1000])
+
+    assert download_file(server_url + '/model.onnx', model_path, len(MODEL_DATA), tqdm(disable=True)) is True
+    assert REQUESTS[0].get('range') == 'bytes=1000-'
+    assert open(model_path, 'rb').read() == MODEL_DATA
+
+
+def test_download_file_retry(server_url: str, tmp_path: Any) -> None:
+    model_path = str(tmp_path / 'model.onnx')
+    FAILURES['/model.onnx'] = 2
+
+    assert download_file(server_url + '/model.onnx', model_path, len(MODEL_DATA), tqdm(disable=True)) is True
+    assert len(REQUESTS) == 3
+    FAILURES['/broken.onnx'] = 5
+    assert download_file(server_url + '/broken.onnx', str(tmp_path / 'broken.onnx'), len(MODEL_DATA),
+                         tqdm(disable=True)) is False
+
+
+def test_download_file_checksum(server_url: str, tmp_path: Any) -> None:
+    model_path = str(tmp_path / 'model.onnx')
+    download.MODEL_MANIFEST['model.onnx'] =\
+        {
+            'url': server_url + '/model.onnx',
+            'size': len(MODEL_DATA),
+            'sha256': hashlib.sha256(b'other').hexdigest(),
+            'mtime': 0
+        }
+
+    assert download_file(server_url + '/model.onnx', model_path, len(MODEL_DATA), tqdm(disable=True)) is False
+    assert not (tmp_path / 'model.onnx').exists()
+
+
+def test_download_file_shipped_checksum(server_url: str, tmp_path: Any, monkeypatch: Any) -> None:
+    model_path = str(tmp_path / 'model.onnx')
+    monkeypatch.setattr(download, 'get_model_checksums', lambda: {'model.onnx': {'size': len(MODEL_DATA), 'sha256': hashlib.sha256(MODEL_DATA).hexdigest()}})
+
+    assert download_file(server_url + '/model.onnx', model_path, len(MODEL_DATA), tqdm(disable=True)) is True
+    assert verify_download(model_path) is True
+    open(model_path, 'r+b').write(b'corrupt')
+    assert verify_download(model_path) is False
@@ -0,0 +1,23 @@
+from typing import Any
+
+import numpy
+
+from facefusion.raw_frames import create_raw_header, finalize_raw_frames, get_raw_frame_paths, read_raw_frame, \
+    write_raw_frame, close_raw_frames
+
+
+def test_raw_frames(tmp_path: Any) -> None:
+    raw_path = str(tmp_path / 'frames.raw')
+    frames = numpy.arange(3 * 4 * 5 * 3, dtype=numpy.uint8).reshape(3, 4, 5, 3)
+    with open(raw_path, 'wb') as raw_file:
+        raw_file.write(create_raw_header((0, 4, 5, 3)))
+        raw_file.write(frames.tobytes() + b'partial')
+
+    assert finalize_raw_frames(raw_path, (5, 4)) == 3
+    frame_paths = get_raw_frame_paths(raw_path)
+    assert len(frame_paths) == 3
+    assert numpy.array_equal(read_raw_frame(frame_paths[1]), frames[1])
+    assert write_raw_frame(frame_paths[2], numpy.zeros((4, 5, 3), numpy.uint8)) is True
+    assert write_raw_frame(frame_paths[2], numpy.zeros((8, 10, 3), numpy.uint8)) is False
+    assert read_raw_frame(frame_paths[2]).sum() == 0
+    close_raw_frames(raw_path)
@@ -0,0 +1,18 @@
+from facefusion.import_profiler import profile_imports, get_import_time, find_heavy_imports
+
+STARTUP_BUDGET = 3.0
+
+
+def test_startup_budget() -> None:
+    assert profile_imports('facefusion.core') is not None
+
+    import_time = get_import_time('facefusion.core')
+
+    assert import_time is not None
+    assert import_time < STARTUP_BUDGET
+
+
+def test_heavy_imports_are_lazy() -> None:
+    assert find_heavy_imports('facefusion.core') == []
+    assert find_heavy_imports('facefusion.processors.frame.modules.frame_enhancer') == []
+    assert find_heavy_imports('facefusion.download') == []